@@ -0,0 +1,72 @@
+# benchmarks/graph_overhead.py
+"""
+Micro-benchmark of LangGraph setup cost: module import (startup), graph
+build + compile (what every run_* call paid before the registry), and the
+registry lookup that replaces it per issue.
+
+    python benchmarks/graph_overhead.py [--repeat 20] [--max-lookup-us 50]
+
+Exits non-zero if a warm lookup exceeds --max-lookup-us, so it can guard
+against regressions in CI.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.INFO)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-lookup-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    import graph_registry
+    imports = {}
+    for name, (module, _, _) in graph_registry.GRAPHS.items():
+        t = time.perf_counter()
+        importlib.import_module(module)
+        imports[name] = time.perf_counter() - t
+    startup = time.perf_counter() - started
+
+    print(f"{'graph':<14}{'import ms':>11}{'compile ms':>12}{'lookup us':>11}")
+    worst_lookup = 0.0
+    compile_ms_by_name = {}
+    for name, (module, builder, kwargs) in graph_registry.GRAPHS.items():
+        build = getattr(importlib.import_module(module), builder)
+        t = time.perf_counter()
+        for _ in range(args.repeat):
+            build(**kwargs).compile()
+        compile_ms = (time.perf_counter() - t) / args.repeat * 1000
+        compile_ms_by_name[name] = compile_ms
+
+        graph_registry.get_compiled(name)   # warm
+        t = time.perf_counter()
+        for _ in range(args.repeat * 100):
+            graph_registry.get_compiled(name)
+        lookup_us = (time.perf_counter() - t) / (args.repeat * 100) * 1e6
+        worst_lookup = max(worst_lookup, lookup_us)
+        print(f"{name:<14}{imports[name] * 1000:>11.1f}{compile_ms:>12.2f}{lookup_us:>11.2f}")
+
+    # per issue, main.py runs the locator once and the patcher up to 3 times
+    per_issue_before = compile_ms_by_name["locator"] + 3 * compile_ms_by_name["patcher"]
+    print(f"\nstartup (imports): {startup * 1000:.1f} ms")
+    print(f"per-issue graph overhead: before ~{per_issue_before:.2f} ms, "
+          f"now ~{worst_lookup * 4 / 1000:.4f} ms")
+
+    if worst_lookup > args.max_lookup_us:
+        print(f"❌ registry lookup {worst_lookup:.2f} us > {args.max_lookup_us} us")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
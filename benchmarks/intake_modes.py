@@ -0,0 +1,84 @@
+# benchmarks/intake_modes.py
+"""
+Compare the fused (one LLM call per issue) and fan-out (four calls) intake
+on the same issues: wall time, LLM calls, tokens billed, and how often the
+two modes agree on intent and crash flag.
+
+    python benchmarks/intake_modes.py --repo owner/name [--limit 20]
+    python benchmarks/intake_modes.py --issues issues.json
+
+--issues takes a JSON list of GitHub issue objects (title, body, ...).
+Calls the real LLM (OPENAI_API_KEY); the response cache is bypassed so
+both modes pay for every request.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE_BYPASS"] = "1"
+
+import logging
+logging.disable(logging.INFO)
+
+from intake.fetcher import fetch_issues
+from intake.schema import RawIssue
+from graph_registry import get_compiled
+from llm.gateway import stats
+
+
+def load_issues(path: str):
+    with open(path, encoding="utf-8") as fh:
+        items = json.load(fh)
+    return [RawIssue(
+        id=item.get("id", i), number=item.get("number", i), title=item.get("title", ""),
+        body=item.get("body") or "", state=item.get("state", "open"),
+        labels=[lbl["name"] if isinstance(lbl, dict) else lbl for lbl in item.get("labels", [])],
+        created_at=item.get("created_at", ""), updated_at=item.get("updated_at", ""),
+    ) for i, item in enumerate(items)]
+
+
+def run_mode(mode: str, issues):
+    compiled = get_compiled(f"intake_{mode}")
+    before = stats()
+    started = time.perf_counter()
+    results = [compiled.invoke({"input_issue": raw})["structured_issue"] for raw in issues]
+    elapsed = time.perf_counter() - started
+    after = stats()
+    delta = {k: after[k] - before[k] for k in ("calls", "prompt_tokens", "completion_tokens")}
+    return results, elapsed, delta
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--repo")
+    source.add_argument("--issues")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    issues = (fetch_issues(args.repo) if args.repo else load_issues(args.issues))[:args.limit]
+    if not issues:
+        print("no issues to analyze")
+        return 1
+
+    print(f"{len(issues)} issues\n")
+    print(f"{'mode':<8}{'seconds':>9}{'s/issue':>9}{'calls':>7}{'prompt tok':>12}{'compl tok':>11}")
+    results = {}
+    for mode in ("fanout", "fused"):
+        out, elapsed, delta = run_mode(mode, issues)
+        results[mode] = out
+        print(f"{mode:<8}{elapsed:>9.2f}{elapsed / len(issues):>9.2f}{delta['calls']:>7}"
+              f"{delta['prompt_tokens']:>12}{delta['completion_tokens']:>11}")
+
+    same_intent = sum(a.intent == b.intent for a, b in zip(results["fanout"], results["fused"]))
+    same_crash = sum(a.is_crash == b.is_crash for a, b in zip(results["fanout"], results["fused"]))
+    print(f"\nagreement: intent {same_intent}/{len(issues)}, is_crash {same_crash}/{len(issues)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# benchmarks/rate_limit_fake.py
+"""
+Drive the LLM gateway and rate limiter against a local fake OpenAI endpoint
+that enforces its own per-second request limit (429 + retry-after-ms) and
+fails a share of requests with 503.
+
+    python benchmarks/rate_limit_fake.py [--calls 200] [--workers 32]
+        [--server-rps 20] [--error-rate 0.05] [--latency 0.05]
+
+Exits non-zero if any call fails after the limiter's retries.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE"] = "0"
+os.environ.setdefault("LLM_BACKOFF_BASE", "0.2")
+
+import logging
+logging.disable(logging.WARNING)
+
+
+def make_server(rps: float, error_rate: float, latency: float):
+    lock = threading.Lock()
+    window = deque()   # send times of accepted requests in the last second
+    counts = {"ok": 0, "429": 0, "503": 0, "peak_concurrency": 0, "in_flight": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body, headers=()):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            now = time.monotonic()
+            with lock:
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+                if len(window) >= rps:
+                    counts["429"] += 1
+                    wait_ms = int((1.0 - (now - window[0])) * 1000) + 1
+                    return self._reply(429, {"error": {"message": "rate limited", "type": "requests"}},
+                                       [("retry-after-ms", str(wait_ms))])
+                window.append(now)
+                if random.random() < error_rate:
+                    counts["503"] += 1
+                    return self._reply(503, {"error": {"message": "overloaded"}})
+                counts["in_flight"] += 1
+                counts["peak_concurrency"] = max(counts["peak_concurrency"], counts["in_flight"])
+            time.sleep(latency)
+            with lock:
+                counts["in_flight"] -= 1
+                counts["ok"] += 1
+            self._reply(200, {
+                "id": "fake", "object": "chat.completion", "created": int(time.time()),
+                "model": "fake",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": 20, "completion_tokens": 1, "total_tokens": 21},
+            })
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--server-rps", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, counts = make_server(args.server_rps, args.error_rate, args.latency)
+    import openai
+    openai.api_key = "fake"
+    openai.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1/"
+    from llm.gateway import chat
+    from llm.rate_limiter import get_limiter
+
+    def one(i):
+        try:
+            chat([{"role": "user", "content": f"request {i}"}])
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        errors = [e for e in pool.map(one, range(args.calls)) if e]
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(f"{args.calls} calls in {elapsed:.2f}s "
+          f"(server limit {args.server_rps:g}/s -> floor {args.calls / args.server_rps:.1f}s)")
+    print("server:", counts)
+    print("limiter:", get_limiter().stats())
+    if errors:
+        print(f"❌ {len(errors)} calls failed, e.g. {errors[0]}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
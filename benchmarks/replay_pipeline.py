@@ -0,0 +1,98 @@
+# benchmarks/replay_pipeline.py
+"""
+Replay a recorded pipeline run offline (no OpenAI, gbox or GitHub access)
+and time the orchestration: intake, then locator + patcher per issue.
+
+Record once against the live services:
+
+    CASSETTE_MODE=record CASSETTE_PATH=cassettes/run.jsonl python main.py
+
+then replay as often as needed:
+
+    python benchmarks/replay_pipeline.py --cassette cassettes/run.jsonl \\
+        [--latency-scale 1.0 | --latency 0] [--workers 1] [--verbose]
+
+--latency-scale multiplies the recorded latencies and --latency sets a
+fixed latency per exchange instead; --latency 0 leaves only the
+orchestration overhead. --workers processes that many issues concurrently
+(keep VM_POOL_MAX >= workers). The LLM rate limiter still applies
+(LLM_RPM / LLM_TPM), and replay needs the configuration the run was
+recorded with (e.g. INTAKE_MODE, PATCHER_STREAMING). Exits non-zero if the
+run asked for an exchange the cassette does not hold.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cassette", default=os.getenv("CASSETTE_PATH", "cassettes/run.jsonl"))
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--latency", type=float)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    # the cassette settings are read at import
+    os.environ.update(CASSETTE_MODE="replay", CASSETTE_PATH=args.cassette,
+                      CASSETTE_LATENCY_SCALE=str(args.latency_scale))
+    if args.latency is not None:
+        os.environ["CASSETTE_LATENCY"] = str(args.latency)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import logging
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    from main import process_issue
+    from intake.pipeline import run_intake
+    from vm_executor.vm_manager import initialize_vm, cleanup_vm
+    from graph_registry import warmup
+    from llm.gateway import stats as llm_stats
+    from llm.rate_limiter import get_limiter
+    from cassette import get_cassette
+
+    owner = os.getenv("GITHUB_OWNER", "YujieXuGru")
+    repo_name = os.getenv("GITHUB_REPO", "Flask_Demo")
+    repo_spec = f"{owner}/{repo_name}"
+    repo_url = f"https://github.com/{repo_spec}.git"
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    started = time.perf_counter()
+    with quiet:
+        initialize_vm()
+        warmup()
+        setup = time.perf_counter() - started
+
+        t = time.perf_counter()
+        issues = run_intake(repo_spec)
+        intake = time.perf_counter() - t
+
+        t = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            list(pool.map(lambda issue: process_issue(issue, repo_url), issues))
+        per_issue = time.perf_counter() - t
+        cleanup_vm()
+    total = time.perf_counter() - started
+
+    cassette = get_cassette().stats()
+    print(f"{len(issues)} issues, {args.workers} worker(s)")
+    print(f"setup {setup:.2f}s  intake {intake:.2f}s  locate+patch {per_issue:.2f}s  total {total:.2f}s")
+    print(f"simulated service latency (summed over exchanges): {cassette['simulated_seconds']:.2f}s")
+    print("cassette:", cassette)
+    print("LLM gateway:", llm_stats())
+    print("LLM rate limiter:", get_limiter().stats())
+    return 1 if cassette["misses"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# cassette.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "off", "record" (call the real services and write every exchange) or
+# "replay" (serve exchanges from the cassette; no network needed)
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/run.jsonl")
+# replay latency: recorded latency x CASSETTE_LATENCY_SCALE, or a fixed
+# CASSETTE_LATENCY seconds per exchange when set
+CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
+CASSETTE_LATENCY = os.getenv("CASSETTE_LATENCY")
+# raise on VM commands missing from the cassette instead of answering
+# them with an empty success (LLM and GitHub misses always raise)
+CASSETTE_STRICT = os.getenv("CASSETTE_STRICT", "0") == "1"
+
+
+class CassetteMiss(KeyError):
+    """
+    A replayed request that was never recorded.
+    """
+
+
+def request_key(kind: str, request: Any) -> str:
+    blob = json.dumps([kind, request], sort_keys=True, ensure_ascii=False,
+                      separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    JSONL file of recorded exchanges, one per line:
+      {"kind", "key", "request", "response", "seconds"}
+    Kinds in use: "llm", "llm_stream", "embedding", "vm", "github".
+    Replay matches on (kind, request key); identical requests recorded
+    several times are served in recorded order, the last one repeating.
+    """
+    def __init__(self, path: str, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown CASSETTE_MODE {mode!r} (expected 'off', 'record' or 'replay')")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Tuple[Any, float]]] = {}
+        self._served: Dict[str, int] = {}
+        self._stats = {"recorded": 0, "replayed": 0, "misses": 0, "simulated_seconds": 0.0}
+        if mode == "record":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")   # a recording starts fresh
+        else:
+            self._file = None
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        e = json.loads(line)
+                        self._entries.setdefault(e["key"], []).append((e["response"], e["seconds"]))
+            logger.info("[cassette] loaded %d exchanges from %s",
+                        sum(len(v) for v in self._entries.values()), path)
+
+    def record(self, kind: str, request: Any, response: Any, seconds: float) -> None:
+        line = json.dumps({"kind": kind, "key": request_key(kind, request), "request": request,
+                           "response": response, "seconds": round(seconds, 4)},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._stats["recorded"] += 1
+
+    def replay(self, kind: str, request: Any) -> Tuple[Any, float]:
+        """
+        The recorded (response, latency to simulate) for `request`.
+        Raises CassetteMiss if it was never recorded.
+        """
+        key = request_key(kind, request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._stats["misses"] += 1
+                raise CassetteMiss(f"{kind} request not in cassette {self.path}: {str(request)[:200]}")
+            i = self._served.get(key, 0)
+            self._served[key] = i + 1
+            self._stats["replayed"] += 1
+            response, seconds = entries[min(i, len(entries) - 1)]
+        return response, self.latency(seconds)
+
+    def latency(self, recorded: float) -> float:
+        return float(CASSETTE_LATENCY) if CASSETTE_LATENCY is not None \
+            else recorded * CASSETTE_LATENCY_SCALE
+
+    def simulate(self, seconds: float) -> None:
+        """
+        Sleep for a replayed exchange's latency.
+        """
+        if seconds > 0:
+            with self._lock:
+                self._stats["simulated_seconds"] += seconds
+            time.sleep(seconds)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self._stats)
+        out["simulated_seconds"] = round(out["simulated_seconds"], 2)
+        return out
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    The process-wide cassette, or None when CASSETTE_MODE is "off".
+    """
+    global _cassette
+    if CASSETTE_MODE == "off":
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE)
+        return _cassette
+
+def replaying() -> bool:
+    return CASSETTE_MODE == "replay"
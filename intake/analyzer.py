@@ -0,0 +1,139 @@
+# intake/analyzer.py
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .schema import Entity
+from .classifier import classify_intent, detect_crash
+from .extractor import extract_entities
+from .summarizer import summarize_issue
+from llm.gateway import chat
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ("BUG_FIX", "FEATURE_REQUEST", "PERFORMANCE", "DOCS")
+FIELDS = ("intent", "is_crash", "entities", "summary")
+
+SYSTEM_PROMPT = (
+    "You are an issue analyst. Output only a strict JSON object, no extra text."
+)
+
+PROMPT = (
+    "Analyze the issue below and respond with a JSON object with exactly these keys:\n"
+    f"- \"intent\": one of {', '.join(INTENTS)}\n"
+    "- \"is_crash\": true if the issue describes a crash or unhandled exception, otherwise false\n"
+    "- \"entities\": an array of {\"file\": filename, \"function\": function or method name, "
+    "\"line\": line number, \"repro_cmd\": reproduction command}; set missing fields to null\n"
+    "- \"summary\": a single clear sentence summarizing the core problem and how to fix it, "
+    "or how to enhance it\n\n"
+)
+
+
+def _valid_intent(value: Any) -> Optional[str]:
+    if isinstance(value, str) and value.strip().upper() in INTENTS:
+        return value.strip().upper()
+    return None
+
+def _valid_is_crash(value: Any) -> Optional[bool]:
+    return value if isinstance(value, bool) else None
+
+def _valid_entities(value: Any) -> Optional[List[Entity]]:
+    if not isinstance(value, list):
+        return None
+    entities: List[Entity] = []
+    for item in value:
+        if not isinstance(item, dict) or set(item) - set(Entity.__dataclass_fields__):
+            return None
+        line = item.get("line")
+        if isinstance(line, str) and line.strip().isdigit():
+            line = int(line)
+        if line is not None and (isinstance(line, bool) or not isinstance(line, int)):
+            return None
+        strings = [item.get(k) for k in ("file", "function", "repro_cmd")]
+        if any(s is not None and not isinstance(s, str) for s in strings):
+            return None
+        entities.append(Entity(file=strings[0], function=strings[1], line=line,
+                               repro_cmd=strings[2]))
+    return entities
+
+def _valid_summary(value: Any) -> Optional[str]:
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+VALIDATORS = {
+    "intent": _valid_intent,
+    "is_crash": _valid_is_crash,
+    "entities": _valid_entities,
+    "summary": _valid_summary,
+}
+
+# per-field functions of the fan-out intake, used when a fused field is invalid
+FALLBACKS = {
+    "intent": classify_intent,
+    "is_crash": detect_crash,
+    "entities": extract_entities,
+    "summary": lambda text: summarize_issue(text)["summary"],
+}
+
+
+def parse_analysis(content: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Validate the fused JSON response field by field against StructuredIssue.
+    Returns (valid fields, names of the fields that failed validation).
+    """
+    start, end = content.find("{"), content.rfind("}") + 1
+    try:
+        body = json.loads(content[start:end]) if start != -1 and end else None
+    except json.JSONDecodeError:
+        body = None
+    if not isinstance(body, dict):
+        return {}, list(FIELDS)
+
+    fields: Dict[str, Any] = {}
+    invalid: List[str] = []
+    for name in FIELDS:
+        value = VALIDATORS[name](body.get(name))
+        if value is None:
+            invalid.append(name)
+        else:
+            fields[name] = value
+    return fields, invalid
+
+
+def analysis_request(cleaned_text: str) -> Dict[str, Any]:
+    """
+    Chat completion parameters of the fused analysis (also the body of a
+    batch request).
+    """
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": PROMPT + f"```{cleaned_text}```"},
+        ],
+        "response_format": {"type": "json_object"},
+    }
+
+
+def fill_invalid(fields: Dict[str, Any], invalid: List[str], cleaned_text: str) -> Dict[str, Any]:
+    """
+    Recompute the `invalid` fields with their per-field functions.
+    """
+    for name in invalid:
+        fields[name] = FALLBACKS[name](cleaned_text)
+    return fields
+
+
+def analyze_issue(cleaned_text: str) -> Dict[str, Any]:
+    """
+    Intent, crash flag, entities and summary of an issue from a single LLM
+    call. Fields that fail validation are recomputed with their per-field
+    function, so the result always has all four keys.
+    """
+    response = chat(**analysis_request(cleaned_text))
+    fields, invalid = parse_analysis(response)
+    if invalid:
+        logger.info("[analyze_issue] invalid fields %s, falling back: %r", invalid, response)
+    return fill_invalid(fields, invalid, cleaned_text)
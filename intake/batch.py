@@ -0,0 +1,332 @@
+# intake/batch.py
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .analyzer import FIELDS, analysis_request, fill_invalid, parse_analysis
+from .cleaner import clean_text
+from .pipeline import INTAKE_CONCURRENCY, IntakeOutcome
+from .schema import RawIssue, StructuredIssue
+from llm.gateway import LLM_CACHE_BYPASS, cache_enabled, cache_key, chat, get_cache
+
+logger = logging.getLogger(__name__)
+
+# "openai" (Batch API) or "local" (file-based stand-in answering through the gateway)
+INTAKE_BATCH_BACKEND = os.getenv("INTAKE_BATCH_BACKEND", "openai")
+INTAKE_BATCH_DIR = os.getenv("INTAKE_BATCH_DIR",
+                             os.path.expanduser("~/.cache/swe_agent/batches"))
+# seconds between status polls (default: the backend's own interval)
+INTAKE_BATCH_POLL_SECONDS = os.getenv("INTAKE_BATCH_POLL_SECONDS")
+# submission rounds: failed or missing items are resubmitted until this many
+INTAKE_BATCH_MAX_ATTEMPTS = int(os.getenv("INTAKE_BATCH_MAX_ATTEMPTS", "3"))
+# capacity of one batch file (OpenAI: 50,000 requests, 200 MB); larger
+# backlogs are split over several batches submitted together
+INTAKE_BATCH_MAX_REQUESTS = int(os.getenv("INTAKE_BATCH_MAX_REQUESTS", "50000"))
+INTAKE_BATCH_MAX_MB = float(os.getenv("INTAKE_BATCH_MAX_MB", "190"))
+INTAKE_BATCH_WINDOW = os.getenv("INTAKE_BATCH_WINDOW", "24h")
+
+ENDPOINT = "/v1/chat/completions"
+TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchBackend(ABC):
+    """
+    The contract of a batch backend:
+      - submit() takes a JSONL file of requests
+        ({"custom_id", "method", "url", "body"} per line) and returns a batch id
+      - status() returns the batch status; "completed", "failed", "expired"
+        and "cancelled" are final
+      - results() returns the result lines of a finished batch
+        ({"custom_id", "response": {"status_code", "body"}, "error"}), which
+        may cover only part of the requests (e.g. an expired batch)
+    """
+    poll_seconds: float = 30.0
+
+    @abstractmethod
+    def submit(self, path: str) -> str:
+        ...
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        ...
+
+    @abstractmethod
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        ...
+
+
+def _read_jsonl(text: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """
+    OpenAI Batch API: the file is uploaded with purpose "batch" and run
+    against the chat completions endpoint within INTAKE_BATCH_WINDOW.
+    """
+    poll_seconds = 30.0
+
+    def submit(self, path: str) -> str:
+        import openai
+        with open(path, "rb") as fh:
+            upload = openai.files.create(file=fh, purpose="batch")
+        batch = openai.batches.create(input_file_id=upload.id, endpoint=ENDPOINT,
+                                      completion_window=INTAKE_BATCH_WINDOW)
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        import openai
+        return openai.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        import openai
+        batch = openai.batches.retrieve(batch_id)
+        lines: List[Dict[str, Any]] = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines += _read_jsonl(openai.files.content(file_id).text)
+        return lines
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a batch service: each batch is a directory under
+    `directory` holding input.jsonl, output.jsonl and a status file, and is
+    answered in a background thread by `responder(body) -> message text`
+    (by default the LLM gateway). A responder that raises produces an error
+    line for that request, like a failed item of a real batch.
+    """
+    poll_seconds = 0.5
+
+    def __init__(self, directory: str = INTAKE_BATCH_DIR,
+                 responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+                 workers: int = 4):
+        self.directory = directory
+        self.responder = responder or (lambda body: chat(**body))
+        self.workers = workers
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.directory, batch_id, name)
+
+    def _write(self, batch_id: str, name: str, text: str) -> None:
+        path = self._path(batch_id, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(path + ".tmp", path)   # readers never see a partial file
+
+    def submit(self, path: str) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(self.directory, batch_id))
+        shutil.copyfile(path, self._path(batch_id, "input.jsonl"))
+        self._write(batch_id, "status", "in_progress")
+        threading.Thread(target=self._run, args=(batch_id,), daemon=True).start()
+        return batch_id
+
+    def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        line = {"id": f"req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+        try:
+            content = self.responder(request["body"])
+        except Exception as e:
+            return {**line, "response": None,
+                    "error": {"code": type(e).__name__, "message": str(e)}}
+        body = {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+        return {**line, "response": {"status_code": 200, "body": body}, "error": None}
+
+    def _run(self, batch_id: str) -> None:
+        try:
+            with open(self._path(batch_id, "input.jsonl"), encoding="utf-8") as fh:
+                requests = _read_jsonl(fh.read())
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                lines = list(pool.map(self._answer, requests))
+            self._write(batch_id, "output.jsonl", "".join(json.dumps(l) + "\n" for l in lines))
+            self._write(batch_id, "status", "completed")
+        except Exception as e:
+            logger.warning("[batch] local batch %s failed: %s", batch_id, e)
+            self._write(batch_id, "status", "failed")
+
+    def status(self, batch_id: str) -> str:
+        with open(self._path(batch_id, "status"), encoding="utf-8") as fh:
+            return fh.read().strip()
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        path = self._path(batch_id, "output.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as fh:
+            return _read_jsonl(fh.read())
+
+
+def create_batch_backend(backend: Optional[str] = None) -> BatchBackend:
+    backend = backend or INTAKE_BATCH_BACKEND
+    if backend == "openai":
+        return OpenAIBatchBackend()
+    if backend == "local":
+        return LocalBatchBackend()
+    raise ValueError(f"Unknown INTAKE_BATCH_BACKEND {backend!r} (expected 'openai' or 'local')")
+
+
+def write_batch_files(bodies: Dict[str, Dict[str, Any]], prefix: str) -> List[str]:
+    """
+    Write one request line per custom id, starting a new file whenever one
+    would exceed INTAKE_BATCH_MAX_REQUESTS or INTAKE_BATCH_MAX_MB.
+    Returns the file paths.
+    """
+    os.makedirs(INTAKE_BATCH_DIR, exist_ok=True)
+    max_bytes = int(INTAKE_BATCH_MAX_MB * 1024 * 1024)
+    paths: List[str] = []
+    fh, count, size = None, 0, 0
+    for custom_id, body in bodies.items():
+        line = json.dumps({"custom_id": custom_id, "method": "POST", "url": ENDPOINT,
+                           "body": body}, ensure_ascii=False) + "\n"
+        data = line.encode("utf-8")
+        if fh is None or count >= INTAKE_BATCH_MAX_REQUESTS or size + len(data) > max_bytes:
+            if fh:
+                fh.close()
+            paths.append(os.path.join(INTAKE_BATCH_DIR, f"{prefix}-{len(paths)}.jsonl"))
+            fh, count, size = open(paths[-1], "wb"), 0, 0
+        fh.write(data)
+        count, size = count + 1, size + len(data)
+    if fh:
+        fh.close()
+    return paths
+
+
+def parse_result_line(line: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    (custom_id, message text, error) of one result line; exactly one of
+    text and error is set.
+    """
+    response = line.get("response") or {}
+    error = line.get("error")
+    if error or response.get("status_code") != 200:
+        detail = error or (response.get("body") or {}).get("error") or response.get("status_code")
+        return line.get("custom_id"), None, f"batch item failed: {detail}"
+    try:
+        return line["custom_id"], response["body"]["choices"][0]["message"]["content"] or "", None
+    except (KeyError, IndexError, TypeError):
+        return line.get("custom_id"), None, "batch item has no message"
+
+
+def _cache_key(body: Dict[str, Any]) -> str:
+    # same key as chat(**body), so batch and interactive runs share answers
+    params = {k: v for k, v in body.items() if k not in ("model", "messages")}
+    return cache_key(body["model"], body["messages"], params)
+
+
+def run_batches(bodies: Dict[str, Dict[str, Any]], backend: BatchBackend,
+                poll_seconds: float, prefix: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Submit `bodies` (split to batch capacity), wait for every batch to finish
+    and return (texts, errors) by custom id. Items a batch did not return
+    are reported as errors.
+    """
+    batch_ids = [backend.submit(path) for path in write_batch_files(bodies, prefix)]
+    print(f"📦 Submitted {len(bodies)} requests in {len(batch_ids)} batch(es)")
+
+    texts: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    running = list(batch_ids)
+    while running:
+        time.sleep(poll_seconds)
+        for batch_id in list(running):
+            status = backend.status(batch_id)
+            if status not in TERMINAL:
+                continue
+            running.remove(batch_id)
+            logger.info("[batch] %s %s", batch_id, status)
+            for line in backend.results(batch_id):
+                custom_id, text, error = parse_result_line(line)
+                if custom_id not in bodies:
+                    continue
+                if error:
+                    errors[custom_id] = error
+                else:
+                    texts[custom_id] = text
+    for custom_id in bodies:
+        if custom_id not in texts and custom_id not in errors:
+            errors[custom_id] = "missing from the batch results"
+    return texts, errors
+
+
+def intake_batch(raw_list: List[RawIssue], backend: Optional[BatchBackend] = None,
+                 max_attempts: int = INTAKE_BATCH_MAX_ATTEMPTS,
+                 max_workers: int = INTAKE_CONCURRENCY) -> List[IntakeOutcome]:
+    """
+    Batch-mode intake: the fused analysis request of every issue goes into
+    batch files submitted to `backend`, results are mapped back by custom id
+    ("issue-<id>"), and items that failed or returned unparseable JSON are
+    resubmitted, up to `max_attempts` rounds. Requests already in the LLM
+    response cache are not submitted. As in fused mode, single invalid
+    fields are recomputed with their per-field function, for at most
+    `max_workers` issues at a time. Outcomes keep the input order; `seconds`
+    is the time until the issue's result arrived.
+    """
+    backend = backend or create_batch_backend()
+    poll_seconds = float(INTAKE_BATCH_POLL_SECONDS or backend.poll_seconds)
+    started = time.perf_counter()
+
+    cleaned = {f"issue-{raw.id}": clean_text(raw.body) for raw in raw_list}
+    bodies = {cid: analysis_request(text) for cid, text in cleaned.items()}
+    parsed: Dict[str, Tuple[Dict[str, Any], List[str]]] = {}
+    arrived: Dict[str, float] = {}
+    errors: Dict[str, str] = {}
+
+    def accept(custom_id: str, text: str) -> bool:
+        fields, invalid = parse_analysis(text)
+        if len(invalid) == len(FIELDS):
+            errors[custom_id] = f"unparseable response: {text[:200]!r}"
+            return False
+        parsed[custom_id] = (fields, invalid)
+        arrived[custom_id] = time.perf_counter() - started
+        return True
+
+    if cache_enabled() and not LLM_CACHE_BYPASS:
+        for custom_id, body in bodies.items():
+            text = get_cache().get(_cache_key(body))
+            if text is not None:
+                accept(custom_id, text)
+
+    prefix = f"intake-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    for attempt in range(1, max_attempts + 1):
+        pending = {cid: body for cid, body in bodies.items() if cid not in parsed}
+        if not pending:
+            break
+        texts, failed = run_batches(pending, backend, poll_seconds, f"{prefix}-{attempt}")
+        errors.update(failed)
+        for custom_id, text in texts.items():
+            if accept(custom_id, text):
+                errors.pop(custom_id, None)
+                if cache_enabled():
+                    get_cache().put(_cache_key(bodies[custom_id]), bodies[custom_id]["model"], text)
+        left = len(bodies) - len(parsed)
+        print(f"📦 Round {attempt}: {len(pending) - left}/{len(pending)} ok"
+              + (f", {left} to resubmit" if left and attempt < max_attempts else ""))
+
+    def finish(raw: RawIssue) -> IntakeOutcome:
+        custom_id = f"issue-{raw.id}"
+        if custom_id not in parsed:
+            return IntakeOutcome(raw, None, errors.get(custom_id, "no result"),
+                                 time.perf_counter() - started)
+        fields, invalid = parsed[custom_id]
+        try:
+            if invalid:
+                logger.info("[intake_batch] issue #%s invalid fields %s, falling back",
+                            raw.id, invalid)
+            fields = fill_invalid(dict(fields), invalid, cleaned[custom_id])
+        except Exception as e:
+            return IntakeOutcome(raw, None, f"{type(e).__name__}: {e}",
+                                 time.perf_counter() - started)
+        structured = StructuredIssue(id=raw.id, **{name: fields[name] for name in FIELDS})
+        return IntakeOutcome(raw, structured, None, arrived[custom_id])
+
+    # only issues with invalid fields make (interactive) calls here
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return list(pool.map(finish, raw_list))   # keeps input order
@@ -1,17 +1,13 @@
 # intake/classifier.py
 
-import os
-import openai
-
-# Load OpenAI API key from environment
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from llm.gateway import chat
 
 def classify_intent(cleaned_text: str) -> str:
     """
     Use an LLM to classify the intent of an issue.
     Returns one of: BUG_FIX, FEATURE_REQUEST, PERFORMANCE, or DOCS.
     """
-    response = openai.chat.completions.create(
+    response = chat(
         model="gpt-4o-mini",
         messages=[
             {
@@ -27,14 +23,14 @@ def classify_intent(cleaned_text: str) -> str:
             }
         ],
     )
-    return response.choices[0].message.content.strip()
+    return response.strip()
 
 def detect_crash(cleaned_text: str) -> bool:
     """
     Determine whether the described issue causes a program crash.
     Returns True if the issue indicates a crash, otherwise False.
     """
-    response = openai.chat.completions.create(
+    response = chat(
         model="gpt-4o-mini",
         messages=[
             {
@@ -51,5 +47,5 @@ def detect_crash(cleaned_text: str) -> bool:
             }
         ],
     )
-    answer = response.choices[0].message.content.strip().lower()
+    answer = response.strip().lower()
     return answer.startswith("y")
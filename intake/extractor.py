@@ -1,19 +1,15 @@
 # intake/extractor.py
 
-import os
 import json
-import openai
 import logging
 from typing import List
 from .schema import Entity
+from llm.gateway import chat
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load OpenAI API key from environment
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
 def extract_entities(cleaned_text: str) -> List[Entity]:
     """
     Call OpenAI to convert issue text into a list of structured entities.
@@ -30,7 +26,7 @@ def extract_entities(cleaned_text: str) -> List[Entity]:
     )
 
     # Call the new OpenAI API
-    response = openai.chat.completions.create(
+    response = chat(
         model="gpt-4o-mini",
         messages=[
             {
@@ -41,7 +37,7 @@ def extract_entities(cleaned_text: str) -> List[Entity]:
         ],
     )
 
-    content = response.choices[0].message.content.strip()
+    content = response.strip()
     logger.info("LLM raw response: %s", content)
 
     # Locate the outermost [ ... ] block
@@ -1,13 +1,34 @@
 # intake/fetcher.py
 
 import os
+import time
 import requests
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from .schema import RawIssue
+from cassette import get_cassette, replaying
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # set in your .env or CI secrets
 
+def get_page(url: str, headers: Dict[str, str], params: Dict) -> Tuple[list, Optional[str]]:
+    """
+    GET one page of the issues API. Returns (items, Link header).
+    Recorded to / replayed from the cassette when one is active.
+    """
+    cassette = get_cassette()
+    request = {"url": url, "params": params}
+    if replaying():
+        (data, link), latency = cassette.replay("github", request)
+        cassette.simulate(latency)
+        return data, link
+    started = time.perf_counter()
+    resp = requests.get(url, headers=headers, params=params)
+    resp.raise_for_status()
+    data, link = resp.json(), resp.headers.get("Link")
+    if cassette:
+        cassette.record("github", request, [data, link], time.perf_counter() - started)
+    return data, link
+
 def fetch_issues(repo: str) -> List[RawIssue]:
     """
     Fetch open issues from GitHub via the REST API.
@@ -25,9 +46,7 @@ def fetch_issues(repo: str) -> List[RawIssue]:
 
     issues: List[RawIssue] = []
     while url:
-        resp = requests.get(url, headers=headers, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+        data, link_header = get_page(url, headers, params)
         for item in data:
             # skip pull-requests
             if "pull_request" in item:
@@ -45,8 +64,8 @@ def fetch_issues(repo: str) -> List[RawIssue]:
             ))
         # look for the next page via Link header
         url = None
-        if "Link" in resp.headers:
-            links = resp.headers["Link"].split(",")
+        if link_header:
+            links = link_header.split(",")
             for link in links:
                 url_part, rel = link.split(";")
                 if 'rel="next"' in rel:
@@ -1,20 +1,34 @@
 # intake/pipeline.py
 
 import logging
-from typing import List, TypedDict
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, TypedDict
 from langgraph.graph import StateGraph, START, END
 
 from .fetcher      import fetch_issues
 from .cleaner      import clean_text
 from .classifier   import classify_intent, detect_crash
 from .extractor    import extract_entities
+from .analyzer     import analyze_issue
 from .schema       import RawIssue, Entity, StructuredIssue
 from .summarizer   import summarize_issue
+from graph_registry import get_compiled
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "fused": one LLM call returns all fields (per-field fallback on invalid output)
+# "fanout": one LLM call per field, run in parallel
+# "batch": fused requests submitted offline to a batch backend (see intake/batch.py)
+INTAKE_MODES = ("fused", "fanout", "batch")
+INTAKE_MODE = os.getenv("INTAKE_MODE", "fused")
+# issues analyzed in parallel (in fanout mode each issue runs 4 calls at once)
+INTAKE_CONCURRENCY = int(os.getenv("INTAKE_CONCURRENCY", "8"))
+
 
 # 1. Define the state schema for LangGraph
 class IntakeState(TypedDict, total=False):
@@ -59,6 +73,12 @@ def summarize_issue_node(state):
     logger.info("[summarize_issue] output: %s", out)
     return out
 
+def analyze_issue_node(state):
+    logger.info("[analyze_issue] input: %s", state["cleaned_text"])
+    out = analyze_issue(state["cleaned_text"])
+    logger.info("[analyze_issue] output: %s", out)
+    return out
+
 def compose_structured_node(state):
     # Include summary in the StructuredIssue
     structured = StructuredIssue(
@@ -80,6 +100,7 @@ NODE_SPECS = {
     "detect_crash":      (detect_crash_node,      ["cleaned_text"]),
     "extract_entities":  (extract_entities_node,  ["cleaned_text"]),
     "summarize_issue":   (summarize_issue_node,   ["cleaned_text"]),
+    "analyze_issue":     (analyze_issue_node,     ["cleaned_text"]),
     "compose_structured":(
         compose_structured_node,
         ["classify_intent", "detect_crash", "extract_entities", "summarize_issue"]
@@ -88,16 +109,27 @@ NODE_SPECS = {
 
 
 # 4. Build the StateGraph
-def build_intake_graph() -> StateGraph:
+FANOUT_NODES = ["classify_intent", "detect_crash", "extract_entities", "summarize_issue"]
+
+def build_intake_graph(mode: str = INTAKE_MODE) -> StateGraph:
+    if mode not in ("fused", "fanout"):
+        raise ValueError(f"Unknown INTAKE_MODE {mode!r} (expected 'fused' or 'fanout')")
     graph = StateGraph(IntakeState)
+    analysis_nodes = ["analyze_issue"] if mode == "fused" else FANOUT_NODES
 
-    # Register all nodes
-    for name, (handler, _) in NODE_SPECS.items():
-        graph.add_node(name, handler)
+    # Register the nodes of this mode
+    for name in ["clean_text", *analysis_nodes, "compose_structured"]:
+        graph.add_node(name, NODE_SPECS[name][0])
 
     # Define edges: first step is cleaning
     graph.add_edge(START, "clean_text")
 
+    if mode == "fused":
+        graph.add_edge("clean_text", "analyze_issue")
+        graph.add_edge("analyze_issue", "compose_structured")
+        graph.add_edge("compose_structured", END)
+        return graph
+
     # Parallel steps after cleaning
     graph.add_edge("clean_text", "classify_intent")
     graph.add_edge("clean_text", "detect_crash")
@@ -116,16 +148,59 @@ def build_intake_graph() -> StateGraph:
     return graph
 
 
-# 5. Main execution function: fetch issues -> run pipeline -> return results
-def run_intake(repo: str) -> List[StructuredIssue]:
-    raw_list = fetch_issues(repo)
-    compiled = build_intake_graph().compile()
-
-    results: List[StructuredIssue] = []
-    for raw in raw_list:
+# 5. Main execution functions: fetch issues -> run pipelines -> return results
+@dataclass
+class IntakeOutcome:
+    issue: RawIssue
+    structured: Optional[StructuredIssue]   # None if the pipeline failed
+    error: Optional[str]
+    seconds: float
+
+
+def intake_issues(raw_list: List[RawIssue], mode: str = INTAKE_MODE,
+                  max_workers: int = INTAKE_CONCURRENCY) -> List[IntakeOutcome]:
+    """
+    Run the intake pipeline over `raw_list` with at most `max_workers`
+    issues in flight. Outcomes keep the input order; an issue whose
+    pipeline raises is recorded with its error instead of aborting the batch.
+    Batch mode hands the whole list to intake_batch() instead.
+    """
+    if mode not in INTAKE_MODES:
+        raise ValueError(f"Unknown INTAKE_MODE {mode!r} (expected 'fused', 'fanout' or 'batch')")
+    if mode == "batch":
+        from .batch import intake_batch
+        return intake_batch(raw_list, max_workers=max_workers)
+    compiled = get_compiled(f"intake_{mode}")
+
+    def run(raw: RawIssue) -> IntakeOutcome:
         logger.info("🔍 Processing issue #%s", raw.id)
-        state = compiled.invoke({"input_issue": raw})
+        started = time.perf_counter()
+        try:
+            state = compiled.invoke({"input_issue": raw})
+        except Exception as e:
+            logger.warning("[intake] issue #%s failed: %s", raw.id, e)
+            return IntakeOutcome(raw, None, f"{type(e).__name__}: {e}",
+                                 time.perf_counter() - started)
         logger.info("✅ Final state: %s", state)
-        results.append(state["structured_issue"])
+        return IntakeOutcome(raw, state["structured_issue"], None, time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return list(pool.map(run, raw_list))   # keeps input order
 
-    return results
+
+def run_intake(repo: str, mode: str = INTAKE_MODE,
+               max_workers: int = INTAKE_CONCURRENCY) -> List[StructuredIssue]:
+    raw_list = fetch_issues(repo)
+    started = time.perf_counter()
+    outcomes = intake_issues(raw_list, mode=mode, max_workers=max_workers)
+    elapsed = time.perf_counter() - started
+
+    failed = [o for o in outcomes if o.error]
+    busy = sum(o.seconds for o in outcomes)
+    detail = "batch" if mode == "batch" else \
+        f"{busy:.1f}s of pipeline time, {max_workers} in parallel, {mode}"
+    print(f"📥 Intake: {len(outcomes) - len(failed)}/{len(outcomes)} issues in {elapsed:.1f}s ({detail})")
+    for o in failed:
+        print(f"   ⚠️ issue #{o.issue.number} skipped after {o.seconds:.1f}s: {o.error}")
+
+    return [o.structured for o in outcomes if o.structured is not None]
@@ -1,10 +1,6 @@
 # intake/summarizer.py
 
-import os
-import openai
-
-# Load the OpenAI API key from environment
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from llm.gateway import chat
 
 def summarize_issue(cleaned_text: str) -> dict:
     """
@@ -16,7 +12,7 @@ def summarize_issue(cleaned_text: str) -> dict:
         "described below:\n\n"
         f"{cleaned_text}"
     )
-    response = openai.chat.completions.create(
+    response = chat(
         model="gpt-4o-mini",
         messages=[
             {
@@ -32,5 +28,5 @@ def summarize_issue(cleaned_text: str) -> dict:
             }
         ],
     )
-    summary_text = response.choices[0].message.content.strip()
+    summary_text = response.strip()
     return {"summary": summary_text}
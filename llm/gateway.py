@@ -0,0 +1,339 @@
+# llm/gateway.py
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import openai
+
+from llm.rate_limiter import DEFAULT_COMPLETION_TOKENS, estimate_tokens, get_limiter
+from cassette import get_cassette, replaying
+
+# the one place the OpenAI client is configured; the key is checked on the
+# first real request, so modules import without one (e.g. to replay a
+# cassette), and a key the caller already set is kept
+openai.api_key = os.getenv("OPENAI_API_KEY") or openai.api_key
+# retries (429/5xx, Retry-After) are done by the shared rate limiter
+openai.max_retries = 0
+
+logger = logging.getLogger(__name__)
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+# response cache: on by default; LLM_CACHE_BYPASS=1 skips lookups (results are still stored)
+LLM_CACHE = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH",
+                           os.path.expanduser("~/.cache/swe_agent/llm_cache.sqlite"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    """
+    Content address of a request: sha256 over model, messages and parameters.
+    """
+    blob = json.dumps({"model": model, "messages": messages, "params": params},
+                      sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite table of responses keyed by cache_key(). Entries older than
+    `max_age_s` are dropped, and least recently used entries go once the
+    stored text exceeds `max_bytes`. Eviction runs on open and then every
+    `evict_every` writes. Safe to share between threads and processes (WAL).
+    """
+    def __init__(self, path: str = LLM_CACHE_PATH,
+                 max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                 max_age_s: float = LLM_CACHE_MAX_AGE_DAYS * 86400,
+                 evict_every: int = 50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.evict_every = evict_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.max_age_s:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                             (now, key))
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now))
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Apply the age and size limits. Returns the number of entries removed.
+        """
+        with self._lock, self._db:
+            removed = self._db.execute("DELETE FROM responses WHERE created < ?",
+                                       (time.time() - self.max_age_s,)).rowcount
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # walk from least recently used until enough bytes are freed
+                excess, doomed = total - self.max_bytes, []
+                for key, size in self._db.execute(
+                        "SELECT key, size FROM responses ORDER BY last_used"):
+                    doomed.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+                removed += len(doomed)
+        if removed:
+            logger.info("[llm_cache] evicted %d entries", removed)
+        return removed
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            n, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": n, "bytes": total}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, float] = {
+    "calls": 0, "hits": 0, "misses": 0, "bypassed": 0, "errors": 0, "llm_seconds": 0.0,
+    "prompt_tokens": 0, "completion_tokens": 0,
+    "streams_aborted": 0, "aborted_tokens": 0,
+}
+
+def get_cache() -> ResponseCache:
+    """
+    Return the process-wide response cache.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+def cache_enabled() -> bool:
+    """
+    Whether the response cache is used. Off while a cassette records or
+    replays: every exchange has to reach the cassette, and replayed
+    latency must not depend on what happens to be cached.
+    """
+    return LLM_CACHE and get_cassette() is None
+
+
+def _count(**deltas: float) -> None:
+    with _metrics_lock:
+        for name, delta in deltas.items():
+            _metrics[name] += delta
+
+
+def chat(messages: List[Dict[str, Any]], model: str = LLM_MODEL,
+         bypass_cache: bool = False, **params: Any) -> str:
+    """
+    Chat completion through the shared gateway; returns the message text.
+
+    Identical requests (model, messages, params) are answered from the
+    response cache. bypass_cache=True (or LLM_CACHE_BYPASS=1) forces a fresh
+    completion, e.g. for a retry that should not see the same answer again;
+    the fresh answer replaces the cached one.
+    """
+    _count(calls=1)
+    key = cache_key(model, messages, params)
+    bypass = bypass_cache or LLM_CACHE_BYPASS
+    if cache_enabled() and not bypass:
+        cached = get_cache().get(key)
+        if cached is not None:
+            _count(hits=1)
+            return cached
+    if bypass:
+        _count(bypassed=1)
+    else:
+        _count(misses=1)
+
+    elapsed = 0.0
+    cassette = get_cassette()
+    request = {"model": model, "messages": messages, "params": params}
+
+    def send() -> Dict[str, Any]:
+        nonlocal elapsed
+        if replaying():
+            result, elapsed = cassette.replay("llm", request)
+            cassette.simulate(elapsed)
+            return result
+        started = time.perf_counter()
+        response = openai.chat.completions.create(model=model, messages=messages, **params)
+        elapsed = time.perf_counter() - started
+        usage = getattr(response, "usage", None)
+        result = {
+            "text": response.choices[0].message.content or "",
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+        if cassette:
+            cassette.record("llm", request, result, elapsed)
+        return result
+
+    try:
+        result = get_limiter().call(
+            send, estimate_tokens(messages, params.get("max_tokens")),
+            lambda r: (r["prompt_tokens"] + r["completion_tokens"]) or None)
+    except Exception:
+        _count(errors=1)
+        raise
+    _count(llm_seconds=elapsed, prompt_tokens=result["prompt_tokens"],
+           completion_tokens=result["completion_tokens"])
+    text = result["text"]
+    if cache_enabled():
+        get_cache().put(key, model, text)
+    return text
+
+
+class _ReplayStream:
+    """
+    Stand-in for an OpenAI chat stream that replays recorded text in small
+    deltas, spreading the simulated latency over them.
+    """
+    piece = 16
+
+    def __init__(self, text: str, latency: float):
+        self.text = text
+        self.latency = latency
+        self.usage = None
+
+    def __iter__(self):
+        pieces = [self.text[i:i + self.piece] for i in range(0, len(self.text), self.piece)] or [""]
+        for piece in pieces:
+            get_cassette().simulate(self.latency / len(pieces))
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+    def close(self) -> None:
+        pass
+
+
+def chat_stream(messages: List[Dict[str, Any]], model: str = LLM_MODEL,
+                bypass_cache: bool = False, **params: Any) -> Iterator[str]:
+    """
+    Streaming chat(): yields the message text as it arrives. Closing the
+    generator early (e.g. on a malformed answer) closes the HTTP stream, so
+    nothing more is generated; the tokens received so far are counted as
+    aborted_tokens. Shares chat()'s cache: only complete answers are
+    stored, and a cached answer is yielded in one piece.
+    """
+    _count(calls=1)
+    key = cache_key(model, messages, params)
+    bypass = bypass_cache or LLM_CACHE_BYPASS
+    if cache_enabled() and not bypass:
+        cached = get_cache().get(key)
+        if cached is not None:
+            _count(hits=1)
+            yield cached
+            return
+    if bypass:
+        _count(bypassed=1)
+    else:
+        _count(misses=1)
+
+    cassette = get_cassette()
+    request = {"model": model, "messages": messages, "params": params}
+
+    def send():
+        if replaying():
+            recorded, latency = cassette.replay("llm_stream", request)
+            return _ReplayStream(recorded["text"], latency)
+        return openai.chat.completions.create(model=model, messages=messages, stream=True,
+                                              stream_options={"include_usage": True}, **params)
+
+    limiter = get_limiter()
+    tokens = estimate_tokens(messages, params.get("max_tokens"))
+    started = time.perf_counter()
+    try:
+        # the slot is held until the stream is consumed or closed
+        stream = limiter.open(send, tokens)
+    except Exception:
+        _count(errors=1)
+        raise
+
+    parts: List[str] = []
+    usage = None
+    complete = False
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            for choice in chunk.choices:
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield choice.delta.content
+        complete = True
+    finally:
+        stream.close()
+        received = sum(len(p) for p in parts) // 4
+        if usage is not None:
+            used = (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+        else:   # aborted (no final usage chunk): prompt estimate + text received
+            used = tokens - (params.get("max_tokens") or DEFAULT_COMPLETION_TOKENS) + received
+        limiter.done(tokens, used)
+        if cassette and not replaying():
+            # an aborted stream is recorded up to the abort; replay stops there too
+            cassette.record("llm_stream", request, {"text": "".join(parts), "complete": complete},
+                            time.perf_counter() - started)
+        _count(llm_seconds=time.perf_counter() - started,
+               prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+               completion_tokens=getattr(usage, "completion_tokens", 0) or received)
+        if not complete:
+            _count(streams_aborted=1, aborted_tokens=received)
+    if cache_enabled():
+        get_cache().put(key, model, "".join(parts))
+
+
+def stats() -> Dict[str, float]:
+    """
+    Gateway counters: calls, hits, misses, bypassed, errors, hit_rate,
+    tokens billed, seconds spent waiting on the LLM and (estimated) seconds
+    saved by hits.
+    """
+    with _metrics_lock:
+        out = dict(_metrics)
+    lookups = out["hits"] + out["misses"]
+    completions = out["misses"] + out["bypassed"]
+    out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+    # each hit saved roughly one average completion
+    out["saved_seconds"] = round(out["hits"] * out["llm_seconds"] / completions, 2) if completions else 0.0
+    out["llm_seconds"] = round(out["llm_seconds"], 2)
+    return out
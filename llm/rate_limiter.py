@@ -0,0 +1,265 @@
+# llm/rate_limiter.py
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+# account limits (per model tier); budgets refill continuously
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+# seconds of budget that may be spent in one burst (providers enforce
+# per-minute limits over shorter windows too)
+LLM_BURST_SECONDS = float(os.getenv("LLM_BURST_SECONDS", "2"))
+# AIMD bounds on requests in flight
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# completion tokens assumed when the request sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+T = TypeVar("T")
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> int:
+    """
+    Rough token cost of a chat request (about 4 characters per token for
+    the prompt, plus the completion allowance).
+    """
+    prompt = len(json.dumps(messages, ensure_ascii=False)) // 4
+    return prompt + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    """
+    Budget of `per_minute` units refilled continuously, at most
+    `burst_seconds` worth banked. take() reserves the full amount immediately
+    (the balance may go negative, also for a single request larger than the
+    burst) and returns how long the caller must wait before sending, so
+    concurrent callers queue in arrival order.
+    """
+    def __init__(self, per_minute: float, burst_seconds: float = LLM_BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount: float) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+            return -self.level / self.rate if self.level < 0 else 0.0
+
+    def give(self, amount: float) -> None:
+        """
+        Settle a reservation against actual usage: return the units reserved
+        but not used, or charge the excess when `amount` is negative.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on requests in flight: +1 per limit's worth of successes,
+    halved on a throttle (at most once per `cooldown` seconds, so a burst
+    of 429s from one overload counts once).
+    """
+    def __init__(self, initial: int, minimum: int, maximum: int, cooldown: float = 2.0):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        Block until a slot is free; returns the seconds spent queued.
+        """
+        started = time.monotonic()
+        with self._cond:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.waiting -= 1
+            self.in_flight += 1
+        return time.monotonic() - started
+
+    def release(self, throttled: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    logger.info("[rate_limiter] throttled, concurrency -> %d", int(self.limit))
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def _status(exc: Exception) -> Optional[int]:
+    return getattr(exc, "status_code", None)
+
+def retry_after(exc: Exception) -> Optional[float]:
+    """
+    Seconds the server asked us to wait (retry-after-ms / Retry-After), if any.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue   # HTTP-date form; fall back to our own backoff
+    return None
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, openai.APIConnectionError):   # includes timeouts
+        return True
+    status = _status(exc)
+    return status is not None and (status in RETRY_STATUS or status >= 500)
+
+
+class RateLimiter:
+    """
+    Shared gate in front of every LLM request: waits for a concurrency slot,
+    then for request and token budget, sends, and retries 429/5xx/connection
+    errors with exponential backoff (full jitter) or the server's Retry-After.
+    A Retry-After on a 429 pauses all new requests, not just the retried one.
+    """
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 min_concurrency: int = LLM_MIN_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(max(min_concurrency, max_concurrency // 2),
+                                               min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._resume_at = 0.0   # monotonic time before which nothing is sent
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, float] = {
+            "requests": 0, "retries": 0, "throttled": 0, "failed": 0,
+            "queue_seconds": 0.0, "throttle_seconds": 0.0,
+        }
+
+    def _count(self, **deltas: float) -> None:
+        with self._metrics_lock:
+            for name, delta in deltas.items():
+                self._metrics[name] += delta
+
+    def call(self, send: Callable[[], T], tokens: int,
+             used_tokens: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        """
+        Run `send()` (one API request estimated at `tokens` tokens) under the
+        limits. `used_tokens(result)` may report the actual usage, and the
+        token budget is settled against it.
+        """
+        result = self.open(send, tokens)
+        self.done(tokens, used_tokens(result) if used_tokens else None)
+        return result
+
+    def open(self, send: Callable[[], T], tokens: int) -> T:
+        """
+        call() for responses consumed after send() returns (streams): the
+        concurrency slot stays held, and the caller must call done() once
+        the response is consumed or closed.
+        """
+        attempt = 0
+        while True:
+            self._count(queue_seconds=self.concurrency.acquire())
+            wait = max(self.requests.take(1), self.tokens.take(tokens),
+                       self._resume_at - time.monotonic())
+            if wait:
+                self._count(throttle_seconds=wait)
+                time.sleep(wait)
+            self._count(requests=1)
+            try:
+                result = send()
+            except Exception as e:
+                throttled = _status(e) == 429
+                self.concurrency.release(throttled=throttled)
+                if throttled:
+                    self._count(throttled=1)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self._count(failed=1)
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                elif throttled:
+                    self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                logger.warning("[rate_limiter] %s, retry %d/%d in %.1fs",
+                               _status(e) or type(e).__name__, attempt + 1, self.max_retries, delay)
+                self._count(retries=1, throttle_seconds=delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return result
+
+    def done(self, tokens: int, actual: Optional[int] = None) -> None:
+        """
+        Release the slot taken by open() and settle the `tokens` estimate
+        against the `actual` usage, when known.
+        """
+        self.concurrency.release()
+        if actual is not None and actual != tokens:
+            self.tokens.give(tokens - actual)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters plus the current concurrency limit, requests in flight and
+        queue depth (current and peak).
+        """
+        with self._metrics_lock:
+            out = dict(self._metrics)
+        c = self.concurrency
+        out.update(concurrency=int(c.limit), in_flight=c.in_flight,
+                   queue_depth=c.waiting, max_queue_depth=c.max_waiting)
+        out["queue_seconds"] = round(out["queue_seconds"], 2)
+        out["throttle_seconds"] = round(out["throttle_seconds"], 2)
+        return out
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_limiter() -> RateLimiter:
+    """
+    Return the process-wide rate limiter.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
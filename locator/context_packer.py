@@ -0,0 +1,143 @@
+# locator/context_packer.py
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from locator.schema import FileContent
+from locator.ranker import Chunk, chunk_file
+from locator.symbol_index import SymbolIndex
+
+# token budget for the code section of the locator prompt
+LOCATOR_TOKEN_BUDGET = int(os.getenv("LOCATOR_TOKEN_BUDGET", "12000"))
+# share of the budget kept back from whole chunks for signature-only outlines
+LOCATOR_SIGNATURE_SHARE = float(os.getenv("LOCATOR_SIGNATURE_SHARE", "0.2"))
+
+_HEADER = re.compile(r"\s*(async\s+def|def|class)\s")
+_GAP = "   ...\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for code with BPE tokenizers).
+    """
+    return (len(text) + 3) // 4
+
+
+def file_chunks(files: List[FileContent]) -> List[Chunk]:
+    """
+    Function-level chunks of unranked files, keeping the files' order,
+    for callers that did not run the ranker.
+    """
+    index = SymbolIndex()
+    index.update(files)
+    return [c for f in files for c in chunk_file(f, index)]
+
+
+def signature_lines(chunk: Chunk) -> List[Tuple[int, str]]:
+    """
+    (line number, text) of the definition headers in a chunk: decorators and
+    the full (possibly multi-line) `def`/`class` line, without bodies.
+    """
+    lines = chunk.text.split("\n")
+    out: List[Tuple[int, str]] = []
+    i = 0
+    while i < len(lines):
+        if not _HEADER.match(lines[i]):
+            i += 1
+            continue
+        j = i
+        while j > 0 and lines[j - 1].lstrip().startswith("@"):
+            j -= 1
+        end = i
+        while end < len(lines) - 1 and not lines[end].split("#", 1)[0].rstrip().endswith(":"):
+            end += 1
+        out.extend((chunk.start + k, lines[k]) for k in range(j, end + 1))
+        if chunk.kind in ("function", "method"):
+            break  # nested definitions are implementation detail
+        i = end + 1
+    return out
+
+
+def _numbered(lines: List[Tuple[int, str]]) -> str:
+    return "".join(f"{n:6d}\t{line}\n" for n, line in lines)
+
+
+@dataclass
+class PackReport:
+    """
+    What the packer put into the prompt.
+    """
+    budget: int
+    used_tokens: int = 0
+    dropped_tokens: int = 0                     # tokens of code left out (incl. collapsed bodies)
+    full: List[str] = field(default_factory=list)        # "path:name" packed in full
+    signatures: List[str] = field(default_factory=list)  # "path:name" collapsed to signatures
+    dropped: List[str] = field(default_factory=list)     # "path:name" left out entirely
+
+
+def pack_context(chunks: List[Chunk], budget: int = LOCATOR_TOKEN_BUDGET,
+                 signature_share: float = LOCATOR_SIGNATURE_SHARE
+                 ) -> Tuple[List[FileContent], PackReport]:
+    """
+    Fill `budget` tokens greedily from `chunks`, most relevant first.
+
+    Pass 1 adds whole chunks in rank order, skipping (never cutting) any that
+    do not fit in the budget minus `signature_share`. Pass 2 collapses what
+    is left to signature lines, in rank order, up to the full budget. Line
+    numbers are kept, so locations the LLM returns still point into the
+    real files. Returns per-file FileContent (first-seen file order, lines
+    ascending, '...' marking gaps) and a PackReport.
+    """
+    report = PackReport(budget=budget)
+    picked: Dict[str, Dict[int, str]] = {}
+    order: List[str] = []
+    pending: List[Chunk] = []
+
+    def add(path: str, lines: List[Tuple[int, str]]) -> None:
+        if path not in picked:
+            picked[path] = {}
+            order.append(path)
+        picked[path].update(lines)
+
+    def cost(path: str, lines: List[Tuple[int, str]]) -> int:
+        # file header and gap markers cost tokens too
+        extra = estimate_tokens(f"--- FILE: {path}\n```python\n```\n") if path not in picked else 0
+        return estimate_tokens(_numbered(lines) + _GAP) + extra
+
+    full_budget = int(budget * (1 - signature_share))
+    for c in chunks:
+        lines = list(enumerate(c.text.split("\n"), c.start))
+        need = cost(c.path, lines)
+        if report.used_tokens + need <= full_budget:
+            add(c.path, lines)
+            report.used_tokens += need
+            report.full.append(f"{c.path}:{c.name}")
+        else:
+            pending.append(c)
+
+    for c in pending:
+        full_tokens = estimate_tokens(_numbered(list(enumerate(c.text.split("\n"), c.start))))
+        sig = signature_lines(c)
+        need = cost(c.path, sig) if sig else 0
+        if sig and report.used_tokens + need <= budget:
+            add(c.path, sig)
+            report.used_tokens += need
+            report.dropped_tokens += max(full_tokens - estimate_tokens(_numbered(sig)), 0)
+            report.signatures.append(f"{c.path}:{c.name}")
+        else:
+            report.dropped_tokens += full_tokens
+            report.dropped.append(f"{c.path}:{c.name}")
+
+    files: List[FileContent] = []
+    for path in order:
+        parts: List[str] = []
+        last = 0
+        for n in sorted(picked[path]):
+            if n > last + 1:
+                parts.append(_GAP)
+            parts.append(f"{n:6d}\t{picked[path][n]}\n")
+            last = n
+        files.append(FileContent(path=path, content="".join(parts)))
+    return files, report
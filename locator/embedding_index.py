@@ -0,0 +1,294 @@
+# locator/embedding_index.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import openai
+
+from locator.schema import FileContent
+from locator.file_cache import git_blob_sha
+from locator.ranker import Chunk, chunk_file, tokenize
+from locator.symbol_index import SymbolIndex
+from llm.rate_limiter import get_limiter
+from cassette import get_cassette, replaying
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR",
+                                os.path.expanduser("~/.cache/swe_agent/embeddings"))
+# "hashing" (local, deterministic) or "openai"
+EMBEDDER = os.getenv("EMBEDDER", "hashing")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+# on-disk vector dtype: float32 (fastest queries, one BLAS matvec over the
+# mapping), or float16 for half the disk/page cache at several times the
+# query cost (rows are widened to float32 block by block)
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+# float16 rows widened per block; small blocks stay in CPU cache
+_SEARCH_BLOCK = 4096
+
+
+class Embedder(ABC):
+    """
+    Turns texts into L2-normalized float32 vectors of a fixed dimension.
+    `name` identifies the model; vectors from different names never mix.
+    """
+    name: str = "base"
+    dim: int = 0
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic, offline embedder: code tokens hashed into `dim` signed
+    buckets with sublinear term frequency (the "hashing trick").
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            toks = tokenize(text)
+            if not toks:
+                continue
+            h = np.fromiter((zlib.crc32(t.encode()) for t in toks), dtype=np.uint32, count=len(toks))
+            buckets = (h % self.dim).astype(np.int64)
+            signs = np.where(h & 0x80000000, -1.0, 1.0)
+            _, inverse, counts = np.unique(h, return_inverse=True, return_counts=True)
+            weights = signs / counts[inverse] * (1 + np.log(counts[inverse]))
+            out[i] = np.bincount(buckets, weights=weights, minlength=self.dim)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+
+class OpenAIEmbedder(Embedder):
+    """
+    OpenAI embeddings API, `batch_size` texts per request.
+    """
+    dims = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072,
+            "text-embedding-ada-002": 1536}
+
+    def __init__(self, model: str = EMBEDDING_MODEL, batch_size: int = 256,
+                 max_chars: int = 24000):
+        self.model = model
+        self.name = f"openai-{model}"
+        self.dim = self.dims.get(model, 1536)
+        self.batch_size = batch_size
+        self.max_chars = max_chars   # keeps each input under the model's token limit
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = [t[:self.max_chars] or " " for t in texts[start:start + self.batch_size]]
+            vectors = get_limiter().call(lambda: self._request(batch), sum(len(t) for t in batch) // 4)
+            out[start:start + len(batch)] = vectors
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+
+    def _request(self, batch: List[str]) -> List[List[float]]:
+        cassette = get_cassette()
+        request = {"model": self.model, "input": batch}
+        if replaying():
+            vectors, latency = cassette.replay("embedding", request)
+            cassette.simulate(latency)
+            return vectors
+        started = time.perf_counter()
+        resp = openai.embeddings.create(model=self.model, input=batch)
+        vectors = [item.embedding for item in sorted(resp.data, key=lambda item: item.index)]
+        if cassette:
+            cassette.record("embedding", request, vectors, time.perf_counter() - started)
+        return vectors
+
+
+def get_embedder(kind: str = EMBEDDER) -> Embedder:
+    if kind == "openai":
+        return OpenAIEmbedder()
+    if kind == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown EMBEDDER {kind!r} (expected 'hashing' or 'openai')")
+
+
+@dataclass
+class ChunkRow:
+    """
+    Metadata of one vector row.
+    """
+    sha: str       # blob sha of the file the chunk came from
+    path: str
+    name: str
+    kind: str
+    start: int
+    end: int
+
+
+def chunk_text(chunk: Chunk) -> str:
+    return f"{chunk.path}\n{chunk.name}\n{chunk.text}"
+
+
+class EmbeddingIndex:
+    """
+    Function-level chunk vectors of one repository, persisted under `directory`:
+      vectors.npy - (rows, dim) float32/float16 matrix, opened with mmap (zero-copy)
+      meta.json   - embedder name, dtype and one ChunkRow per vector row
+    update() re-embeds only chunks of files whose blob sha is not stored yet.
+    """
+    def __init__(self, directory: str, embedder: Embedder, dtype: str = EMBEDDING_DTYPE):
+        self.directory = directory
+        self.embedder = embedder
+        self.dtype = np.dtype(dtype)
+        self.rows: List[ChunkRow] = []
+        self.vectors: np.ndarray = np.zeros((0, embedder.dim), dtype=self.dtype)
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.npy")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _load(self) -> None:
+        try:
+            with open(self._meta_path, encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("embedder") != self.embedder.name or meta.get("dtype") != self.dtype.name:
+                logger.info("[embeddings] %s built with %s/%s, rebuilding", self.directory,
+                            meta.get("embedder"), meta.get("dtype"))
+                return
+            vectors = np.load(self._vectors_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return
+        rows = [ChunkRow(*r) for r in meta.get("rows", [])]
+        if vectors.shape != (len(rows), self.embedder.dim):
+            return
+        self.rows, self.vectors = rows, vectors
+
+    def update(self, files: List[FileContent], index: SymbolIndex) -> int:
+        """
+        Bring the index in line with `files`: keep vectors of blobs already
+        stored (by sha), embed chunks of new blobs, drop everything else.
+        Writes the new files atomically and re-opens them memory-mapped.
+        Returns the number of chunks embedded.
+        """
+        with self._lock:
+            by_sha: Dict[str, List[int]] = {}
+            first_path: Dict[str, str] = {}
+            for i, row in enumerate(self.rows):
+                # identical files share vectors; take the rows of one of them
+                if first_path.setdefault(row.sha, row.path) == row.path:
+                    by_sha.setdefault(row.sha, []).append(i)
+
+            keep: List[int] = []          # old row index per kept row
+            rows: List[ChunkRow] = []
+            fresh: List[Chunk] = []
+            fresh_sha: List[str] = []
+            for f in files:
+                sha = f.sha or git_blob_sha(f.raw)
+                old = by_sha.get(sha)
+                if old is not None:
+                    for i in old:
+                        r = self.rows[i]
+                        keep.append(i)
+                        rows.append(ChunkRow(sha, f.path, r.name, r.kind, r.start, r.end))
+                    continue
+                for c in chunk_file(f, index):
+                    fresh.append(c)
+                    fresh_sha.append(sha)
+
+            if (not fresh and keep == list(range(len(self.rows)))
+                    and all(r.path == self.rows[i].path for i, r in enumerate(rows))):
+                return 0
+
+            new_vectors = self.embedder.embed([chunk_text(c) for c in fresh]) if fresh \
+                else np.zeros((0, self.embedder.dim), dtype=np.float32)
+            rows += [ChunkRow(sha, c.path, c.name, c.kind, c.start, c.end)
+                     for c, sha in zip(fresh, fresh_sha)]
+
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_vectors = f"{self._vectors_path}.{os.getpid()}.tmp"
+            out = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=self.dtype,
+                                            shape=(len(rows), self.embedder.dim))
+            if keep:
+                out[:len(keep)] = self.vectors[np.asarray(keep)]
+            out[len(keep):] = new_vectors
+            out.flush()
+            del out
+            tmp_meta = f"{self._meta_path}.{os.getpid()}.tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as fh:
+                json.dump({"embedder": self.embedder.name, "dtype": self.dtype.name,
+                           "rows": [[r.sha, r.path, r.name, r.kind, r.start, r.end] for r in rows]}, fh)
+            os.replace(tmp_vectors, self._vectors_path)
+            os.replace(tmp_meta, self._meta_path)
+
+            self.rows = rows
+            self.vectors = np.load(self._vectors_path, mmap_mode="r")
+            logger.info("[embeddings] %d chunks kept, %d embedded (%s)",
+                        len(keep), len(fresh), self.embedder.name)
+            return len(fresh)
+
+    def search(self, query: str, k: int = 50) -> List[Tuple[ChunkRow, float]]:
+        """
+        The k rows most similar (cosine) to `query`, best first.
+        """
+        n = len(self.rows)
+        if not n or k <= 0:
+            return []
+        q = self.embedder.embed([query])[0]
+        if self.vectors.dtype == np.float32:
+            scores = self.vectors @ q
+        else:
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, _SEARCH_BLOCK):
+                block = self.vectors[start:start + _SEARCH_BLOCK]
+                scores[start:start + len(block)] = block.astype(np.float32) @ q
+        k = min(k, n)
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(self.rows[i], float(scores[i])) for i in idx]
+
+
+_indexes: Dict[str, EmbeddingIndex] = {}
+_indexes_lock = threading.Lock()
+
+def embedding_dir(repo_url: str) -> str:
+    key = hashlib.sha1(repo_url.encode()).hexdigest()[:16]
+    return os.path.join(EMBEDDING_INDEX_DIR, key)
+
+def get_embedding_index(repo_url: str, embedder: Optional[Embedder] = None) -> EmbeddingIndex:
+    """
+    The embedding index for `repo_url`, opened once per process.
+    """
+    with _indexes_lock:
+        index = _indexes.get(repo_url)
+        if index is None:
+            index = _indexes[repo_url] = EmbeddingIndex(embedding_dir(repo_url),
+                                                        embedder or get_embedder())
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[str, int]]], k: int = 60) -> List[Tuple[str, int]]:
+    """
+    Merge several rankings of (path, start) chunk keys: score = sum 1/(k + rank).
+    """
+    scores: Dict[Tuple[str, int], float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda key: -scores[key])
@@ -0,0 +1,144 @@
+# locator/entity_resolver.py
+
+import logging
+import os
+import re
+import shlex
+from typing import Dict, List, Set
+
+from vm_executor.vm_manager import run_batch
+from vm_executor.output     import UNBOUNDED
+from locator.schema         import FileContent
+from locator.file_scanner   import parse_ls_files, read_blobs
+from locator.symbol_index   import parse_file
+from intake.schema          import Entity
+
+logger = logging.getLogger(__name__)
+
+# also fetch files the resolved files import, and files importing them
+LOCATOR_FAST_NEIGHBORS = os.getenv("LOCATOR_FAST_NEIGHBORS", "0") == "1"
+# upper bound on files the fast path sends (resolved files always count first)
+LOCATOR_FAST_MAX_FILES = int(os.getenv("LOCATOR_FAST_MAX_FILES", "20"))
+
+_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _ls_files_cmd(workdir: str, pathspecs: List[str]) -> str:
+    return f"git -C {workdir} ls-files -s -z -- " + " ".join(shlex.quote(p) for p in pathspecs)
+
+
+def _grep_ls_files_cmd(workdir: str, pattern: str) -> str:
+    # files matching `pattern`, listed with their blob SHAs
+    return (f"git -C {workdir} grep -l -z -E {shlex.quote(pattern)} -- '*.py'"
+            f" | xargs -0 -r git -C {workdir} ls-files -s -z --")
+
+
+def _best_suffix_matches(wanted: str, entries: Dict[str, str], workdir: str) -> Dict[str, str]:
+    """
+    Keep the tracked files sharing the most trailing path components with
+    `wanted` (e.g. '/home/u/proj/pkg/app.py' -> 'swe_agent/pkg/app.py').
+    """
+    want = [p for p in wanted.replace("\\", "/").split("/") if p and p != "."]
+    best, scored = 0, {}
+    for path, sha in entries.items():
+        have = path[len(workdir) + 1:].split("/")
+        n = 0
+        while n < min(len(want), len(have)) and want[-1 - n] == have[-1 - n]:
+            n += 1
+        if n:
+            scored[path] = (n, sha)
+            best = max(best, n)
+    return {p: sha for p, (n, sha) in scored.items() if n == best}
+
+
+def _run_lookups(commands: List[str]) -> List[str]:
+    results = run_batch(commands, policy=UNBOUNDED)
+    # `git grep` exits 1 when nothing matches; that is not an error here
+    return [r.get("stdout", "") if r.get("exitCode") in (0, 1, 123) else "" for r in results]
+
+
+def _neighbors(workdir: str, files: List[FileContent]) -> Dict[str, str]:
+    """
+    Tracked files imported by `files` or importing them (one more batch),
+    ranked: imported files first, then importers, each by path.
+    """
+    modules: Set[str] = set()
+    candidates: Set[str] = set()
+    for f in files:
+        info = parse_file(f.path, f.text, f.sha or "", workdir)
+        if info.module:
+            modules.add(info.module)
+        for imp in info.imports:
+            rel = imp.replace(".", "/")
+            if rel:
+                candidates.update({f"{rel}.py", f"{rel}/__init__.py"})
+    commands = []
+    if candidates:
+        commands.append(_ls_files_cmd(workdir, sorted(candidates)))
+    names = sorted(m for m in modules if m)
+    if names:
+        alternatives = "|".join(re.escape(m) for m in names)
+        commands.append(_grep_ls_files_cmd(
+            workdir, rf"^\s*(from\s+({alternatives})\s+import|import\s+({alternatives}))\b"))
+    entries: Dict[str, str] = {}
+    for out in _run_lookups(commands) if commands else []:
+        for path, sha in sorted(parse_ls_files(out, workdir).items()):
+            entries.setdefault(path, sha)
+    return entries
+
+
+def resolve_entities(workdir: str, entities: List[Entity],
+                     neighbors: bool = LOCATOR_FAST_NEIGHBORS,
+                     max_files: int = LOCATOR_FAST_MAX_FILES) -> List[FileContent]:
+    """
+    Fetch only the files the issue's entities point at.
+
+    File entities are matched against tracked paths by trailing components;
+    function entities by a `def`/`class` of that name (`git grep`). Both
+    lookups run as one batch on the VM and double as the existence check,
+    so anything that does not resolve is simply absent. Contents then come
+    from the blob cache or one archive download: two round trips at most,
+    plus two when `neighbors` adds direct importers/importees.
+    Files are ranked before the `max_files` cap: files the issue names,
+    then files defining the named functions, then neighbors.
+    Returns [] when nothing resolves.
+    """
+    file_names = sorted({e.file for e in entities if e.file})
+    func_names = sorted({e.function.rsplit(".", 1)[-1] for e in entities
+                         if e.function and _NAME.match(e.function.rsplit(".", 1)[-1])})
+    if not file_names and not func_names:
+        return []
+
+    commands = []
+    if file_names:
+        basenames = sorted({n.replace("\\", "/").rsplit("/", 1)[-1] for n in file_names})
+        commands.append(_ls_files_cmd(workdir, [f":(glob)**/{b}" for b in basenames]))
+    if func_names:
+        commands.append(_grep_ls_files_cmd(
+            workdir, rf"^\s*(async\s+def|def|class)\s+({'|'.join(func_names)})\b"))
+    outputs = _run_lookups(commands)
+
+    entries: Dict[str, str] = {}   # in rank order
+    if file_names:
+        tracked = parse_ls_files(outputs.pop(0), workdir)
+        for name in file_names:
+            entries.update(sorted(_best_suffix_matches(name, tracked, workdir).items()))
+    if func_names:
+        for path, sha in sorted(parse_ls_files(outputs.pop(0), workdir).items()):
+            entries.setdefault(path, sha)
+    entries = {p: sha for p, sha in entries.items() if p.endswith(".py")}
+    if not entries:
+        logger.info("[resolve_entities] nothing resolved for files=%s functions=%s",
+                    file_names, func_names)
+        return []
+
+    entries = dict(list(entries.items())[:max_files])
+    files = read_blobs(entries)
+    if neighbors and len(entries) < max_files:
+        extra = {p: sha for p, sha in _neighbors(workdir, files).items() if p not in entries}
+        extra = dict(list(extra.items())[:max_files - len(entries)])
+        if extra:
+            files = sorted(files + read_blobs(extra), key=lambda f: f.path)
+    logger.info("[resolve_entities] resolved %d file(s): %s",
+                len(files), [f.path for f in files])
+    return files
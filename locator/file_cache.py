@@ -0,0 +1,110 @@
+# locator/file_cache.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+FILE_CACHE_DIR = os.getenv("FILE_CACHE_DIR", os.path.expanduser("~/.cache/swe_agent/blobs"))
+FILE_CACHE_MEMORY_MB = int(os.getenv("FILE_CACHE_MEMORY_MB", "64"))
+
+
+def git_blob_sha(data: bytes) -> str:
+    """
+    The object id git assigns to a blob with this content.
+    """
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+class BlobCache:
+    """
+    Client-side cache of file contents keyed by git blob SHA.
+
+    Two tiers:
+      - memory: LRU bounded by `max_memory_bytes`
+      - disk:   one file per blob under `disk_dir` (unbounded, optional)
+    A blob found on disk is promoted into memory.
+    """
+    def __init__(self, max_memory_bytes: int = FILE_CACHE_MEMORY_MB * 1024 * 1024,
+                 disk_dir: Optional[str] = FILE_CACHE_DIR):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir or None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_fetched": 0,
+        }
+
+    def _disk_path(self, sha: str) -> str:
+        return os.path.join(self.disk_dir, sha[:2], sha[2:])
+
+    def _remember(self, sha: str, data: bytes) -> None:
+        # caller holds the lock
+        if sha in self._memory:
+            self._memory.move_to_end(sha)
+            return
+        self._memory[sha] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, sha: str) -> Optional[bytes]:
+        """
+        Return the blob content, or None (counted as a miss) if unknown.
+        """
+        with self._lock:
+            data = self._memory.get(sha)
+            if data is not None:
+                self._memory.move_to_end(sha)
+                self.stats["memory_hits"] += 1
+                return data
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(sha), "rb") as fh:
+                    data = fh.read()
+            except OSError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self._remember(sha, data)
+                    self.stats["disk_hits"] += 1
+                return data
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, sha: str, data: bytes) -> None:
+        """
+        Store a freshly fetched blob in both tiers.
+        """
+        with self._lock:
+            self._remember(sha, data)
+            self.stats["bytes_fetched"] += len(data)
+        if self.disk_dir:
+            path = self._disk_path(sha)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)  # atomic, so readers never see partial blobs
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+_cache: Optional[BlobCache] = None
+
+def get_blob_cache() -> BlobCache:
+    """
+    Return the process-wide blob cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = BlobCache()
+    return _cache
@@ -1,33 +1,128 @@
 # locator/file_scanner.py
 
 import logging
+import os
 from typing import Dict, List
-from vm_executor.vm_manager import get_vm, read_file_numbered
+from vm_executor.vm_manager import get_vm, read_files_numbered
+from vm_executor.output     import UNBOUNDED
+from vm_executor.archive    import download_tree, download_files
 from locator.schema     import FileContent
+from locator.file_cache import get_blob_cache, git_blob_sha
 
 logger = logging.getLogger(__name__)
 
+# "cache":   `git ls-files -s` on the VM, only blobs missing from the local
+#            content-hash cache are downloaded (default)
+# "archive": one compressed tar of all .py files, numbered on the client
+# "batch":   `find` plus batched `nl -ba` reads on the VM
+SCAN_MODE = os.getenv("SCAN_MODE", "cache")
+
+def parse_ls_files(stdout: str, workdir: str) -> Dict[str, str]:
+    """
+    Parse `git ls-files -s -z` output into {workdir/path: blob sha},
+    skipping submodules.
+    """
+    entries: Dict[str, str] = {}
+    for record in stdout.split("\0"):
+        if not record:
+            continue
+        meta, _, path = record.partition("\t")
+        mode, sha, _stage = meta.split()
+        if mode == "160000":  # submodule, not a file
+            continue
+        entries[f"{workdir}/{path}"] = sha
+    return entries
+
+def list_tracked_py_files(workdir: str) -> Dict[str, str]:
+    """
+    One `git ls-files -s` call on the VM.
+    Returns {path: blob sha} for tracked .py files, paths prefixed with workdir.
+    """
+    vm = get_vm()
+    res = vm.run_command(f"git -C {workdir} ls-files -s -z -- '*.py'",
+                         echo=False, policy=UNBOUNDED)
+    if res["exitCode"] != 0:
+        raise RuntimeError(f"git ls-files failed: {res['stderr']}")
+    return parse_ls_files(res["stdout"], workdir)
+
+def read_blobs(entries: Dict[str, str]) -> List[FileContent]:
+    """
+    Read the files in {path: blob sha}, fetching only blobs the local cache
+    lacks (as one archive). Returns FileContent sorted by path.
+    """
+    cache = get_blob_cache()
+    contents: Dict[str, bytes] = {}
+    missing: List[str] = []
+    for path, sha in entries.items():
+        data = cache.get(sha)
+        if data is None:
+            missing.append(path)
+        else:
+            contents[path] = data
+
+    if missing:
+        fetched = download_files(missing)
+        for path in missing:
+            data = fetched[path]
+            contents[path] = data
+            # a modified working-tree file does not match its index sha; don't cache it
+            if git_blob_sha(data) == entries[path]:
+                cache.put(entries[path], data)
+
+    logger.info("File cache: %d hits, %d fetched (%.0f%% hit rate overall, stats=%s)",
+                len(entries) - len(missing), len(missing),
+                cache.hit_rate() * 100, cache.stats)
+    # the FileContent shares the cached bytes object; nothing is copied
+    return [FileContent(path=p, sha=entries[p], raw=contents[p]) for p in sorted(entries)]
+
+def scan_cached_py_files(workdir: str) -> List[FileContent]:
+    """
+    Read all tracked .py files, fetching only blobs the local cache lacks.
+    Rescans of the same (or a nearby) commit move almost no bytes.
+    """
+    return read_blobs(list_tracked_py_files(workdir))
+
 def scan_py_files(workdir: str) -> Dict[str, List[FileContent]]:
     """
     Scan the VM workspace for all .py files and read their contents with line numbers.
 
+    In "cache" mode one `git ls-files -s` lists the blob SHAs and only blobs
+    missing from the local content-hash cache are downloaded (as one archive).
+    In "archive" mode the VM packs every .py file into one tar stream and the
+    line numbers are added locally; small repos need a single round trip.
+    In "batch" mode file reads are batched, so the scan costs
+    1 + ceil(N / READ_BATCH_SIZE) round trips instead of 1 + N.
+
     Returns:
         {
           'files': [
-             FileContent(path='swe_agent/app.py', content=' 1 from flask import ...'),
+             FileContent(path='swe_agent/app.py', lines=120, bytes=3456, sha='...'),
              ...
           ]
         }
     """
+    if SCAN_MODE == "cache":
+        files = scan_cached_py_files(workdir)
+        logger.info("Scanned and read %d Python files (cache)", len(files))
+        return {"files": files}
+
+    if SCAN_MODE == "archive":
+        raw = download_tree(workdir, "*.py")
+        files: List[FileContent] = [
+            FileContent(path=p, raw=data) for p, data in sorted(raw.items())
+        ]
+        logger.info("Scanned and read %d Python files (archive)", len(files))
+        return {"files": files}
+
     vm = get_vm()
     # List all .py file paths
-    result = vm.run_command(f"find {workdir} -type f -name '*.py'")
+    result = vm.run_command(f"find {workdir} -type f -name '*.py'", policy=UNBOUNDED)
     paths = result["stdout"].splitlines()
 
-    files: List[FileContent] = []
-    for p in paths:
-        numbered = read_file_numbered(p)
-        files.append(FileContent(path=p, content=numbered))
+    numbered = read_files_numbered(paths)
+    files = [
+        FileContent.from_numbered(p, numbered[p]) for p in paths
+    ]
 
     logger.info("Scanned and read %d Python files", len(files))
     return {"files": files}
@@ -1,37 +1,34 @@
 # locator/llm_location_predictor.py
 
-import os
 import json
-import openai
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from locator.schema import FileContent, Location, LocatorResult
+from locator.ranker import Chunk
+from locator.context_packer import LOCATOR_TOKEN_BUDGET, file_chunks, pack_context
+from llm.gateway import chat
 
-# Load OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
-    raise RuntimeError("Please set the OPENAI_API_KEY environment variable")
-
-def locate_with_llm(
+def build_prompt(
     summary: str,
-    files: List[FileContent],
-    context: Optional[dict] = None
-) -> LocatorResult:
+    chunks: List[Chunk],
+    context: Optional[dict] = None,
+    symbols: Optional[List[dict]] = None,
+    token_budget: int = LOCATOR_TOKEN_BUDGET,
+    scored: bool = False
+) -> str:
     """
-    Given a bug summary, optional context, and a list of FileContent,
-    ask the LLM to recommend where to insert validation or fix code.
-
-    Prints the full prompt and raw model response for debugging.
-
-    Returns:
-        LocatorResult:
-          - locations: List[Location]
-          - explanation: str
-          - context: passed-through context
+    Build the locator prompt with the code section packed into `token_budget`
+    tokens from `chunks` (most relevant first).
+    With scored=True each location is asked for with a 0-1 confidence
+    "score", and an empty list is allowed (used for shards of a repo).
     """
-    # 1. Build a composite code section
+    # 1. Build a composite code section within the token budget
+    packed, report = pack_context(chunks, budget=token_budget)
+    print(f"📐 Packed context: {report.used_tokens}/{report.budget} tokens, "
+          f"{len(report.full)} full, {len(report.signatures)} signature-only, "
+          f"{len(report.dropped)} dropped ({report.dropped_tokens} tokens left out)")
     sections: List[str] = []
-    for f in files:
+    for f in packed:
         sections.append(
             f"--- FILE: {f.path}\n```python\n{f.content}\n```"
         )
@@ -49,6 +46,26 @@ def locate_with_llm(
             json.dumps(context, indent=2),
             ""
         ]
+    if symbols:
+        prompt_parts += [
+            "Definitions referenced by the issue (file, symbol, line range):",
+            *[f"  - {s['file']}: {s['kind']} {s['symbol']} (lines {s['start']}-{s['end']})"
+              for s in symbols],
+            ""
+        ]
+    if scored:
+        prompt_parts += [
+            "Below is one part of the repository's Python files (with path and content):",
+            all_code,
+            "",
+            "Based on the summary and context, recommend where in THESE files to insert validation or fix code.",
+            "If none of these files is relevant, return an empty \"locations\" array.",
+            "Respond with a JSON object with two keys:",
+            "  \"locations\": an array of {\"file\":<path>,\"function\":<name|null>,\"line\":<number|null>,\"score\":<0..1>},",
+            "    where score is your confidence that the fix belongs there,",
+            "  \"explanation\": a brief English sentence explaining why.",
+        ]
+        return "\n".join(prompt_parts)
     prompt_parts += [
         "Below are the candidate Python files (with path and content):",
         all_code,
@@ -67,13 +84,14 @@ def locate_with_llm(
         "author and body fields are non-empty to avoid database errors.\"",
         "}"
     ]
-    prompt = "\n".join(prompt_parts)
+    return "\n".join(prompt_parts)
 
-    # 3. Print prompt for traceability
-    print("\n🗣️ Prompt to LLM:\n", prompt)
-
-    # 4. Call the LLM using the new openai-python v1.x interface
-    response = openai.chat.completions.create(
+def call_llm(prompt: str) -> str:
+    """
+    Send the locator prompt and return the raw response text.
+    """
+    # Call the LLM through the shared gateway (cached by prompt)
+    response = chat(
         model="gpt-4o-mini",
         messages=[
             {
@@ -83,27 +101,73 @@ def locate_with_llm(
             { "role": "user", "content": prompt },
         ],
     )
-    text = response.choices[0].message.content.strip()
-
-    # 5. Print raw response
-    print("\n🤖 LLM raw response:\n", text)
+    return response.strip()
 
-    # 6. Parse JSON into dataclasses
+def parse_response(text: str) -> Tuple[List[Tuple[Location, float]], str]:
+    """
+    Parse the model's JSON into ([(Location, score)], explanation).
+    Unscored locations get score 1.0; invalid JSON yields ([], "").
+    """
     try:
         body = json.loads(text)
     except json.JSONDecodeError:
-        return LocatorResult(locations=[], explanation="", context=context)
+        return [], ""
 
-    locs: List[Location] = []
+    locs: List[Tuple[Location, float]] = []
     for loc in body.get("locations", []):
-        locs.append(Location(
+        try:
+            score = float(loc.get("score", 1.0))
+        except (TypeError, ValueError):
+            score = 0.0
+        locs.append((Location(
             file=loc.get("file", ""),
             function=loc.get("function"),
             line=loc.get("line")
-        ))
+        ), score))
+    return locs, body.get("explanation", "")
+
+def locate_with_llm(
+    summary: str,
+    files: List[FileContent],
+    context: Optional[dict] = None,
+    symbols: Optional[List[dict]] = None,
+    chunks: Optional[List[Chunk]] = None,
+    token_budget: int = LOCATOR_TOKEN_BUDGET
+) -> LocatorResult:
+    """
+    Given a bug summary, optional context, and a list of FileContent,
+    ask the LLM to recommend where to insert validation or fix code.
+    `symbols` are definitions already resolved from the issue by the symbol
+    index ({'file', 'symbol', 'kind', 'start', 'end'}); they are listed in
+    the prompt as hints.
+
+    The code section is packed into `token_budget` tokens: ranked `chunks`
+    if given (most relevant first), otherwise the functions of `files` in order.
+    Whatever does not fit is collapsed to signatures or dropped.
+
+    Prints the full prompt and raw model response for debugging.
+
+    Returns:
+        LocatorResult:
+          - locations: List[Location]
+          - explanation: str
+          - context: passed-through context
+    """
+    prompt = build_prompt(summary, chunks if chunks else file_chunks(files),
+                          context=context, symbols=symbols, token_budget=token_budget)
+
+    # Print prompt for traceability
+    print("\n🗣️ Prompt to LLM:\n", prompt)
+
+    text = call_llm(prompt)
+
+    # Print raw response
+    print("\n🤖 LLM raw response:\n", text)
 
+    # Parse JSON into dataclasses
+    locs, explanation = parse_response(text)
     return LocatorResult(
-        locations=locs,
-        explanation=body.get("explanation", ""),
+        locations=[loc for loc, _ in locs],
+        explanation=explanation,
         context=context
     )
@@ -1,44 +1,168 @@
 # locator/pipeline.py
 
 import logging
+import os
+from dataclasses import replace
 from typing import List, TypedDict, Optional
 from langgraph.graph import StateGraph, START, END
 
 from locator.schema import FileContent, LocatorResult, Location
-from vm_executor.vm_manager import setup_workspace, clone_repository
+from vm_executor.vm_manager import (
+    setup_workspace, clone_repository,
+    setup_workspace_async, clone_repository_async,
+)
 from locator.file_scanner      import scan_py_files
+from locator.entity_resolver   import resolve_entities
+from locator.symbol_index      import get_symbol_index, index_path
+from locator.ranker            import Chunk, get_bm25_index
+from locator.embedding_index   import get_embedding_index, reciprocal_rank_fusion
 from locator.llm_location_predictor import locate_with_llm
+from locator.context_packer    import LOCATOR_TOKEN_BUDGET, file_chunks
+from locator.sharded           import locate_sharded, total_tokens
 from intake.schema             import StructuredIssue
+from graph_registry            import get_compiled
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# how many function-level chunks the locator prompt gets (0 = no ranking)
+LOCATOR_TOP_K = int(os.getenv("LOCATOR_TOP_K", "40"))
+# "single": one LLM call on the top-K chunks
+# "sharded": every matching chunk, split into budget-sized shards queried in parallel
+# "auto": sharded only when the matching chunks do not fit one budget
+LOCATOR_MODE = os.getenv("LOCATOR_MODE", "single")
+# try the entity fast path (fetch only files the issue names) before a full scan
+LOCATOR_FAST_PATH = os.getenv("LOCATOR_FAST_PATH", "1") == "1"
+# fuse BM25 with the persisted embedding index (reciprocal rank fusion)
+LOCATOR_EMBEDDINGS = os.getenv("LOCATOR_EMBEDDINGS", "0") == "1"
+
 class LocatorState(TypedDict, total=False):
     """
     State schema for the locator pipeline.
     """
     issue: StructuredIssue      # input issue
     repo_url: str               # e.g. "https://github.com/foo/bar.git"
+    commit: Optional[str]       # commit to check out (default: remote HEAD)
     context: Optional[dict]     # optional context for re-invocation
     workdir: str                # VM workspace path
-    files: List[FileContent]    # all scanned FileContent
+    files: List[FileContent]    # all scanned FileContent (or only the resolved ones)
+    fast_path: bool             # files came from the entity fast path, not a full scan
+    symbols: List[dict]         # definitions referenced by the issue (file, line range)
+    chunks: List[Chunk]         # top-K ranked function-level chunks
     locations: List[dict]       # intermediate raw locations (dataclass created later)
     explanation: str            # natural-language reasoning
 
+def resolve_entities_node(state: LocatorState) -> dict:
+    """
+    Entity fast path: fetch only the files the issue's entities resolve to.
+    Leaves fast_path False (→ full scan) when nothing resolves.
+    """
+    entities = state["issue"].entities
+    if not LOCATOR_FAST_PATH or not entities:
+        return {"fast_path": False}
+    files = resolve_entities(state["workdir"], entities)
+    logger.info("[resolve_entities] %d entities -> %d files", len(entities), len(files))
+    if not files:
+        return {"fast_path": False}
+    return {"files": files, "fast_path": True}
+
+def route_after_resolve(state: LocatorState) -> str:
+    return "index_symbols" if state.get("fast_path") else "scan_py_files"
+
 def scan_py_files_node(state: LocatorState) -> dict:
     logger.info("🔍 scan_py_files input: workdir=%s", state["workdir"])
     out = scan_py_files(state["workdir"])
     logger.info("✅ scan_py_files output: %d files", len(out["files"]))
     return out
 
+def index_symbols_node(state: LocatorState) -> dict:
+    """
+    Update the persistent symbol index with the scanned files, then resolve
+    the intake entities and identifiers in the summary to definitions.
+    """
+    index = get_symbol_index(state["repo_url"], root=state["workdir"])
+    # a fast-path file subset must not evict the rest of the repo from the index
+    parsed = index.update(state["files"], prune=not state.get("fast_path"))
+    index.save(index_path(state["repo_url"]))
+
+    issue = state["issue"]
+    hits = []
+    for ent in issue.entities:
+        if ent.function:
+            hits += index.lookup(ent.function, path=ent.file)
+    hits += index.match_text(issue.summary)
+
+    symbols, seen = [], set()
+    for sym in hits:
+        if (sym.path, sym.qualname) in seen:
+            continue
+        seen.add((sym.path, sym.qualname))
+        symbols.append({"file": sym.path, "symbol": sym.qualname, "kind": sym.kind,
+                        "start": sym.start, "end": sym.end})
+    logger.info("[index_symbols] reparsed=%d/%d files, resolved=%s",
+                parsed, len(state["files"]), symbols)
+    return {"symbols": symbols}
+
+def rank_chunks_node(state: LocatorState) -> dict:
+    """
+    BM25-rank the function-level chunks of all scanned files against the
+    issue summary and entities; keep the top LOCATOR_TOP_K (every matching
+    chunk unless LOCATOR_MODE is "single"). With LOCATOR_EMBEDDINGS=1 the
+    BM25 ranking is fused with an embedding search of a full scan.
+    Chunks holding a resolved symbol are always kept, ranked first.
+    """
+    if LOCATOR_TOP_K <= 0:
+        return {}
+    issue = state["issue"]
+    query = " ".join([issue.summary] + [
+        " ".join(filter(None, [ent.file, ent.function])) for ent in issue.entities
+    ] + [s["symbol"] for s in state.get("symbols", [])])
+
+    index = get_symbol_index(state["repo_url"], root=state["workdir"])
+    key = state["repo_url"] + ("#fast" if state.get("fast_path") else "")
+    bm25 = get_bm25_index(key, state["files"], index)
+    k = LOCATOR_TOP_K if LOCATOR_MODE == "single" else len(bm25.chunks)
+    top = bm25.top_k(query, k)
+
+    # copies, since the indexed chunks are shared across issues
+    chunks: List[Chunk] = [replace(bm25.chunks[i], score=score) for i, score in top]
+    if LOCATOR_EMBEDDINGS and not state.get("fast_path"):
+        emb = get_embedding_index(state["repo_url"])
+        emb.update(state["files"], index)
+        dense = [(row.path, row.start) for row, _ in emb.search(query, max(k, LOCATOR_TOP_K))]
+        by_key = {(c.path, c.start): c for c in bm25.chunks}
+        lexical = {(c.path, c.start): c for c in chunks}
+        fused = reciprocal_rank_fusion([list(lexical), dense])[:k]
+        chunks = [lexical.get(key) or by_key[key] for key in fused if key in by_key]
+    pinned: List[Chunk] = []
+    for s in state.get("symbols", []):
+        for c in bm25.chunks:
+            if (c.path == s["file"] and c.start <= s["end"] and s["start"] <= c.end
+                    and c not in pinned):
+                pinned.append(c)
+    pinned_keys = {(c.path, c.start) for c in pinned}
+    chunks = pinned + [c for c in chunks if (c.path, c.start) not in pinned_keys]
+
+    logger.info("[rank_chunks] kept %d/%d chunks: %s", len(chunks), len(bm25.chunks),
+                [(c.path, c.name, round(c.score, 2)) for c in chunks[:10]])
+    return {"chunks": chunks}
+
 def locate_code_node(state: LocatorState) -> dict:
     summary   = state["issue"].summary
     files     = state["files"]
     context   = state.get("context")
-    logger.info("[locate_code] summary=%r, context=%s, #files=%d",
-                summary, context, len(files))
+    logger.info("[locate_code] summary=%r, context=%s, #files=%d, #chunks=%d",
+                summary, context, len(files), len(state.get("chunks") or []))
 
-    result = locate_with_llm(summary=summary, files=files, context=context)
+    # ranked chunks, when present, are packed into the prompt instead of whole files
+    chunks = state.get("chunks") or file_chunks(files)
+    if LOCATOR_MODE == "sharded" or (
+            LOCATOR_MODE == "auto" and total_tokens(chunks) > LOCATOR_TOKEN_BUDGET):
+        result = locate_sharded(summary=summary, chunks=chunks, context=context,
+                                symbols=state.get("symbols"))
+    else:
+        result = locate_with_llm(summary=summary, files=files, context=context,
+                                 symbols=state.get("symbols"), chunks=chunks)
     # unpack LocatorResult into LangGraph state dict
     out = {
         "locations":   [loc.__dict__ for loc in result.locations],
@@ -47,40 +171,77 @@ def locate_code_node(state: LocatorState) -> dict:
     logger.info("[locate_code] output: %s", out)
     return out
 
-def build_locator_graph() -> StateGraph:
+def build_locator_graph(async_nodes: bool = False) -> StateGraph:
     """
     Construct the locator DAG:
-      START → setup_workspace → clone_repository → scan_py_files
-             → locate_code → END
+      START → setup_workspace → clone_repository → resolve_entities
+             → [scan_py_files, only if no entity resolved]
+             → index_symbols → rank_chunks → locate_code → END
+    With async_nodes=True the VM workspace nodes are registered as coroutines
+    (run the compiled graph with ainvoke()).
     """
     g = StateGraph(LocatorState)
 
-    g.add_node("setup_workspace",  setup_workspace)
-    g.add_node("clone_repository", clone_repository)
+    if async_nodes:
+        g.add_node("setup_workspace",  setup_workspace_async)
+        g.add_node("clone_repository", clone_repository_async)
+    else:
+        g.add_node("setup_workspace",  setup_workspace)
+        g.add_node("clone_repository", clone_repository)
+    g.add_node("resolve_entities", resolve_entities_node)
     g.add_node("scan_py_files",    scan_py_files_node)
+    g.add_node("index_symbols",    index_symbols_node)
+    g.add_node("rank_chunks",      rank_chunks_node)
     g.add_node("locate_code",      locate_code_node)
 
     g.add_edge(START,              "setup_workspace")
     g.add_edge("setup_workspace",  "clone_repository")
-    g.add_edge("clone_repository", "scan_py_files")
-    g.add_edge("scan_py_files",    "locate_code")
+    g.add_edge("clone_repository", "resolve_entities")
+    g.add_conditional_edges("resolve_entities", route_after_resolve,
+                            ["index_symbols", "scan_py_files"])
+    g.add_edge("scan_py_files",    "index_symbols")
+    g.add_edge("index_symbols",    "rank_chunks")
+    g.add_edge("rank_chunks",      "locate_code")
     g.add_edge("locate_code",      END)
 
     return g
 
 def run_locator(issue: StructuredIssue,
                 repo_url: str,
-                context: Optional[dict] = None) -> LocatorResult:
+                context: Optional[dict] = None,
+                commit: Optional[str] = None) -> LocatorResult:
     """
     Execute the locator pipeline end-to-end.
     Returns a LocatorResult containing:
       - locations: List[Location]
       - explanation: str
       - context: same dict you passed in
+    `commit` pins the checkout; by default the remote HEAD is used.
     """
     logger.info("🚀 Running locator for issue #%s", issue.id)
-    graph = build_locator_graph().compile()
+    graph = get_compiled("locator")
 
+    # Invoke the graph
+    final_state = graph.invoke(_initial_state(issue, repo_url, context, commit))
+    return _to_result(final_state, context)
+
+async def arun_locator(issue: StructuredIssue,
+                       repo_url: str,
+                       context: Optional[dict] = None,
+                       commit: Optional[str] = None) -> LocatorResult:
+    """
+    Async variant of run_locator(): VM workspace nodes run as coroutines,
+    so several issues can be located concurrently from one event loop.
+    """
+    logger.info("🚀 Running locator (async) for issue #%s", issue.id)
+    graph = get_compiled("locator_async")
+    final_state = await graph.ainvoke(_initial_state(issue, repo_url, context, commit))
+    return _to_result(final_state, context)
+
+def _initial_state(issue: StructuredIssue,
+                   repo_url: str,
+                   context: Optional[dict],
+                   commit: Optional[str] = None) -> dict:
     # Prepare initial state
     init = {
         "issue":    issue,
@@ -88,9 +249,11 @@ def run_locator(issue: StructuredIssue,
     }
     if context:
         init["context"] = context
+    if commit:
+        init["commit"] = commit
+    return init
 
-    # Invoke the graph
-    final_state = graph.invoke(init)
+def _to_result(final_state: dict, context: Optional[dict]) -> LocatorResult:
     logger.info("✅ Locator final state: %s", {
         "locations": final_state["locations"],
         "explanation": final_state["explanation"]
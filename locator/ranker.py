@@ -0,0 +1,237 @@
+# locator/ranker.py
+
+import keyword
+import re
+import threading
+from functools import lru_cache
+from itertools import chain
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from locator.schema import FileContent
+from locator.symbol_index import SymbolIndex
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z]|\d|$)|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_STOPWORDS = set(keyword.kwlist) | {
+    "self", "cls", "none", "true", "false", "the", "a", "an", "to", "of", "in",
+    "is", "it", "be", "on", "and", "or", "for", "with", "this", "that", "args", "kwargs",
+}
+
+
+def split_identifier(word: str) -> List[str]:
+    """
+    'getHTTPResponse_code' -> ['gethttpresponse_code', 'get', 'http', 'response', 'code'].
+    The whole identifier is kept alongside its camelCase / snake_case parts.
+    """
+    parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+    whole = word.lower()
+    return [whole] + [p for p in parts if p != whole]
+
+
+@lru_cache(maxsize=1 << 17)
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    # identifiers repeat a lot in code, so splitting is memoized per word
+    return tuple(t for t in split_identifier(word) if len(t) > 1 and t not in _STOPWORDS)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Code-aware tokenizer: identifiers plus their sub-words, lowercased,
+    without Python keywords and very common words.
+    """
+    tokens: List[str] = []
+    for word in _WORD.findall(text):
+        tokens.extend(_word_tokens(word))
+    return tokens
+
+
+@dataclass
+class Chunk:
+    """
+    A function-level slice of a file: one top-level function or method, or a
+    run of module/class-level lines outside any function ("<module>").
+    """
+    path: str
+    name: str          # qualname, or "<module>"
+    kind: str          # "function" | "method" | "module"
+    start: int         # first line, 1-based
+    end: int           # last line, inclusive
+    text: str          # raw source of lines start..end
+    score: float = 0.0
+
+
+def chunk_file(f: FileContent, index: SymbolIndex) -> List[Chunk]:
+    """
+    Split a file into chunks using the symbol index's definitions.
+    Nested functions stay inside their enclosing function's chunk.
+    """
+    lines = f.lines()
+    info = index.files.get(f.path)
+    defs = sorted(
+        (s for s in (info.symbols if info else []) if s.kind in ("function", "method")),
+        key=lambda s: (s.start, -s.end),
+    )
+    outer = []
+    for sym in defs:
+        if outer and sym.start <= outer[-1].end:
+            continue  # nested in the previous definition
+        outer.append(sym)
+
+    chunks: List[Chunk] = []
+    cursor = 1
+    def module_run(start: int, end: int) -> None:
+        text = "\n".join(lines[start - 1:end])
+        if text.strip():
+            chunks.append(Chunk(f.path, "<module>", "module", start, end, text))
+
+    for sym in outer:
+        if sym.start > cursor:
+            module_run(cursor, sym.start - 1)
+        end = min(sym.end, len(lines))
+        chunks.append(Chunk(f.path, sym.qualname, sym.kind, sym.start, end,
+                            "\n".join(lines[sym.start - 1:end])))
+        cursor = end + 1
+    if cursor <= len(lines):
+        module_run(cursor, len(lines))
+    return chunks
+
+
+class Vocabulary:
+    """
+    Token -> term id mapping shared by all BM25 indexes in the process, so
+    term ids computed for a file stay valid when the index is rebuilt.
+    """
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self._word_ids: Dict[str, Tuple[int, ...]] = {}   # identifier -> its term ids
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> np.ndarray:
+        """
+        Term ids of every token in `text`, in order.
+        """
+        words = _WORD.findall(text)
+        word_ids = self._word_ids
+        missing = set(words).difference(word_ids)
+        if missing:
+            with self._lock:
+                for word in missing:
+                    word_ids[word] = tuple(self.ids.setdefault(t, len(self.ids))
+                                           for t in _word_tokens(word))
+        return np.fromiter(chain.from_iterable(map(word_ids.__getitem__, words)),
+                           dtype=np.int32)
+
+    def lookup(self, text: str) -> List[int]:
+        """
+        Term ids of the tokens in `text` that are already known (for queries).
+        """
+        return [self.ids[t] for t in tokenize(text) if t in self.ids]
+
+
+_vocabulary = Vocabulary()
+
+def chunk_terms(chunk: Chunk) -> np.ndarray:
+    """
+    Term ids of a chunk. The path and name are part of the document, so
+    file/function names mentioned in the issue match even when the body does not.
+    """
+    return _vocabulary.encode(f"{chunk.path} {chunk.name} {chunk.text}")
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of chunks, stored as term-sorted postings
+    arrays (CSC-style: indptr per term, doc ids, precomputed weights), so
+    scoring a query is one gather plus one np.bincount.
+    """
+    def __init__(self, chunks: Sequence[Chunk], terms: Optional[Sequence[np.ndarray]] = None,
+                 k1: float = 1.2, b: float = 0.75):
+        self.chunks = list(chunks)
+        if terms is None:
+            terms = [chunk_terms(c) for c in self.chunks]
+        n_docs = max(len(self.chunks), 1)
+        n_terms = len(_vocabulary.ids)
+        lengths = np.fromiter((len(t) for t in terms), dtype=np.int64, count=len(terms))
+
+        doc_ids = np.repeat(np.arange(len(terms), dtype=np.int64), lengths)
+        flat = np.concatenate(terms).astype(np.int64) if len(terms) else np.zeros(0, np.int64)
+        uniq, tf = np.unique(flat * n_docs + doc_ids, return_counts=True)  # sorted by (term, doc)
+        term_of = uniq // n_docs
+        self.doc_ids = (uniq % n_docs).astype(np.int32)
+        self.indptr = np.searchsorted(term_of, np.arange(n_terms + 1))
+
+        df = np.diff(self.indptr).astype(np.float32)
+        idf = np.log1p((len(self.chunks) - df + 0.5) / (df + 0.5))
+        avgdl = float(lengths.mean()) if len(terms) else 1.0
+        tf = tf.astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[self.doc_ids] / max(avgdl, 1e-9))
+        self.weights = (idf[term_of] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        BM25 score of every chunk for `query` (float32 array, one per chunk).
+        """
+        # terms added to the vocabulary after this index was built match nothing
+        q_ids = [i for i in _vocabulary.lookup(query) if i < len(self.indptr) - 1]
+        if not q_ids:
+            return np.zeros(len(self.chunks), dtype=np.float32)
+        ids, counts = np.unique(np.asarray(q_ids), return_counts=True)
+        starts, ends = self.indptr[ids], self.indptr[ids + 1]
+        sizes = ends - starts
+        # concatenated posting positions of all query terms, without a Python loop
+        offsets = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+        qtf = np.repeat(counts, sizes).astype(np.float32)
+        return np.bincount(self.doc_ids[offsets],
+                           weights=self.weights[offsets] * qtf,
+                           minlength=len(self.chunks)).astype(np.float32)
+
+    def top_k(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Indices and scores of the k best chunks with a positive score, best first.
+        """
+        scores = self.score(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(int(i), float(scores[i])) for i in idx if scores[i] > 0]
+
+
+# per repo: the files the index was built from, and the index
+_bm25_cache: Dict[str, Tuple[FrozenSet[Tuple[str, str]], BM25Index]] = {}
+# per (path, blob sha): the file's chunks and their term ids
+_file_chunks: Dict[Tuple[str, str], Tuple[List[Chunk], List[np.ndarray]]] = {}
+
+def get_bm25_index(key: str, files: List[FileContent], index: SymbolIndex) -> BM25Index:
+    """
+    BM25 index over all chunks of `files`. The index is reused while no file
+    changed; otherwise only changed files are re-chunked and re-tokenized
+    before the (vectorized) postings are rebuilt.
+    """
+    file_keys = [(f.path, f.sha or str(hash(f.raw))) for f in files]
+    signature = frozenset(file_keys)
+    cached = _bm25_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    chunks: List[Chunk] = []
+    terms: List[np.ndarray] = []
+    for f, fkey in zip(files, file_keys):
+        entry = _file_chunks.get(fkey)
+        if entry is None:
+            file_chunks = chunk_file(f, index)
+            entry = _file_chunks[fkey] = (file_chunks, [chunk_terms(c) for c in file_chunks])
+        chunks.extend(entry[0])
+        terms.extend(entry[1])
+    bm25 = BM25Index(chunks, terms)
+    _bm25_cache[key] = (signature, bm25)
+    if cached:
+        # forget files no cached index refers to any more
+        live = frozenset().union(*(sig for sig, _ in _bm25_cache.values()))
+        for stale in cached[0] - live:
+            _file_chunks.pop(stale, None)
+    return bm25
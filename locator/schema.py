@@ -1,15 +1,135 @@
 # locator/schema.py
 
+from array import array
 from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
 
-@dataclass
+import numpy as np
+
+
+def _strip_numbering(numbered: str) -> str:
+    """
+    Raw source from `nl -ba` style text. Lines are split on "\n" only:
+    str.splitlines() also breaks on \x0c, \x1c, \u2028 etc., which would
+    lose text and shift every later line number.
+    """
+    lines = numbered.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return "".join((line.split("\t", 1)[1] if "\t" in line else "") + "\n" for line in lines)
+
+
 class FileContent:
     """
-    Represents the full text of a Python source file, with line numbers.
+    A Python source file held compactly: the raw bytes plus an array('I') of
+    line start offsets. `nl -ba` style numbering ('     1\tcode') is rendered
+    lazily, for the whole file (`content`) or just a line range (`render`),
+    so slicing a range costs O(range) and nothing numbered is kept around.
+
+    FileContent(path, content=...) still works for already rendered text
+    (e.g. a packed prompt excerpt); that text is kept verbatim.
     """
-    path: str         # path within the workspace, e.g. "swe_agent/app.py"
-    content: str      # full file content, each line prefixed with its line number
+    __slots__ = ("path", "sha", "_raw", "_offsets", "_view")
+
+    def __init__(self, path: str, content: Optional[str] = None,
+                 sha: Optional[str] = None, raw: Optional[bytes] = None):
+        self.path = path        # path within the workspace, e.g. "swe_agent/app.py"
+        self.sha = sha          # git blob SHA of the raw content, when known
+        self._view = content if raw is None else None
+        self._raw = raw if raw is not None else b""
+        self._offsets: Optional[array] = None
+
+    @classmethod
+    def from_numbered(cls, path: str, numbered: str, sha: Optional[str] = None) -> "FileContent":
+        """
+        Build from `nl -ba` output, keeping only the raw source.
+        """
+        return cls(path, sha=sha, raw=_strip_numbering(numbered).encode("utf-8"))
+
+    # ─── raw access ─────────────────────────────────────────────────────────
+
+    @property
+    def raw(self) -> bytes:
+        if self._view is not None:
+            return self.text.encode("utf-8")
+        return self._raw
+
+    @property
+    def text(self) -> str:
+        """
+        The raw source (numbering stripped from rendered views).
+        """
+        if self._view is not None:
+            return _strip_numbering(self._view)
+        return self._raw.decode("utf-8", errors="replace")
+
+    def _index(self) -> array:
+        if self._offsets is None:
+            raw = self._raw
+            offsets = array("I", [0])
+            ends = np.flatnonzero(np.frombuffer(raw, dtype=np.uint8) == 0x0A) + 1
+            offsets.frombytes(ends.astype(np.uint32).tobytes())
+            if raw and not raw.endswith(b"\n"):
+                offsets.append(len(raw))
+            self._offsets = offsets
+        return self._offsets
+
+    @property
+    def line_count(self) -> int:
+        if self._view is not None:
+            return self._view.count("\n")
+        return len(self._index()) - 1
+
+    def lines(self, start: int = 1, end: Optional[int] = None) -> List[str]:
+        """
+        Raw lines start..end (1-based, inclusive), without newlines.
+        """
+        if self._view is not None:
+            return self.text.split("\n")[start - 1:end]
+        offsets = self._index()
+        last = len(offsets) - 1
+        end = last if end is None else min(end, last)
+        if start < 1 or start > end:
+            return []
+        chunk = self._raw[offsets[start - 1]:offsets[end]].decode("utf-8", errors="replace")
+        out = chunk.split("\n")
+        if chunk.endswith("\n"):
+            out.pop()
+        return out
+
+    def render(self, start: int = 1, end: Optional[int] = None) -> str:
+        """
+        Lines start..end numbered exactly like `nl -ba`.
+        """
+        return "".join(f"{n:6d}\t{line}\n" for n, line in enumerate(self.lines(start, end), start))
+
+    @property
+    def content(self) -> str:
+        """
+        The whole file, numbered (rendered on every access; not cached).
+        """
+        if self._view is not None:
+            return self._view
+        return self.render()
+
+    def __len__(self) -> int:
+        return len(self._raw) if self._view is None else len(self._view)
+
+    def __bool__(self) -> bool:
+        # an empty file (e.g. __init__.py) is still a file
+        return True
+
+    def __eq__(self, other) -> bool:
+        # compare the stored bytes / view, never the rendered text
+        return (isinstance(other, FileContent) and self.path == other.path
+                and self.sha == other.sha and self._raw == other._raw
+                and self._view == other._view)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        # never dump file contents into logs / LangGraph state traces
+        return f"FileContent(path={self.path!r}, lines={self.line_count}, bytes={len(self)}, sha={self.sha!r})"
 
 @dataclass
 class Location:
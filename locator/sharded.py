@@ -0,0 +1,138 @@
+# locator/sharded.py
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from locator.schema import Location, LocatorResult
+from locator.ranker import Chunk
+from locator.context_packer import LOCATOR_TOKEN_BUDGET, estimate_tokens
+from locator.llm_location_predictor import build_prompt, call_llm, parse_response
+
+logger = logging.getLogger(__name__)
+
+# LLM calls in flight at once across shards
+LOCATOR_SHARD_CONCURRENCY = int(os.getenv("LOCATOR_SHARD_CONCURRENCY", "4"))
+# hard cap on shards per issue (lowest-ranked code beyond it is not sent)
+LOCATOR_MAX_SHARDS = int(os.getenv("LOCATOR_MAX_SHARDS", "16"))
+# locations kept after the merge
+LOCATOR_TOP_LOCATIONS = int(os.getenv("LOCATOR_TOP_LOCATIONS", "5"))
+
+
+def chunk_tokens(chunk: Chunk) -> int:
+    # numbered lines are ~8 characters longer than the raw source
+    return estimate_tokens(chunk.text) + 2 * (chunk.end - chunk.start + 1)
+
+
+def total_tokens(chunks: List[Chunk]) -> int:
+    return sum(chunk_tokens(c) for c in chunks)
+
+
+def make_shards(chunks: List[Chunk], budget: int = LOCATOR_TOKEN_BUDGET,
+                max_shards: int = LOCATOR_MAX_SHARDS) -> List[List[Chunk]]:
+    """
+    Partition ranked chunks into shards of at most ~`budget` tokens.
+
+    A file's chunks stay together when the file fits in one shard; files
+    are placed in order of their best-ranked chunk, first-fit, so the most
+    relevant code lands in the first shards. Larger files are split at
+    chunk boundaries. Deterministic for a given input.
+    """
+    by_file: Dict[str, List[Chunk]] = {}
+    for c in chunks:
+        by_file.setdefault(c.path, []).append(c)
+
+    shards: List[List[Chunk]] = []
+    sizes: List[int] = []
+
+    def place(group: List[Chunk], size: int) -> None:
+        for i, used in enumerate(sizes):
+            if used + size <= budget:
+                shards[i].extend(group)
+                sizes[i] += size
+                return
+        shards.append(list(group))
+        sizes.append(size)
+
+    for path, group in by_file.items():
+        size = total_tokens(group)
+        if size <= budget:
+            place(group, size)
+            continue
+        for c in group:
+            place([c], chunk_tokens(c))  # oversized chunks are collapsed by the packer
+    if len(shards) > max_shards:
+        logger.info("[sharded] %d shards capped to %d", len(shards), max_shards)
+        shards = shards[:max_shards]
+    return shards
+
+
+def _locate_shard(index: int, shard: List[Chunk], summary: str, context: Optional[dict],
+                  symbols: Optional[List[dict]], budget: int
+                  ) -> Tuple[List[Tuple[Location, float]], str]:
+    started = time.perf_counter()
+    paths = {c.path for c in shard}
+    shard_symbols = [s for s in symbols or [] if s["file"] in paths]
+    prompt = build_prompt(summary, shard, context=context, symbols=shard_symbols,
+                          token_budget=budget, scored=True)
+    text = call_llm(prompt)
+    locs, explanation = parse_response(text)
+    # a shard may only point into its own files
+    locs = [(loc, score) for loc, score in locs if loc.file in paths]
+    logger.info("[sharded] shard %d: %d files, %d candidates in %.2fs",
+                index, len(paths), len(locs), time.perf_counter() - started)
+    return locs, explanation
+
+
+def merge_locations(results: List[Tuple[List[Tuple[Location, float]], str]],
+                    top_n: int = LOCATOR_TOP_LOCATIONS) -> Tuple[List[Location], str]:
+    """
+    Deterministic reduce: dedupe by (file, function, line), keep the best
+    score, order by score then shard and position, and take the top `top_n`.
+    The explanation is the one from the shard of the best location.
+    """
+    best: Dict[Tuple, Tuple[float, int, int, Location]] = {}
+    for shard_no, (locs, _) in enumerate(results):
+        for pos, (loc, score) in enumerate(locs):
+            key = (loc.file, loc.function, loc.line)
+            entry = (-score, shard_no, pos, loc)
+            if key not in best or entry[:3] < best[key][:3]:
+                best[key] = entry
+    ranked = sorted(best.values(), key=lambda e: e[:3])[:top_n]
+    explanation = results[ranked[0][1]][1] if ranked else ""
+    return [e[3] for e in ranked], explanation
+
+
+def locate_sharded(summary: str,
+                   chunks: List[Chunk],
+                   context: Optional[dict] = None,
+                   symbols: Optional[List[dict]] = None,
+                   token_budget: int = LOCATOR_TOKEN_BUDGET,
+                   max_workers: int = LOCATOR_SHARD_CONCURRENCY) -> LocatorResult:
+    """
+    Map-reduce localization: split `chunks` into budget-sized shards, query
+    every shard concurrently (at most `max_workers` calls in flight) for
+    scored candidates, then merge them deterministically. A failed shard is
+    logged and skipped. Returns the same LocatorResult shape as locate_with_llm().
+    """
+    shards = make_shards(chunks, token_budget)
+    print(f"🧩 Locating across {len(shards)} shard(s), {max_workers} in parallel")
+    started = time.perf_counter()
+
+    def run(args):
+        index, shard = args
+        try:
+            return _locate_shard(index, shard, summary, context, symbols, token_budget)
+        except Exception as e:
+            logger.warning("[sharded] shard %d failed: %s", index, e)
+            return [], ""
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(run, enumerate(shards)))   # keeps shard order
+
+    locations, explanation = merge_locations(results)
+    logger.info("[sharded] %d shards in %.2fs -> %s",
+                len(shards), time.perf_counter() - started, locations)
+    return LocatorResult(locations=locations, explanation=explanation, context=context)
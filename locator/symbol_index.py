@@ -0,0 +1,279 @@
+# locator/symbol_index.py
+
+import ast
+import builtins
+import hashlib
+import json
+import keyword
+import os
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional
+
+from locator.schema import FileContent
+from locator.file_cache import git_blob_sha
+
+SYMBOL_INDEX_DIR = os.getenv("SYMBOL_INDEX_DIR", os.path.expanduser("~/.cache/swe_agent/symbols"))
+
+# identifiers too generic to be useful as hints when found in free text
+_IGNORED_WORDS = set(keyword.kwlist) | set(dir(builtins)) | {
+    "self", "cls", "the", "and", "for", "when", "with", "this", "that", "from",
+}
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+
+@dataclass
+class Symbol:
+    """
+    A module, class, function or method definition.
+    """
+    name: str        # short name, e.g. "post_detail"
+    qualname: str    # dotted name inside the module, e.g. "PostView.get"
+    kind: str        # "module" | "class" | "function" | "method"
+    path: str        # workspace path, e.g. "swe_agent/app.py"
+    start: int       # first line (1-based, decorators included)
+    end: int         # last line (inclusive)
+
+
+@dataclass
+class FileSymbols:
+    """
+    Everything the index knows about one file.
+    """
+    path: str
+    sha: str
+    module: str
+    symbols: List[Symbol] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)              # absolute module names
+    calls: Dict[str, List[int]] = field(default_factory=dict)     # called name -> lines
+    attributes: List[str] = field(default_factory=list)           # attribute names accessed
+    error: Optional[str] = None                                   # set if the file failed to parse
+
+
+def module_name(path: str, root: str = "") -> str:
+    """
+    'swe_agent/pkg/mod.py' with root 'swe_agent' -> 'pkg.mod' ('__init__' dropped).
+    """
+    rel = path[len(root) + 1:] if root and path.startswith(root + "/") else path
+    rel = rel[:-3] if rel.endswith(".py") else rel
+    parts = [p for p in rel.split("/") if p]
+    if parts and parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+class _Visitor(ast.NodeVisitor):
+    def __init__(self, info: FileSymbols, is_package: bool):
+        self.info = info
+        self.is_package = is_package
+        self.stack: List[ast.AST] = []
+
+    def _define(self, node, kind: str) -> None:
+        names = [n.name for n in self.stack if isinstance(n, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))]
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        self.info.symbols.append(Symbol(
+            name=node.name,
+            qualname=".".join(names + [node.name]),
+            kind=kind,
+            path=self.info.path,
+            start=start,
+            end=getattr(node, "end_lineno", node.lineno),
+        ))
+
+    def _visit_scope(self, node, kind: str) -> None:
+        self._define(node, kind)
+        self.stack.append(node)
+        self.generic_visit(node)
+        self.stack.pop()
+
+    def visit_ClassDef(self, node):
+        self._visit_scope(node, "class")
+
+    def visit_FunctionDef(self, node):
+        parent = self.stack[-1] if self.stack else None
+        self._visit_scope(node, "method" if isinstance(parent, ast.ClassDef) else "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node):
+        self.info.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node):
+        base = node.module or ""
+        if node.level:
+            # resolve relative imports against this module's package
+            package = self.info.module.split(".")
+            if not self.is_package:
+                package = package[:-1]
+            package = package[:len(package) - (node.level - 1)] if node.level > 1 else package
+            base = ".".join(p for p in package + ([base] if base else []) if p)
+        self.info.imports.append(base)
+        # `from pkg import mod` may name a submodule
+        self.info.imports.extend(f"{base}.{alias.name}" for alias in node.names if alias.name != "*")
+
+    def visit_Call(self, node):
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+        if name:
+            self.info.calls.setdefault(name, []).append(node.lineno)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        self.info.attributes.append(node.attr)
+        self.generic_visit(node)
+
+
+def parse_file(path: str, source: str, sha: str, root: str = "") -> FileSymbols:
+    """
+    Parse one file into its FileSymbols. Syntax errors yield an entry with
+    only the module symbol and `error` set.
+    """
+    n_lines = source.count("\n") + (0 if source.endswith("\n") or not source else 1)
+    info = FileSymbols(path=path, sha=sha, module=module_name(path, root))
+    info.symbols.append(Symbol(
+        name=info.module.rsplit(".", 1)[-1] or path, qualname=info.module,
+        kind="module", path=path, start=1, end=max(n_lines, 1),
+    ))
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError) as e:
+        info.error = str(e)
+        return info
+    _Visitor(info, is_package=path.endswith("__init__.py")).visit(tree)
+    info.imports = sorted(set(info.imports))
+    info.attributes = sorted(set(info.attributes))
+    return info
+
+
+class SymbolIndex:
+    """
+    Symbol table of a scanned repository, updated incrementally per file
+    hash and persistable as JSON.
+
+    lookup() resolves 'function', 'Class.method' or 'module.function' names
+    to definitions with exact line ranges; match_text() does the same for
+    every identifier mentioned in free text (e.g. an issue summary).
+    """
+    def __init__(self, root: str = ""):
+        self.root = root
+        self.files: Dict[str, FileSymbols] = {}
+        self._by_name: Dict[str, List[Symbol]] = {}
+
+    # ─── building ───────────────────────────────────────────────────────────
+
+    def _rebuild_lookup(self) -> None:
+        by_name: Dict[str, List[Symbol]] = {}
+        for info in self.files.values():
+            for sym in info.symbols:
+                keys = {sym.name, sym.qualname}
+                if sym.kind != "module":
+                    keys.add(f"{info.module}.{sym.qualname}")
+                for key in keys:
+                    by_name.setdefault(key, []).append(sym)
+        self._by_name = by_name
+
+    def update(self, files: Iterable[FileContent], prune: bool = True) -> int:
+        """
+        Bring the index in line with the scanned files: reparse files whose
+        hash changed, drop files that disappeared (unless prune=False, for a
+        partial set of files). Returns how many were parsed.
+        """
+        seen = set()
+        parsed = 0
+        for f in files:
+            seen.add(f.path)
+            sha = f.sha or git_blob_sha(f.raw)
+            known = self.files.get(f.path)
+            if known is not None and known.sha == sha:
+                continue
+            self.files[f.path] = parse_file(f.path, f.text, sha, self.root)
+            parsed += 1
+        for path in list(self.files):
+            if prune and path not in seen:
+                del self.files[path]
+        self._rebuild_lookup()
+        return parsed
+
+    # ─── queries ────────────────────────────────────────────────────────────
+
+    def lookup(self, name: str, path: Optional[str] = None) -> List[Symbol]:
+        """
+        Definitions named `name` (short, qualified or module-qualified),
+        optionally restricted to files whose path ends with `path`.
+        """
+        hits = self._by_name.get(name, [])
+        if path:
+            hits = [s for s in hits if s.path == path or s.path.endswith("/" + path.lstrip("./"))]
+        return list(hits)
+
+    def module_file(self, module: str) -> Optional[str]:
+        """
+        Path of the file defining `module`, if it is part of the repo.
+        """
+        for info in self.files.values():
+            if info.module == module:
+                return info.path
+        return None
+
+    def match_text(self, text: str, limit: int = 20) -> List[Symbol]:
+        """
+        Definitions for identifiers mentioned in `text`, in order of appearance.
+        """
+        found: List[Symbol] = []
+        seen = set()
+        for word in _IDENTIFIER.findall(text or ""):
+            candidates = [word] + ([word.rsplit(".", 1)[-1]] if "." in word else [])
+            for cand in candidates:
+                if len(cand) < 3 or cand in _IGNORED_WORDS:
+                    continue
+                for sym in self._by_name.get(cand, []):
+                    key = (sym.path, sym.qualname)
+                    if key not in seen and sym.kind != "module":
+                        seen.add(key)
+                        found.append(sym)
+                if found and len(found) >= limit:
+                    return found
+        return found
+
+    # ─── persistence ────────────────────────────────────────────────────────
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"root": self.root, "files": [asdict(i) for i in self.files.values()]}, fh)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolIndex":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        index = cls(root=data.get("root", ""))
+        for raw in data.get("files", []):
+            raw["symbols"] = [Symbol(**s) for s in raw.get("symbols", [])]
+            info = FileSymbols(**raw)
+            index.files[info.path] = info
+        index._rebuild_lookup()
+        return index
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+
+def index_path(repo_url: str) -> str:
+    key = hashlib.sha1(repo_url.encode()).hexdigest()[:16]
+    return os.path.join(SYMBOL_INDEX_DIR, f"{key}.json")
+
+def get_symbol_index(repo_url: str, root: str) -> SymbolIndex:
+    """
+    The index for `repo_url`, kept in memory per process and loaded from
+    SYMBOL_INDEX_DIR on first use.
+    """
+    index = _indexes.get(repo_url)
+    if index is None:
+        try:
+            index = SymbolIndex.load(index_path(repo_url))
+        except (OSError, ValueError, TypeError):
+            index = SymbolIndex(root=root)
+        index.root = root
+        _indexes[repo_url] = index
+    return index
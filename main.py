@@ -10,7 +10,78 @@ from intake.pipeline import run_intake
 from locator.pipeline import run_locator
 from locator.schema import LocatorResult
 from patcher.pipeline import run_patcher
-from vm_executor.vm_manager import initialize_vm, cleanup_vm
+from vm_executor.vm_manager import initialize_vm, cleanup_vm, round_trip_count, lease_vm, get_vm
+from vm_executor.http_session import pool_stats
+from graph_registry import warmup
+from llm.gateway import stats as llm_stats
+from llm.rate_limiter import get_limiter
+from cassette import get_cassette
+
+
+def process_issue(issue, repo_url: str) -> None:
+    """
+    Locator and patcher (with retries) for one structured issue, on a box
+    leased from the pre-warmed pool.
+    """
+    with lease_vm():
+        print("\n🔍 Intake →", issue)
+        trips_before = round_trip_count()
+
+        locator_res: LocatorResult = run_locator(
+            issue=issue,
+            repo_url=repo_url
+        )
+        print("🗺️ Locator →")
+        for loc in locator_res.locations:
+            print("   ", loc)
+        print("   explanation:", locator_res.explanation)
+
+        max_retries = 3
+        retry_context = None
+        final_patch_state = None
+
+        for attempt in range(max_retries):
+            print(f"\n🏗️ Patcher Attempt {attempt + 1}/{max_retries}...")
+
+            workdir = "swe_agent"
+            patch_state = run_patcher(
+                issue=issue,
+                locator_res=locator_res,
+                workdir=workdir,
+                context=retry_context  # Pass context from previous failure
+            )
+
+            if patch_state.get("applied_ok"):
+                print("✅ Patch applied successfully!")
+                final_patch_state = patch_state
+                break  # Exit the loop on success
+            else:
+                print("❌ Patch application failed. Preparing for retry...")
+                # Build context for the next attempt
+                retry_context = {
+                    "previous_attempt": {
+                        "failed_patch": patch_state.get("patch", ""),
+                        "stderr": patch_state.get("stderr", ""),
+                        "stdout": patch_state.get("stdout", ""),
+                    },
+                    "hint": "The previous patch failed to apply. The error is provided in 'stderr'. Please analyze the error and the original patch to generate a new, corrected patch that fixes the underlying issue."
+                }
+                final_patch_state = patch_state  # Store the last failed state
+
+        # After the loop, print the final status
+        print("\n🏁 Patcher Final Status →")
+        if final_patch_state and final_patch_state.get("applied_ok"):
+            print("   branch     :", final_patch_state.get("branch"))
+            if final_patch_state.get("commit"):
+                print("   commit     :", final_patch_state.get("commit"))
+            print("   applied_ok :", True)
+        else:
+            print("   Failed to apply patch after all retries.")
+            print("   applied_ok :", False)
+            if final_patch_state:
+                print("   Last stderr:", final_patch_state.get("stderr"))
+        print("   VM round trips:", round_trip_count() - trips_before)
+        print("   VM peak command output (bytes):", get_vm().peak_output_bytes)
 
 
 def main():
@@ -21,6 +92,9 @@ def main():
     repo_url = f"https://github.com/{repo_spec}.git"
 
     initialize_vm()
+    # compile every pipeline graph once, while the VM pool warms up
+    compile_times = warmup()
+    print("🧱 Compiled graphs:", {name: f"{secs * 1000:.1f} ms" for name, secs in compile_times.items()})
 
     try:
         # --- 1. Intake stage ---
@@ -32,63 +106,18 @@ def main():
 
         # --- 2. Locator stage & 3. Patcher stage ---
         for issue in structured_issues:
-            print("\n🔍 Intake →", issue)
-
-            locator_res: LocatorResult = run_locator(
-                issue=issue,
-                repo_url=repo_url
-            )
-            print("🗺️ Locator →")
-            for loc in locator_res.locations:
-                print("   ", loc)
-            print("   explanation:", locator_res.explanation)
-
-            max_retries = 3
-            retry_context = None
-            final_patch_state = None
-
-            for attempt in range(max_retries):
-                print(f"\n🏗️ Patcher Attempt {attempt + 1}/{max_retries}...")
-
-                workdir = "swe_agent"
-                patch_state = run_patcher(
-                    issue=issue,
-                    locator_res=locator_res,
-                    workdir=workdir,
-                    context=retry_context  # Pass context from previous failure
-                )
-
-                if patch_state.get("applied_ok"):
-                    print("✅ Patch applied successfully!")
-                    final_patch_state = patch_state
-                    break  # Exit the loop on success
-                else:
-                    print("❌ Patch application failed. Preparing for retry...")
-                    # Build context for the next attempt
-                    retry_context = {
-                        "previous_attempt": {
-                            "failed_patch": patch_state.get("patch", ""),
-                            "stderr": patch_state.get("stderr", ""),
-                            "stdout": patch_state.get("stdout", ""),
-                        },
-                        "hint": "The previous patch failed to apply. The error is provided in 'stderr'. Please analyze the error and the original patch to generate a new, corrected patch that fixes the underlying issue."
-                    }
-                    final_patch_state = patch_state  # Store the last failed state
-
-            # After the loop, print the final status
-            print("\n🏁 Patcher Final Status →")
-            if final_patch_state and final_patch_state.get("applied_ok"):
-                print("   branch     :", final_patch_state.get("branch"))
-                print("   applied_ok :", True)
-            else:
-                print("   Failed to apply patch after all retries.")
-                print("   applied_ok :", False)
-                if final_patch_state:
-                    print("   Last stderr:", final_patch_state.get("stderr"))
+            # Each issue works on its own box leased from the pre-warmed pool
+            process_issue(issue, repo_url)
 
     finally:
         time.sleep(5000)
         cleanup_vm()
+        print("🧠 LLM gateway:", llm_stats())
+        print("🚦 LLM rate limiter:", get_limiter().stats())
+        print("🔌 gbox HTTP pool:", pool_stats())
+        if get_cassette():
+            print("📼 Cassette:", get_cassette().stats())
+            get_cassette().close()
 
 
 if __name__ == "__main__":
@@ -1,24 +1,25 @@
+import uuid
+
 from vm_executor.vm_manager import get_vm
 
 def apply_patch(diff: str, workdir: str) -> dict:
     """
     Apply the unified diff to the given workdir on the VM using the 'patch' command.
+    Writing the patch file, applying it and removing it is one batched request.
     Returns applied_ok, stdout, stderr.
     """
     vm = get_vm()
 
 
-    patch_file_path = "/tmp/agent.patch"
+    # unique per call, so patches for different worktrees can be applied concurrently
+    patch_file_path = f"/tmp/agent-{uuid.uuid4().hex}.patch"
     here_doc = f"""cat << 'EOF' > {patch_file_path}
 {diff}
 EOF"""
-    vm.run_command(here_doc)
-
     cmd = f"cd {workdir} && patch -p2 -u --forward < {patch_file_path}"
-    result = vm.run_command(cmd)
 
-    # Clean up the temporary patch file
-    vm.run_command(f"rm {patch_file_path}")
+    # Write, apply, then clean up the temporary patch file
+    _, result, _ = vm.run_batch([here_doc, cmd, f"rm {patch_file_path}"])
 
     return {
         "applied_ok": result.get("exitCode", 1) == 0,
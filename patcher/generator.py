@@ -1,28 +1,23 @@
-import os
 import json
-import openai
-from typing import List, Optional
+import threading
+from typing import Iterator, List, Optional
 from collections import OrderedDict
 
 from locator.schema import Location
+from llm.gateway import chat, chat_stream
+from patcher.stream_parser import DiffStreamParser, FileSection
 from vm_executor.vm_manager import get_vm, read_file_numbered
 
-# Load your OpenAI API key (ensure OPENAI_API_KEY is set)
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
-    raise RuntimeError("Please set the OPENAI_API_KEY environment variable")
 
-
-def generate_patch(
+def build_patch_prompt(
         summary: str,
         locations: List[Location],
         explanation: str,
         context: Optional[dict] = None
 ) -> str:
     """
-    Generate a clean, raw unified diff patch via the LLM.
+    The patch generation prompt: located files in full plus retry context.
     """
-    # (The first part of the function remains the same)
     unique_files = OrderedDict((loc.file, None) for loc in locations)
     vm = get_vm()
     code_sections = []
@@ -73,15 +68,29 @@ repository root. The before/after file paths in the diff header should be identi
     print("\n🗣️ Patch Generation Prompt:\n")
     print(prompt)
     print("\n—— End of prompt ——\n")
+    return prompt
+
+
+def generate_patch(
+        summary: str,
+        locations: List[Location],
+        explanation: str,
+        context: Optional[dict] = None
+) -> str:
+    """
+    Generate a clean, raw unified diff patch via the LLM.
+    """
+    prompt = build_patch_prompt(summary, locations, explanation, context)
 
-    response = openai.chat.completions.create(
+    # a retry (context set) wants a fresh sample, not the cached failed patch
+    raw_diff = chat(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You generate raw unified diff patches."},
             {"role": "user", "content": prompt},
         ],
+        bypass_cache=bool(context),
     )
-    raw_diff = response.choices[0].message.content
     print("\n🤖 DDEBUG: Raw LLM Response:\n", raw_diff)
 
     lines = raw_diff.splitlines()
@@ -107,4 +116,56 @@ repository root. The before/after file paths in the diff header should be identi
     print(cleaned_diff)
     print("\n—— End of cleaned diff ——\n")
 
-    return cleaned_diff
\ No newline at end of file
+    return cleaned_diff
+
+
+class PatchStream:
+    """
+    Streaming generate_patch(): iterating yields each file section of the
+    diff as soon as it is complete. The diff is parsed while it is
+    generated, and the request is dropped as soon as it is malformed or
+    touches a file outside `locations` (DiffFormatError is raised). Stopping
+    the iteration early and calling close() drops the request too, and so
+    does stop(), which may be called from another thread (e.g. when a
+    section failed to apply): iteration ends at the next delta.
+    `raw` holds the text received so far.
+    """
+    def __init__(
+            self,
+            summary: str,
+            locations: List[Location],
+            explanation: str,
+            context: Optional[dict] = None
+    ):
+        prompt = build_patch_prompt(summary, locations, explanation, context)
+        self.parser = DiffStreamParser(allowed=[loc.file for loc in locations])
+        self.raw = ""
+        self.stopped = threading.Event()
+        self._stream = chat_stream(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You generate raw unified diff patches."},
+                {"role": "user", "content": prompt},
+            ],
+            bypass_cache=bool(context),
+        )
+
+    def __iter__(self) -> Iterator[FileSection]:
+        try:
+            for delta in self._stream:
+                if self.stopped.is_set():
+                    return
+                self.raw += delta
+                yield from self.parser.feed(delta)
+                if self.parser.done:
+                    break
+            if not self.stopped.is_set():
+                yield from self.parser.finish()
+        finally:
+            self._stream.close()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def close(self) -> None:
+        self._stream.close()
@@ -1,25 +1,40 @@
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import TypedDict, Optional
 from langgraph.graph import StateGraph, START, END
 
 from intake.schema import StructuredIssue
 from locator.schema import LocatorResult
-from patcher.generator import generate_patch
+from patcher.generator import generate_patch, PatchStream
+from patcher.stream_parser import DiffFormatError
 from patcher.applier import apply_patch
-from vm_executor.git_manager import checkout_branch
+from vm_executor.git_manager import (
+    checkout_branch, add_worktree, commit_worktree, remove_worktree,
+)
+from graph_registry import get_compiled
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Patch each issue in its own git worktree (1) or in the shared workdir (0).
+PATCHER_WORKTREES = os.getenv("PATCHER_WORKTREES", "1") == "1"
+# Stream the patch and apply each file section as it completes (1), or
+# generate the whole diff and then apply it (0).
+PATCHER_STREAMING = os.getenv("PATCHER_STREAMING", "1") == "1"
+
 class PatcherState(TypedDict, total=False):
     issue: StructuredIssue
     locator_res: LocatorResult
     workdir: str
+    base_workdir: str           # shared clone the worktree was created from
     patch: str
     branch: str
     applied_ok: bool
     stdout: str
     stderr: str
+    commit: Optional[str]       # fix commit on the branch (worktree mode)
     ## Add a context field to the state so it can be passed to the generator.
     context: Optional[dict]
 
@@ -38,9 +53,15 @@ def generate_patch_node(state: PatcherState) -> dict:
 
 def create_branch_node(state: PatcherState) -> dict:
     branch = f"fix/issue-{state['issue'].id}"
-    checkout_branch(state["workdir"], branch)
-    logger.info("[create_branch] branch ready=%s", branch)
-    return {"branch": branch}
+    if not PATCHER_WORKTREES:
+        checkout_branch(state["workdir"], branch)
+        logger.info("[create_branch] branch ready=%s", branch)
+        return {"branch": branch}
+
+    # Work in a dedicated worktree so other issues can be patched concurrently
+    path = add_worktree(state["workdir"], branch)
+    logger.info("[create_branch] branch ready=%s, worktree=%s", branch, path)
+    return {"branch": branch, "workdir": path, "base_workdir": state["workdir"]}
 
 def apply_patch_node(state: PatcherState) -> dict:
     res = apply_patch(
@@ -56,17 +77,103 @@ def apply_patch_node(state: PatcherState) -> dict:
         "stderr": res["stderr"]
     }
 
-def build_patcher_graph() -> StateGraph:
-    # The graph structure itself does not need to change.
+def stream_patch_node(state: PatcherState) -> dict:
+    """
+    Generate and apply in one step: file sections are applied (in order, on
+    a background thread) while the rest of the diff is still streaming.
+    Stops the generation on a malformed diff or once a section fails to apply.
+    """
+    started = time.perf_counter()
+    stream = PatchStream(
+        summary=state["issue"].summary,
+        locations=state["locator_res"].locations,
+        explanation=state["locator_res"].explanation,
+        context=state.get("context")
+    )
+    error = None
+    first_section = None
+    futures = []
+
+    def apply(section) -> dict:
+        # a failure (or an error raised by apply_patch) stops the generation
+        try:
+            result = apply_patch(section.text, state["workdir"])
+        except Exception as e:
+            logger.error("[stream_patch] applying %s raised: %s", section.path, e)
+            result = {"applied_ok": False, "stdout": "", "stderr": f"{type(e).__name__}: {e}"}
+        if not result["applied_ok"]:
+            stream.stop()
+        return result
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        try:
+            for section in stream:
+                if first_section is None:
+                    first_section = time.perf_counter() - started
+                if stream.stopped.is_set():
+                    break
+                logger.info("[stream_patch] section %s (%d hunks)", section.path, section.hunks)
+                futures.append(pool.submit(apply, section))
+        except DiffFormatError as e:
+            error = str(e)
+            logger.error("[stream_patch] aborted generation: %s", e)
+        finally:
+            stream.close()
+    results = [f.result() for f in futures]
+
+    applied_ok = error is None and bool(results) and all(r["applied_ok"] for r in results)
+    stderr = "\n".join(r["stderr"] for r in results if r["stderr"])
+    if error:
+        stderr = (stderr + "\n" if stderr else "") + f"Malformed patch: {error}"
+    logger.info("[stream_patch] applied_ok=%s, %d sections, first after %s, total %.2fs",
+                applied_ok, len(results),
+                f"{first_section:.2f}s" if first_section is not None else "-",
+                time.perf_counter() - started)
+    return {
+        "patch": stream.raw,
+        "applied_ok": applied_ok,
+        "stdout": "\n".join(r["stdout"] for r in results if r["stdout"]),
+        "stderr": stderr,
+    }
+
+def cleanup_worktree_node(state: PatcherState) -> dict:
+    """
+    Commit a successfully applied patch onto the branch, then remove the
+    worktree. No-op when the patch was applied in the shared workdir.
+    """
+    base = state.get("base_workdir")
+    if not base:
+        return {}
+    commit = None
+    if state.get("applied_ok"):
+        commit = commit_worktree(state["workdir"], f"Fix issue #{state['issue'].id}")
+    remove_worktree(base, state["workdir"])
+    logger.info("[cleanup_worktree] removed=%s, commit=%s", state["workdir"], commit)
+    return {"commit": commit, "workdir": base}
+
+def build_patcher_graph(streaming: bool = False) -> StateGraph:
     g = StateGraph(PatcherState)
+    if streaming:
+        # the worktree must exist before the first section arrives
+        g.add_node("create_branch", create_branch_node)
+        g.add_node("stream_patch", stream_patch_node)
+        g.add_node("cleanup_worktree", cleanup_worktree_node)
+        g.add_edge(START, "create_branch")
+        g.add_edge("create_branch", "stream_patch")
+        g.add_edge("stream_patch", "cleanup_worktree")
+        g.add_edge("cleanup_worktree", END)
+        return g
+
     g.add_node("generate_patch", generate_patch_node)
     g.add_node("create_branch", create_branch_node)
     g.add_node("apply_patch", apply_patch_node)
+    g.add_node("cleanup_worktree", cleanup_worktree_node)
 
     g.add_edge(START, "generate_patch")
     g.add_edge("generate_patch", "create_branch")
     g.add_edge("create_branch", "apply_patch")
-    g.add_edge("apply_patch", END)
+    g.add_edge("apply_patch", "cleanup_worktree")
+    g.add_edge("cleanup_worktree", END)
     return g
 
 # optional context dictionary.
@@ -76,7 +183,7 @@ def run_patcher(
     workdir: str,
     context: Optional[dict] = None
 ) -> PatcherState:
-    graph = build_patcher_graph().compile()
+    graph = get_compiled("patcher_stream" if PATCHER_STREAMING else "patcher")
     # includes the context.
     init = {
         "issue": issue,
@@ -0,0 +1,218 @@
+# patcher/stream_parser.py
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# git extended header lines between "diff --git" and "---"
+EXTENDED_HEADERS = ("index ", "new file mode", "deleted file mode", "old mode", "new mode",
+                    "similarity index", "dissimilarity index", "rename from", "rename to",
+                    "copy from", "copy to")
+# prose/fence lines tolerated before the first file header
+MAX_PREAMBLE_LINES = 10
+
+
+class DiffFormatError(ValueError):
+    """
+    The streamed text is not a valid unified diff for the allowed files.
+    """
+
+
+@dataclass
+class FileSection:
+    """
+    One complete file of the diff: headers plus all of its hunks.
+    """
+    path: str                  # target path as written in the "+++" header
+    lines: List[str] = field(default_factory=list)
+    hunks: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def strip_prefix(path: str) -> str:
+    path = path.split("\t")[0].strip()
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def path_allowed(path: str, allowed: Iterable[str]) -> bool:
+    """
+    True if `path` (a diff header path) names one of `allowed` files; diff
+    paths may carry extra leading directories (see patch -p).
+    """
+    path = strip_prefix(path)
+    for f in allowed:
+        f = f[2:] if f.startswith("./") else f
+        if path == f or path.endswith("/" + f) or f.endswith("/" + path):
+            return True
+    return False
+
+
+class DiffStreamParser:
+    """
+    Incremental unified diff parser. feed() takes text as it arrives and
+    returns the file sections completed by it; finish() flushes the last
+    one. Raises DiffFormatError as soon as the structure is invalid
+    (headers out of order, hunk bodies not matching their line counts) or a
+    header names a file outside `allowed` (None allows any file).
+    """
+    def __init__(self, allowed: Optional[Iterable[str]] = None):
+        self.allowed = list(allowed) if allowed is not None else None
+        self.sections: List[FileSection] = []   # completed, in order
+        self._buffer = ""
+        # preamble | git_header | plus (expects "+++") | first_hunk | hunk | between | done
+        self._state = "preamble"
+        self._current: Optional[FileSection] = None
+        self._pending: List[str] = []     # "diff --git"/extended lines before "---"
+        self._old = self._new = 0          # lines left in the current hunk
+        self._preamble = 0
+        self.lines_seen = 0
+
+    @property
+    def done(self) -> bool:
+        """
+        True once the diff is over (trailing text seen); the rest of the
+        stream can be dropped.
+        """
+        return self._state == "done"
+
+    def feed(self, text: str) -> List[FileSection]:
+        self._buffer += text
+        *complete, self._buffer = self._buffer.split("\n")
+        done: List[FileSection] = []
+        for line in complete:
+            section = self._line(line.rstrip("\r"))
+            if section is not None:
+                done.append(section)
+        return done
+
+    def finish(self) -> List[FileSection]:
+        done = self.feed("\n") if self._buffer else []
+        if self._state == "done":
+            return done
+        if self._state in ("git_header", "plus", "first_hunk"):
+            raise DiffFormatError("diff ends inside a file header")
+        if self._state == "hunk":
+            raise DiffFormatError(f"diff ends inside a hunk ({self._old} old / {self._new} new lines missing)")
+        if self._current is not None:
+            done.append(self._close())
+        if not self.sections:
+            raise DiffFormatError("no file sections in diff")
+        self._state = "done"
+        return done
+
+    def _close(self) -> FileSection:
+        section, self._current = self._current, None
+        if not section.hunks:
+            raise DiffFormatError(f"no hunks for {section.path}")
+        self.sections.append(section)
+        return section
+
+    def _check_path(self, path: str) -> None:
+        if path.strip() == "/dev/null" or self.allowed is None:
+            return
+        if not path_allowed(path, self.allowed):
+            raise DiffFormatError(f"diff touches {path.strip()!r} outside the located files")
+
+    def _start_file(self, line: str) -> Optional[FileSection]:
+        """
+        Handle a line that may begin a new file; returns the section it closed.
+        """
+        closed = self._close() if self._current is not None else None
+        if line.startswith("diff --git "):
+            self._pending = [line]
+            self._state = "git_header"
+        else:
+            self._pending = []
+            self._old_header(line)
+        return closed
+
+    def _old_header(self, line: str) -> None:
+        self._check_path(line[4:])
+        self._pending.append(line)
+        self._state = "plus"
+
+    def _line(self, line: str) -> Optional[FileSection]:
+        self.lines_seen += 1
+        state = self._state
+
+        if state == "hunk":
+            tag = line[:1]
+            if line.startswith("\\"):               # "\ No newline at end of file"
+                self._current.lines.append(line)
+                return None
+            if tag in (" ", ""):                    # blank context line may lose its space
+                self._old -= 1
+                self._new -= 1
+            elif tag == "-":
+                self._old -= 1
+            elif tag == "+":
+                self._new -= 1
+            else:
+                raise DiffFormatError(f"hunk for {self._current.path} ended early at {line!r}")
+            if self._old < 0 or self._new < 0:
+                raise DiffFormatError(f"hunk for {self._current.path} longer than its header")
+            self._current.lines.append(line)
+            if self._old == 0 and self._new == 0:
+                self._state = "between"
+            return None
+
+        if state in ("preamble", "between"):
+            if line.startswith("diff --git ") or line.startswith("--- "):
+                return self._start_file(line)
+            if state == "between" and line.startswith("@@"):
+                return self._hunk(line)
+            if state == "between" and self._current is not None and line.startswith("\\"):
+                self._current.lines.append(line)
+                return None
+            if state == "preamble":
+                self._preamble += 1
+                if self._preamble > MAX_PREAMBLE_LINES:
+                    raise DiffFormatError("no diff header found")
+                return None
+            if line.startswith("```") or not line:
+                return None
+            if line[:1] in (" ", "+", "-"):
+                raise DiffFormatError(f"hunk for {self._current.path} longer than its header")
+            # prose after the last hunk: the diff is over, the rest is ignored
+            self._state = "done"
+            return self._close() if self._current is not None else None
+
+        if state == "git_header":
+            if line.startswith(EXTENDED_HEADERS):
+                self._pending.append(line)
+                return None
+            if line.startswith("--- "):
+                self._old_header(line)
+                return None
+            raise DiffFormatError(f"expected '---' after 'diff --git', got {line!r}")
+
+        if state == "plus":
+            if not line.startswith("+++ "):
+                raise DiffFormatError(f"expected '+++' header, got {line!r}")
+            self._check_path(line[4:])
+            self._current = FileSection(path=strip_prefix(line[4:]), lines=self._pending + [line])
+            self._pending = []
+            self._state = "first_hunk"
+            return None
+
+        if state == "first_hunk":
+            if line.startswith("@@"):
+                return self._hunk(line)
+            raise DiffFormatError(f"expected hunk header for {self._current.path}, got {line!r}")
+
+        return None   # done
+
+    def _hunk(self, line: str) -> None:
+        m = HUNK_RE.match(line)
+        if not m:
+            raise DiffFormatError(f"malformed hunk header {line!r}")
+        self._old = int(m.group(2)) if m.group(2) is not None else 1
+        self._new = int(m.group(4)) if m.group(4) is not None else 1
+        self._current.lines.append(line)
+        self._current.hunks += 1
+        self._state = "hunk" if (self._old or self._new) else "between"
+        return None
@@ -0,0 +1,69 @@
+# tests/test_embedding_index.py
+
+from locator.embedding_index import EmbeddingIndex, HashingEmbedder, reciprocal_rank_fusion
+from locator.file_cache import git_blob_sha
+from locator.schema import FileContent
+from locator.symbol_index import SymbolIndex
+
+APP = b"""def load_config(path):
+    return open(path).read()
+
+
+def parse_args(argv):
+    return argv[1:]
+"""
+
+UTIL = b"""def slugify(title):
+    return title.lower().replace(" ", "-")
+"""
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
+
+
+def build(files):
+    index = SymbolIndex()
+    index.update(files)
+    return index
+
+
+def test_unchanged_blobs_are_not_re_embedded(tmp_path):
+    embedder = CountingEmbedder()
+    files = [FileContent("app.py", raw=APP), FileContent("util.py", raw=UTIL)]
+    index = EmbeddingIndex(str(tmp_path), embedder)
+    assert index.update(files, build(files)) == 3
+    assert embedder.embedded == 3
+
+    # same content, now with the git blob SHA the scan supplies: same key
+    files = [FileContent("app.py", raw=APP, sha=git_blob_sha(APP)),
+             FileContent("util.py", raw=UTIL)]
+    assert index.update(files, build(files)) == 0
+
+    # reopened from disk, only the changed file is embedded again
+    changed = UTIL.replace(b"lower", b"casefold")
+    files = [FileContent("app.py", raw=APP), FileContent("util.py", raw=changed)]
+    index = EmbeddingIndex(str(tmp_path), embedder)
+    assert index.update(files, build(files)) == 1
+    assert embedder.embedded == 4
+    assert {row.sha for row in index.rows} == {git_blob_sha(APP), git_blob_sha(changed)}
+
+
+def test_search_ranks_the_matching_function_first(tmp_path):
+    files = [FileContent("app.py", raw=APP), FileContent("util.py", raw=UTIL)]
+    index = EmbeddingIndex(str(tmp_path), HashingEmbedder(dim=256))
+    index.update(files, build(files))
+    row, _score = index.search("slugify the title", k=3)[0]
+    assert (row.path, row.name) == ("util.py", "slugify")
+
+
+def test_reciprocal_rank_fusion_order():
+    a, b, c, d = ("a.py", 1), ("b.py", 1), ("c.py", 1), ("d.py", 1)
+    # b: 1/62 + 1/61 > a: 1/61 + 1/63 > c: 1/63 + 1/62 > d: 1/64
+    assert reciprocal_rank_fusion([[a, b, c, d], [b, c, a]]) == [b, a, c, d]
@@ -0,0 +1,94 @@
+# tests/test_http_session.py
+
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import vm_executor.http_session as http_session
+from vm_executor.http_session import connect_failed, request_with_retry
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """
+    Local stand-in for the gbox API. Tests set `script` to the replies to
+    send, one (status, headers, delay seconds) per request; the last one
+    repeats. `hits` counts the requests received.
+    """
+    monkeypatch.setattr(http_session, "backoff_delay", lambda attempt: 0.0)
+    state = {"script": [(200, {}, 0.0)], "hits": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            i = state["hits"]
+            state["hits"] += 1
+            status, headers, delay = state["script"][min(i, len(state["script"]) - 1)]
+            time.sleep(delay)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_address[1]}/boxes/b/commands"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_503_is_retried_for_non_idempotent_post(server):
+    server["script"] = [(503, {}, 0.0), (503, {}, 0.0), (200, {}, 0.0)]
+    resp = request_with_retry("POST", server["url"], idempotent=False, json={})
+    assert resp.status_code == 200
+    assert server["hits"] == 3
+
+
+def test_500_is_not_retried_for_non_idempotent_post(server):
+    server["script"] = [(500, {}, 0.0), (200, {}, 0.0)]
+    resp = request_with_retry("POST", server["url"], idempotent=False, json={})
+    assert resp.status_code == 500
+    assert server["hits"] == 1
+
+
+def test_500_is_retried_for_idempotent_request(server):
+    server["script"] = [(500, {}, 0.0), (200, {}, 0.0)]
+    resp = request_with_retry("POST", server["url"], json={})
+    assert resp.status_code == 200
+    assert server["hits"] == 2
+
+
+def test_read_timeout_is_not_retried_for_non_idempotent_post(server):
+    server["script"] = [(200, {}, 0.5)]
+    with pytest.raises(requests.ReadTimeout):
+        request_with_retry("POST", server["url"], read_timeout=0.2, idempotent=False, json={})
+    assert server["hits"] == 1
+
+
+def test_retry_after_is_honoured(server):
+    server["script"] = [(429, {"Retry-After": "1"}, 0.0), (200, {}, 0.0)]
+    started = time.monotonic()
+    resp = request_with_retry("POST", server["url"], idempotent=False, json={})
+    assert resp.status_code == 200
+    assert server["hits"] == 2
+    assert time.monotonic() - started >= 0.9   # backoff_delay is 0 here
+
+
+def test_refused_connection_counts_as_connect_failure():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]   # closed again: nothing listens there
+    with pytest.raises(requests.ConnectionError) as info:
+        request_with_retry("POST", f"http://127.0.0.1:{port}/boxes/linux",
+                           idempotent=False, max_retries=0, json={})
+    assert connect_failed(info.value)
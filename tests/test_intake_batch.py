@@ -0,0 +1,59 @@
+# tests/test_intake_batch.py
+
+import json
+
+import intake.batch as batch
+from intake.batch import LocalBatchBackend, intake_batch
+from intake.schema import RawIssue
+
+
+def issue(id: int, body: str) -> RawIssue:
+    return RawIssue(id=id, number=100 + id, title=f"issue {id}", body=body, state="open",
+                    labels=[], created_at="", updated_at="")
+
+
+def test_failed_item_is_resubmitted_and_results_map_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "INTAKE_BATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(batch, "INTAKE_BATCH_POLL_SECONDS", "0.01")
+    monkeypatch.setattr(batch, "cache_enabled", lambda: False)
+
+    calls = {}
+
+    def responder(body):
+        text = body["messages"][-1]["content"].rsplit("```", 2)[-2]
+        calls[text] = calls.get(text, 0) + 1
+        if text == "flaky crash" and calls[text] == 1:
+            raise RuntimeError("server error")
+        # the summary echoes the issue text, so the mapping back can be checked
+        return json.dumps({"intent": "BUG_FIX", "is_crash": "crash" in text,
+                           "entities": [], "summary": text})
+
+    backend = LocalBatchBackend(directory=str(tmp_path / "service"), responder=responder)
+    submitted = []
+    submit = backend.submit
+    backend.submit = lambda path: submitted.append(open(path).read().count("\n")) or submit(path)
+
+    raws = [issue(3, "first"), issue(1, "flaky crash"), issue(2, "third")]
+    outcomes = intake_batch(raws, backend=backend, max_attempts=3)
+
+    assert submitted == [3, 1]                      # one resubmission round, failed item only
+    assert calls == {"first": 1, "flaky crash": 2, "third": 1}
+    assert [o.issue.id for o in outcomes] == [3, 1, 2]
+    assert all(o.error is None for o in outcomes)
+    assert [(o.structured.id, o.structured.summary) for o in outcomes] == \
+        [(3, "first"), (1, "flaky crash"), (2, "third")]
+    assert [o.structured.is_crash for o in outcomes] == [False, True, False]
+
+
+def test_item_failing_every_round_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "INTAKE_BATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(batch, "INTAKE_BATCH_POLL_SECONDS", "0.01")
+    monkeypatch.setattr(batch, "cache_enabled", lambda: False)
+
+    def responder(body):
+        raise RuntimeError("always down")
+
+    backend = LocalBatchBackend(directory=str(tmp_path / "service"), responder=responder)
+    outcomes = intake_batch([issue(1, "x")], backend=backend, max_attempts=2)
+    assert outcomes[0].structured is None
+    assert "always down" in outcomes[0].error
@@ -0,0 +1,68 @@
+# tests/test_rate_limiter.py
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+import pytest
+
+import llm.gateway as gateway
+import llm.rate_limiter as rate_limiter
+from llm.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    # the benchmark module sets LLM_* env vars and disables logging on import;
+    # register them with monkeypatch so they are undone afterwards
+    for name in ("LLM_CACHE", "LLM_BACKOFF_BASE"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+    from benchmarks.rate_limit_fake import make_server
+
+    server, counts = make_server(rps=10, error_rate=0.1, latency=0.01)
+    monkeypatch.setattr(openai, "api_key", "fake")
+    monkeypatch.setattr(openai, "base_url", f"http://127.0.0.1:{server.server_address[1]}/v1/")
+    monkeypatch.setattr(gateway, "cache_enabled", lambda: False)
+    yield counts
+    server.shutdown()
+    server.server_close()
+    logging.disable(logging.NOTSET)
+
+
+def test_limiter_absorbs_429_and_503_and_halves_concurrency(fake_server, monkeypatch):
+    limiter = RateLimiter(rpm=6000, tpm=10_000_000, max_concurrency=8, min_concurrency=1,
+                          max_retries=8, backoff_base=0.05, backoff_max=1.0)
+    monkeypatch.setattr(rate_limiter, "_limiter", limiter)
+
+    # releases are serialized here so each one sees the limit it changed
+    halvings, lock = [], threading.Lock()
+    release = limiter.concurrency.release
+
+    def recording_release(throttled=False):
+        with lock:
+            before = limiter.concurrency.limit
+            release(throttled=throttled)
+            if throttled and limiter.concurrency.limit != before:
+                halvings.append((before, limiter.concurrency.limit))
+
+    monkeypatch.setattr(limiter.concurrency, "release", recording_release)
+
+    def one(i):
+        try:
+            gateway.chat([{"role": "user", "content": f"request {i}"}])
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        errors = [e for e in pool.map(one, range(30)) if e]
+
+    stats = limiter.stats()
+    assert errors == []
+    assert stats["failed"] == 0
+    assert fake_server["ok"] == 30
+    assert stats["throttled"] > 0 and fake_server["429"] > 0
+    assert halvings
+    assert all(after == max(1, before / 2) for before, after in halvings)
@@ -0,0 +1,67 @@
+# tests/test_stream_parser.py
+
+import pytest
+
+from patcher.stream_parser import DiffFormatError, DiffStreamParser
+
+X_PY = """--- a/x.py
++++ b/x.py
+@@ -1,2 +1,2 @@
+ a = 1
+-b = 2
++b = 3
+"""
+
+Y_PY = """--- a/y.py
++++ b/y.py
+@@ -1 +1 @@
+-c = 1
++c = 2
+"""
+
+
+def parse(text, allowed=None, chunk=7):
+    """
+    Feed `text` in small chunks, as a stream would deliver it.
+    """
+    parser = DiffStreamParser(allowed)
+    sections = []
+    for i in range(0, len(text), chunk):
+        sections += parser.feed(text[i:i + chunk])
+    return sections + parser.finish(), parser
+
+
+def test_two_files_are_split_into_sections():
+    sections, parser = parse("Here is the fix:\n```diff\n" + X_PY + Y_PY + "```\n")
+    assert [s.path for s in sections] == ["x.py", "y.py"]
+    assert sections[0].text == X_PY
+    assert parser.done
+
+
+def test_prose_after_the_diff_ends_it():
+    sections, parser = parse(X_PY + "\nThis changes b to 3.\n--- not a diff\n")
+    assert [s.path for s in sections] == ["x.py"]
+    assert parser.done
+
+
+@pytest.mark.parametrize("extra", [" b = 2", "+d = 4", "-d = 4"])
+def test_hunk_longer_than_its_header_is_an_error(extra):
+    # an extra line after a complete hunk must not end the diff silently
+    with pytest.raises(DiffFormatError, match="longer than its header"):
+        parse(X_PY + extra + "\n" + Y_PY)
+
+
+def test_hunk_shorter_than_its_header_is_an_error():
+    short = X_PY.replace("@@ -1,2 +1,2 @@", "@@ -1,3 +1,3 @@")
+    with pytest.raises(DiffFormatError, match="ended early"):
+        parse(short + "@@ -9 +9 @@\n-e = 1\n+e = 2\n")
+
+
+def test_truncated_diff_is_an_error():
+    with pytest.raises(DiffFormatError, match="inside a hunk"):
+        parse(X_PY[:-len("+b = 3\n")])
+
+
+def test_file_outside_allowed_is_an_error():
+    with pytest.raises(DiffFormatError, match="outside the located files"):
+        parse(X_PY + Y_PY, allowed=["src/x.py"])
@@ -0,0 +1,86 @@
+# vm_executor/archive.py
+
+import io
+import os
+import shlex
+import tarfile
+from typing import Dict, List, Optional
+
+from vm_executor.vm_manager import get_vm
+
+
+def _fetch_archive(list_cmd: str) -> bytes:
+    """
+    Pack the NUL-separated file list printed by `list_cmd` into one gzip'd tar
+    on the VM and pull it back through iter_output(), one chunk per call.
+    Archives smaller than one chunk cost a single round trip.
+    """
+    vm = get_vm()
+    parts: List[bytes] = list(vm.iter_output(f"{list_cmd} | tar czf - --null -T -"))
+    blob = b"".join(parts)
+    print(f"📦 Downloaded {len(blob)} byte archive in {len(parts)} call(s)")
+    return blob
+
+
+def member_key(path: str) -> str:
+    """
+    A path in the form tar stores it: normalized, with the leading "/" (and
+    any "../" prefix) stripped. Requested paths are matched in this form.
+    """
+    return os.path.normpath(path).lstrip("/")
+
+
+def _unpack(blob: bytes, dest: Optional[str] = None) -> Dict[str, bytes]:
+    """
+    Read every regular file out of a gzip'd tar held in memory.
+    If `dest` is given, the files are also written below that directory.
+    """
+    files: Dict[str, bytes] = {}
+    with tarfile.open(fileobj=io.BytesIO(blob), mode="r:gz") as tar:
+        for member in tar.getmembers():
+            if not member.isfile():
+                continue
+            data = tar.extractfile(member).read()
+            files[member.name] = data
+            if dest:
+                target = os.path.realpath(os.path.join(dest, member.name))
+                if not target.startswith(os.path.realpath(dest) + os.sep):
+                    continue  # refuse to write outside dest
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as fh:
+                    fh.write(data)
+    return files
+
+
+def download_tree(workdir: str, pattern: str = "*.py",
+                  dest: Optional[str] = None) -> Dict[str, bytes]:
+    """
+    Download every file under `workdir` matching `pattern` as one archive.
+    Returns {path: raw bytes}, with paths as `find` prints them (e.g. 'swe_agent/app.py').
+    """
+    list_cmd = f"find {workdir} -type f -name {shlex.quote(pattern)} -print0"
+    files = _unpack(_fetch_archive(list_cmd), dest)
+    if workdir.startswith("/"):
+        # tar dropped the leading "/" that find printed
+        files = {"/" + name: data for name, data in files.items()}
+    return files
+
+
+def download_files(paths: List[str], dest: Optional[str] = None) -> Dict[str, bytes]:
+    """
+    Download an explicit list of files from the VM as one archive.
+    Returns {path: raw bytes}, keyed by the requested paths. Raises
+    RuntimeError if any requested file is missing from the archive.
+    """
+    if not paths:
+        return {}
+    quoted = " ".join(shlex.quote(p) for p in paths)
+    list_cmd = f"printf '%s\\0' {quoted}"
+    unpacked = {member_key(name): data
+                for name, data in _unpack(_fetch_archive(list_cmd), dest).items()}
+    files = {p: unpacked[member_key(p)] for p in paths if member_key(p) in unpacked}
+    missing = [p for p in paths if p not in files]
+    if missing:
+        raise RuntimeError(f"{len(missing)} requested file(s) missing from the archive: "
+                           f"{', '.join(missing[:5])}")
+    return files
@@ -0,0 +1,191 @@
+# vm_executor/async_sdk.py
+
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from vm_executor.batch import build_batch_script, parse_batch_output, new_marker
+from vm_executor.output import OutputPolicy, DEFAULT_POLICY, UNBOUNDED, bound_result
+from vm_executor.http_session import (
+    RETRYABLE_STATUSES, REFUSED_STATUSES, POOL_SIZE, CONNECT_TIMEOUT, MAX_RETRIES,
+    backoff_delay, retry_after_seconds, parse_duration,
+)
+
+load_dotenv()
+
+# Upper bound on gbox requests in flight from one AsyncGboxVM.
+MAX_CONCURRENCY = int(os.getenv("GBOX_MAX_CONCURRENCY", "32"))
+
+class AsyncGboxVM:
+    """
+    asyncio counterpart of SimpleGboxVM:
+      - Creating a Linux VM (or attaching to an existing box_id)
+      - Executing shell commands on the VM (one at a time or batched)
+      - Cleaning up (terminating) the VM
+    A semaphore bounds the number of concurrent requests, so callers can
+    gather() many commands without flooding the API.
+    """
+    def __init__(self, api_key: str | None = None, box_id: str | None = None,
+                 max_concurrency: int = MAX_CONCURRENCY):
+        self.api_key = api_key or os.getenv("GBOX_API_KEY")
+        if not self.api_key:
+            raise RuntimeError("Please set the GBOX_API_KEY environment variable")
+        self.base_url = os.getenv("GBOX_BASE_URL", "https://gbox.ai/api/v1")
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        self.box_id: str | None = box_id
+        self.round_trips: int = 0
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> httpx.AsyncClient:
+        """
+        httpx clients and semaphores belong to one event loop; rebuild them
+        if we are called from a different loop (e.g. a second asyncio.run()).
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self.release_client()
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=POOL_SIZE,
+                                    max_keepalive_connections=POOL_SIZE),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    def release_client(self) -> None:
+        """
+        Let go of the HTTP client from synchronous code (or another loop).
+        It is closed on its own loop when that loop is still usable; a
+        client whose loop has been closed can no longer aclose() and is
+        just dropped, which releases its connection pool.
+        """
+        client, loop = self._client, self._loop
+        self._client = self._semaphore = self._loop = None
+        if client is None or loop is None or loop.is_closed():
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            loop.run_until_complete(client.aclose())   # idle loop, none running here
+
+    async def _post(self, url: str, payload: dict, read_timeout: float,
+                    idempotent: bool = True) -> httpx.Response:
+        """
+        POST with bounded concurrency, timeouts and jittered exponential
+        backoff on connection errors and RETRYABLE_STATUSES. With
+        idempotent=False only connect failures and REFUSED_STATUSES are
+        retried, as in request_with_retry().
+        """
+        client = self._bind_loop()
+        timeout = httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT)
+        statuses = RETRYABLE_STATUSES if idempotent else REFUSED_STATUSES
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    resp = await client.post(url, json=payload, headers=self.headers,
+                                             timeout=timeout)
+                    self.round_trips += 1
+            except httpx.TransportError as e:
+                connect_failed = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= MAX_RETRIES or not (idempotent or connect_failed):
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                if resp.status_code not in statuses or attempt >= MAX_RETRIES:
+                    return resp
+                delay = retry_after_seconds(resp.headers)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def create_vm(self) -> dict:
+        """
+        Create a Linux VM and wait for it to be ready.
+        Returns the VM info as a dict.
+        """
+        print("🚀 Creating Linux VM (async)...")
+        url = f"{self.base_url}/boxes/linux"
+        payload = {
+            "wait": True,
+            "config": {
+                "expiresIn": "30m"  # auto-expire after 30 minutes
+            }
+        }
+        resp = await self._post(url, payload, read_timeout=120, idempotent=False)
+        resp.raise_for_status()
+        info = resp.json()
+        self.box_id = info["id"]
+        print(f"✅ Linux VM created successfully! 📦 VM ID: {self.box_id}")
+        return info
+
+    async def run_command(self, command: str, timeout: str = "30s",
+                          policy: OutputPolicy = DEFAULT_POLICY) -> dict:
+        """
+        Execute a shell command on the VM.
+        Returns a dict containing 'exitCode', 'stdout', and 'stderr', bounded
+        by `policy` like SimpleGboxVM.run_command().
+        """
+        if not self.box_id:
+            raise RuntimeError("VM not created. Call create_vm() first.")
+
+        url = f"{self.base_url}/boxes/{self.box_id}/commands"
+        payload = {
+            "commands": command,
+            "timeout": timeout
+        }
+        resp = await self._post(url, payload, read_timeout=parse_duration(timeout) + 30,
+                                idempotent=False)
+        resp.raise_for_status()
+        return bound_result(resp.json(), policy)
+
+    async def run_batch(self, commands: List[str], timeout: str = "120s",
+                        policy: OutputPolicy = DEFAULT_POLICY) -> List[Dict]:
+        """
+        Execute several shell commands on the VM in a single request.
+        Returns one {'exitCode', 'stdout', 'stderr'} dict per command, in order.
+        """
+        if not commands:
+            return []
+        marker = new_marker()
+        raw = await self.run_command(build_batch_script(commands, marker), timeout=timeout,
+                                     policy=UNBOUNDED)
+        results = parse_batch_output(raw.get("stdout", ""), marker, len(commands))
+        return [bound_result(res, policy) for res in results]
+
+    async def cleanup(self) -> None:
+        """
+        Terminate the VM and close the HTTP client.
+        """
+        if self.box_id:
+            print(f"\n🧹 Cleaning up VM {self.box_id}...")
+            url = f"{self.base_url}/boxes/{self.box_id}/terminate"
+            try:
+                resp = await self._post(url, {"wait": True}, read_timeout=120)
+                resp.raise_for_status()
+                print("✅ VM terminated successfully")
+            except Exception as e:
+                print(f"⚠️ Error while cleaning up VM: {e}")
+            self.box_id = None
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the underlying HTTP client without touching the VM.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,75 @@
+# vm_executor/batch.py
+
+import re
+import uuid
+from typing import Dict, List
+
+
+def build_batch_script(commands: List[str], marker: str) -> str:
+    """
+    Wrap several shell commands into a single script.
+
+    Each command runs in its own subshell (so a `cd` in one command does not
+    leak into the next) with stdout and stderr captured to temp files. The
+    captured streams are then replayed between marker lines:
+
+        <marker>:OUT:<i>
+        ...stdout...
+        <marker>:ERR:<i>
+        ...stderr...
+        <marker>:END:<i>:<exitCode>
+    """
+    lines = [
+        '__swe_out=$(mktemp)',
+        '__swe_err=$(mktemp)',
+    ]
+    for i, command in enumerate(commands):
+        lines += [
+            "(",
+            command,
+            ') >"$__swe_out" 2>"$__swe_err"',
+            "__swe_rc=$?",
+            f"printf '%s\\n' '{marker}:OUT:{i}'",
+            'cat "$__swe_out"',
+            f"printf '\\n%s\\n' '{marker}:ERR:{i}'",
+            'cat "$__swe_err"',
+            f"printf '\\n%s:%s\\n' '{marker}:END:{i}' \"$__swe_rc\"",
+        ]
+    lines.append('rm -f "$__swe_out" "$__swe_err"')
+    return "\n".join(lines)
+
+
+def parse_batch_output(stdout: str, marker: str, count: int) -> List[Dict]:
+    """
+    Split the stdout of a script built by build_batch_script() back into
+    one {'exitCode', 'stdout', 'stderr'} dict per command.
+
+    Commands whose END marker never appeared (e.g. the whole script hit the
+    VM timeout) are reported with exitCode -1.
+    """
+    pattern = re.compile(
+        rf"{re.escape(marker)}:OUT:(\d+)\n(.*?)\n"
+        rf"{re.escape(marker)}:ERR:\1\n(.*?)\n"
+        rf"{re.escape(marker)}:END:\1:(-?\d+)\n",
+        re.S,
+    )
+    results: List[Dict] = [
+        {"exitCode": -1, "stdout": "", "stderr": "batch output missing for this command"}
+        for _ in range(count)
+    ]
+    for m in pattern.finditer(stdout):
+        idx = int(m.group(1))
+        if idx < count:
+            results[idx] = {
+                "exitCode": int(m.group(4)),
+                "stdout":   m.group(2),
+                "stderr":   m.group(3),
+            }
+    return results
+
+
+def new_marker() -> str:
+    """
+    Return a delimiter that will not collide with real command output.
+    """
+    return f"__SWE_BATCH_{uuid.uuid4().hex}__"
@@ -0,0 +1,199 @@
+# vm_executor/executor.py
+
+import asyncio
+import base64
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+from cassette import get_cassette, replaying
+from vm_executor.batch import build_batch_script, parse_batch_output, new_marker
+from vm_executor.output import (
+    OutputPolicy, DEFAULT_POLICY, UNBOUNDED, MAX_OUTPUT_BYTES, bound_result,
+)
+
+# Which executor backs get_vm(): "gbox" (remote sandbox) or "local" (subprocess)
+VM_BACKEND = os.getenv("VM_BACKEND", "gbox")
+
+
+class BaseExecutor(ABC):
+    """
+    The contract every command-execution backend implements:
+      - create_vm() prepares the sandbox and returns an info dict
+        ({'id', 'config', 'expiresAt'})
+      - run_command() returns {'exitCode', 'stdout', 'stderr'}
+      - run_batch() runs several commands in one call (one result per command)
+      - cleanup() releases the sandbox
+    `setup_commands` are run once on every fresh sandbox before it is used.
+
+    Output handling is governed by an OutputPolicy per call (bounded capture,
+    optional spill to a local file, quiet console by default); the size of
+    the last and the largest command output are kept in `last_output` and
+    `peak_output_bytes`.
+    """
+    setup_commands: List[str] = []
+
+    box_id: str | None = None
+    round_trips: int = 0
+    peak_output_bytes: int = 0
+    last_output: Dict = {}
+
+    @abstractmethod
+    def create_vm(self) -> dict:
+        ...
+
+    @abstractmethod
+    def run_command(self, command: str, timeout: str = "30s", echo: bool = True,
+                    policy: OutputPolicy = DEFAULT_POLICY) -> dict:
+        ...
+
+    @abstractmethod
+    def cleanup(self) -> None:
+        ...
+
+    def run_batch(self, commands: List[str], timeout: str = "120s",
+                  policy: OutputPolicy = DEFAULT_POLICY) -> List[Dict]:
+        """
+        Execute several shell commands in a single call.
+        Commands run sequentially and independently (a failure does not stop
+        the following commands, and `cd` does not carry over).
+        Returns one {'exitCode', 'stdout', 'stderr'} dict per command, in order.
+        """
+        if not commands:
+            return []
+
+        print(f"\n📦 Executing batch of {len(commands)} commands on VM")
+        marker = new_marker()
+        script = build_batch_script(commands, marker)
+        raw = self.run_command(script, timeout=timeout, echo=False, policy=UNBOUNDED)
+        results = parse_batch_output(raw.get("stdout", ""), marker, len(commands))
+        if policy.max_bytes is not None:
+            for res in results:
+                bound_result(res, policy)
+
+        failed = sum(1 for r in results if r["exitCode"] != 0)
+        print(f"📋 Batch finished: {len(results) - failed} ok, {failed} non-zero exit")
+        if raw.get("stderr"):
+            print("❌ batch stderr:")
+            print(raw["stderr"][:policy.echo_bytes])
+        return results
+
+    # ─── output handling shared by all backends ─────────────────────────────
+
+    def reset_output_stats(self) -> None:
+        """
+        Forget output sizes seen so far (a new lease starts counting afresh).
+        """
+        self.peak_output_bytes = 0
+        self.last_output = {}
+
+    def _record_output(self, result: dict, received_bytes: int) -> None:
+        """
+        Remember how much output one command produced (for peak-memory reporting).
+        """
+        captured = len(result.get("stdout") or "") + len(result.get("stderr") or "")
+        self.last_output = {
+            "received_bytes": received_bytes,
+            "captured_bytes": captured,
+            "truncated": bool(result.get("truncated")),
+        }
+        self.peak_output_bytes = max(self.peak_output_bytes, received_bytes)
+
+    def _echo(self, command: str, result: dict, policy: OutputPolicy) -> None:
+        """
+        Print the command trace; stdout/stderr only if the policy asks for it.
+        """
+        print(f"\n💻 Executing on VM: {command[:200]}{'…' if len(command) > 200 else ''}")
+        print(f"📋 Exit code: {result.get('exitCode')}"
+              + (" (output truncated)" if result.get("truncated") else ""))
+        if not policy.echo_output:
+            return
+        for stream, label in (("stdout", "📤 stdout:"), ("stderr", "❌ stderr:")):
+            if result.get(stream):
+                print(label)
+                print(result[stream][:policy.echo_bytes])
+
+    # ─── incremental consumption of large outputs ───────────────────────────
+
+    def iter_output(self, command: str, chunk_bytes: Optional[int] = None,
+                    timeout: str = "300s") -> Iterator[bytes]:
+        """
+        Run `command` with stdout redirected to a file on the VM and page the
+        file back base64 encoded, `chunk_bytes` raw bytes per call (sized so a
+        chunk fits GBOX_MAX_OUTPUT_BYTES by default). The first call also
+        carries the first chunk, so small outputs cost a single round trip.
+        Raises RuntimeError if the command exits non-zero.
+        """
+        if chunk_bytes is None:
+            raw = (MAX_OUTPUT_BYTES - 64) * 3 // 4
+            chunk_bytes = max(3, raw - raw % 3)
+        spool = f"/tmp/swe_out_{uuid.uuid4().hex}"
+
+        first = self.run_command(
+            f"(\n{command}\n) > {spool}\n__rc=$?\n"
+            f"echo $__rc $(stat -c %s {spool})\n"
+            f"dd if={spool} bs={chunk_bytes} count=1 2>/dev/null | base64 -w0\n"
+            f"[ $(stat -c %s {spool}) -gt {chunk_bytes} ] || rm -f {spool}",
+            timeout=timeout, echo=False, policy=UNBOUNDED,
+        )
+        header, _, data = first["stdout"].partition("\n")
+        rc, size = (int(x) for x in header.split())
+        if rc != 0:
+            self.run_command(f"rm -f {spool}", echo=False)
+            raise RuntimeError(f"Command failed with exit code {rc}: {first.get('stderr', '')}")
+        yield base64.b64decode(data.strip())
+
+        n_chunks = (size + chunk_bytes - 1) // chunk_bytes
+        for i in range(1, n_chunks):
+            cleanup = f"; rm -f {spool}" if i == n_chunks - 1 else ""
+            res = self.run_command(
+                f"dd if={spool} bs={chunk_bytes} skip={i} count=1 2>/dev/null | base64 -w0{cleanup}",
+                timeout=timeout, echo=False, policy=UNBOUNDED,
+            )
+            yield base64.b64decode(res["stdout"].strip())
+
+
+class AsyncExecutorAdapter:
+    """
+    Async facade over a synchronous executor: each call runs in a worker
+    thread. Used for backends without a native async client.
+    """
+    def __init__(self, executor: BaseExecutor):
+        self.executor = executor
+        self.box_id = executor.box_id
+        self.round_trips = 0  # counted by the wrapped executor
+
+    async def run_command(self, command: str, timeout: str = "30s",
+                          policy: OutputPolicy = DEFAULT_POLICY) -> dict:
+        return await asyncio.to_thread(self.executor.run_command, command, timeout, False, policy)
+
+    async def run_batch(self, commands: List[str], timeout: str = "120s",
+                        policy: OutputPolicy = DEFAULT_POLICY) -> List[Dict]:
+        return await asyncio.to_thread(self.executor.run_batch, commands, timeout, policy)
+
+
+def create_executor(backend: str | None = None, api_key: str | None = None) -> BaseExecutor:
+    """
+    Build an (un-created) executor for the configured backend; wrapped for
+    recording, or replaced by the replay stand-in, per CASSETTE_MODE.
+    """
+    cassette = get_cassette()
+    if replaying():
+        # CASSETTE_MODE=replay: no sandbox at all, whatever the backend
+        from vm_executor.replay import ReplayVM
+        return ReplayVM(cassette)
+
+    backend = backend or VM_BACKEND
+    if backend == "gbox":
+        from vm_executor.sdk import SimpleGboxVM
+        executor = SimpleGboxVM(api_key)
+    elif backend == "local":
+        from vm_executor.local_sandbox import LocalSandboxVM
+        executor = LocalSandboxVM()
+    else:
+        raise ValueError(f"Unknown VM backend: {backend!r}")
+    if cassette:
+        from vm_executor.replay import RecordingVM
+        return RecordingVM(executor, cassette)
+    return executor
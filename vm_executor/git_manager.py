@@ -1,3 +1,5 @@
+import shlex
+
 from vm_executor.vm_manager import get_vm
 
 def checkout_branch(workdir: str, branch: str) -> None:
@@ -5,17 +7,80 @@ def checkout_branch(workdir: str, branch: str) -> None:
     Idempotent branch checkout:
       - if the branch exists locally, just switch to it
       - otherwise create a new one based on the current HEAD
+    The existence check and the checkout are sent as one batch.
     """
     vm = get_vm()
     check_cmd = (
         f"cd {workdir} && "
         f"git rev-parse --verify {branch}"
     )
-    res = vm.run_command(check_cmd)
-    if res["exitCode"] == 0:
-        # Branch exists, checkout
-        vm.run_command(f"cd {workdir} && git checkout {branch}")
+    checkout_cmd = (
+        f"cd {workdir} && "
+        f"if git rev-parse --verify --quiet {branch} >/dev/null; "
+        f"then git checkout {branch}; "
+        f"else git checkout -b {branch}; fi"
+    )
+    check_res, checkout_res = vm.run_batch([check_cmd, checkout_cmd])
+    if check_res["exitCode"] == 0:
+        # Branch existed, switched to it
+        print(f"🔀 Switched to existing branch {branch}")
     else:
-        # Branch does not exist, create and checkout
-        vm.run_command(f"cd {workdir} && git checkout -b {branch}")
+        # Branch did not exist, created it
+        print(f"🌱 Created branch {branch}")
+    if checkout_res["exitCode"] != 0:
+        print(f"⚠️ git checkout failed: {checkout_res['stderr']}")
 
+
+def worktree_path(workdir: str, branch: str) -> str:
+    """
+    Where the worktree for `branch` lives, next to the main workdir
+    (e.g. 'swe_agent_worktrees/fix-issue-42').
+    """
+    return f"{workdir}_worktrees/{branch.replace('/', '-')}"
+
+def add_worktree(workdir: str, branch: str) -> str:
+    """
+    Create a fresh worktree for `branch` at the current HEAD of `workdir`.
+    Worktrees share the main clone's object store, so several branches can
+    be patched at the same time without extra clones. A leftover worktree
+    for the same branch (e.g. from a failed attempt) is replaced, and the
+    branch is reset to HEAD.
+    Returns the worktree path, usable wherever a workdir is expected.
+    """
+    vm = get_vm()
+    path = worktree_path(workdir, branch)
+    res = vm.run_command(
+        f"git -C {workdir} worktree remove --force \"$PWD/{path}\" 2>/dev/null; "
+        f"rm -rf {path} && git -C {workdir} worktree prune && "
+        f"git -C {workdir} worktree add --quiet --force -B {branch} \"$PWD/{path}\" HEAD"
+    )
+    if res["exitCode"] != 0:
+        raise RuntimeError(f"git worktree add failed: {res['stderr']}")
+    print(f"🌿 Worktree for {branch} ready at {path}")
+    return path
+
+def commit_worktree(path: str, message: str) -> str | None:
+    """
+    Commit every change in the worktree onto its branch so the result
+    survives remove_worktree(). Returns the new commit sha, or None if
+    there was nothing to commit or the commit failed.
+    """
+    vm = get_vm()
+    res = vm.run_command(
+        f"cd {path} && git add -A && "
+        f"git -c user.name='SWE Agent' -c user.email='swe-agent@localhost' "
+        f"commit --quiet -m {shlex.quote(message)} && git rev-parse HEAD"
+    )
+    if res["exitCode"] != 0:
+        return None
+    return res["stdout"].strip()
+
+def remove_worktree(workdir: str, path: str) -> None:
+    """
+    Delete a worktree created by add_worktree(); its branch is kept.
+    """
+    vm = get_vm()
+    vm.run_command(
+        f"git -C {workdir} worktree remove --force \"$PWD/{path}\"; "
+        f"git -C {workdir} worktree prune"
+    )
@@ -0,0 +1,167 @@
+# vm_executor/http_session.py
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Statuses worth retrying: throttling and transient server-side failures.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuses that mean the request was refused before it was acted on; the
+# only ones retried for non-idempotent calls (box creation, commands).
+REFUSED_STATUSES = {429, 503}
+
+POOL_SIZE       = int(os.getenv("GBOX_POOL_SIZE", "16"))
+CONNECT_TIMEOUT = float(os.getenv("GBOX_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT    = float(os.getenv("GBOX_READ_TIMEOUT", "60"))
+MAX_RETRIES     = int(os.getenv("GBOX_MAX_RETRIES", "4"))
+BACKOFF_BASE    = float(os.getenv("GBOX_BACKOFF_BASE", "0.5"))
+BACKOFF_CAP     = float(os.getenv("GBOX_BACKOFF_CAP", "30"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_counters: Dict[str, int] = {"requests": 0, "retries": 0}
+_counters_lock = threading.Lock()
+
+
+def _bump(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide keep-alive session used for all gbox API calls.
+    Connections are pooled per host, so repeated calls skip the TLS handshake.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=POOL_SIZE,
+                max_retries=0,  # retries are handled in request_with_retry()
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def parse_duration(value: str) -> float:
+    """
+    Convert a gbox duration string ('30s', '5m', '1h' or plain seconds) to seconds.
+    """
+    value = str(value).strip()
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * units[suffix]
+    return float(value)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """
+    Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP date). Returns None if absent.
+    """
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def connect_failed(exc: requests.ConnectionError) -> bool:
+    """
+    True if the request never reached the server (connect timeout or
+    refused/unresolvable connection), so re-sending it cannot act twice.
+    """
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = exc.args[0] if exc.args else None
+    reason = getattr(reason, "reason", reason)   # urllib3 MaxRetryError wraps the cause
+    return isinstance(reason, NewConnectionError)
+
+
+def request_with_retry(method: str, url: str,
+                       read_timeout: float = READ_TIMEOUT,
+                       max_retries: int = MAX_RETRIES,
+                       idempotent: bool = True,
+                       **kwargs) -> requests.Response:
+    """
+    Send a request on the shared session with (connect, read) timeouts.
+    Connection errors and RETRYABLE_STATUSES are retried with jittered
+    exponential backoff, honouring Retry-After when the server sends one.
+    With idempotent=False (the server may already have acted on a failed
+    attempt) only connect-phase failures and REFUSED_STATUSES are retried.
+    The final response is returned as-is; callers still raise_for_status().
+    """
+    session = get_session()
+    statuses = RETRYABLE_STATUSES if idempotent else REFUSED_STATUSES
+    attempt = 0
+    while True:
+        _bump("requests")
+        try:
+            resp = session.request(method, url, timeout=(CONNECT_TIMEOUT, read_timeout), **kwargs)
+        except requests.ConnectionError as e:
+            if attempt >= max_retries or not (idempotent or connect_failed(e)):
+                raise
+            delay = backoff_delay(attempt)
+        else:
+            if resp.status_code not in statuses or attempt >= max_retries:
+                return resp
+            delay = retry_after_seconds(resp.headers)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            resp.close()
+
+        attempt += 1
+        _bump("retries")
+        print(f"🔁 Retrying {method} {url} in {delay:.2f}s (attempt {attempt}/{max_retries})")
+        time.sleep(delay)
+
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Connection-pool counters for the shared session:
+      - requests: HTTP requests sent (including retries)
+      - retries: requests that were re-sent after a failure
+      - new_connections: TCP/TLS connections opened by the pools
+      - reused: requests served over an already-open connection
+    """
+    with _counters_lock:
+        stats = dict(_counters)
+    opened = 0
+    pooled_requests = 0
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                pooled_requests += pool.num_requests
+    stats["new_connections"] = opened
+    stats["reused"] = max(0, pooled_requests - opened)
+    return stats
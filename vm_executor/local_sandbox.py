@@ -0,0 +1,120 @@
+# vm_executor/local_sandbox.py
+
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import tempfile
+import uuid
+
+from vm_executor.executor import BaseExecutor
+from vm_executor.http_session import parse_duration
+from vm_executor.output import OutputPolicy, DEFAULT_POLICY, read_bounded
+
+# exit code reported when a command exceeds its timeout (same as coreutils `timeout`)
+TIMEOUT_EXIT_CODE = 124
+
+
+class LocalSandboxVM(BaseExecutor):
+    """
+    Executor that runs shell commands on this host with subprocess:
+      - create_vm() makes an isolated temp directory that acts as the box
+      - run_command() runs `bash -c` inside it, honouring the same timeout
+        strings and {'exitCode', 'stdout', 'stderr'} result shape as gbox
+      - cleanup() deletes the directory
+    Only use it for trusted repositories: commands are not containerised.
+    """
+    setup_commands = []
+
+    def __init__(self, root: str | None = None):
+        self.root = root or os.getenv("LOCAL_SANDBOX_ROOT")
+        self.workspace: str | None = None
+        self.box_id: str | None = None
+        self.round_trips: int = 0
+
+    def create_vm(self) -> dict:
+        """
+        Create the sandbox directory. Returns an info dict shaped like gbox's.
+        """
+        self.workspace = tempfile.mkdtemp(prefix="swe_sandbox_", dir=self.root)
+        self.box_id = f"local-{uuid.uuid4().hex[:12]}"
+        print(f"🏠 Local sandbox ready: {self.workspace}")
+        return {
+            "id": self.box_id,
+            "config": {"os": {"version": platform.platform()}},
+            "expiresAt": None,
+        }
+
+    def run_command(self, command: str, timeout: str = "30s", echo: bool = True,
+                    policy: OutputPolicy = DEFAULT_POLICY) -> dict:
+        """
+        Execute a shell command in the sandbox directory.
+        Returns a dict containing 'exitCode', 'stdout', and 'stderr'.
+        Output is streamed to temp files and only policy.max_bytes per stream
+        (head + tail) is read back, so huge outputs never sit in memory.
+        """
+        if not self.workspace:
+            raise RuntimeError("VM not created. Call create_vm() first.")
+
+        self.round_trips += 1
+        env = dict(os.environ, HOME=self.workspace)
+        with tempfile.TemporaryFile() as out_fh, tempfile.TemporaryFile() as err_fh:
+            proc = subprocess.Popen(
+                ["bash", "-c", command],
+                cwd=self.workspace,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=out_fh,
+                stderr=err_fh,
+                start_new_session=True,  # so a timeout can kill the whole process group
+            )
+            timed_out = False
+            try:
+                exit_code = proc.wait(timeout=parse_duration(timeout))
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+                exit_code = TIMEOUT_EXIT_CODE
+                timed_out = True
+
+            result = {"exitCode": exit_code}
+            received = 0
+            for stream, fh in (("stdout", out_fh), ("stderr", err_fh)):
+                size = os.fstat(fh.fileno()).st_size
+                received += size
+                data, truncated = read_bounded(fh, size, policy)
+                if truncated:
+                    result["truncated"] = True
+                    if policy.spill:
+                        result[f"{stream}_file"] = self._spill(fh, policy, stream)
+                result[stream] = data.decode("utf-8", errors="replace")
+
+        if timed_out:
+            result["stderr"] += f"\ncommand timed out after {timeout}"
+        self._record_output(result, received)
+        if echo:
+            self._echo(command, result, policy)
+        return result
+
+    @staticmethod
+    def _spill(fh, policy: OutputPolicy, stream: str) -> str:
+        """
+        Copy a full output stream from its temp file to a named spill file.
+        """
+        fd, path = tempfile.mkstemp(prefix="swe_vm_", suffix=f".{stream}", dir=policy.spill_dir)
+        fh.seek(0)
+        with os.fdopen(fd, "wb") as dst:
+            shutil.copyfileobj(fh, dst)
+        return path
+
+    def cleanup(self) -> None:
+        """
+        Delete the sandbox directory.
+        """
+        if not self.workspace:
+            return
+        print(f"\n🧹 Removing local sandbox {self.workspace}...")
+        shutil.rmtree(self.workspace, ignore_errors=True)
+        self.workspace = None
+        self.box_id = None
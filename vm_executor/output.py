@@ -0,0 +1,100 @@
+# vm_executor/output.py
+
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple
+
+# Largest stdout (in bytes) we expect the gbox command API to hand back in one call.
+MAX_OUTPUT_BYTES = int(os.getenv("GBOX_MAX_OUTPUT_BYTES", str(1024 * 1024)))
+
+
+@dataclass(frozen=True)
+class OutputPolicy:
+    """
+    How much of a command's output is kept and shown.
+
+    - max_bytes: bytes kept per stream in the result (None = keep everything);
+      longer output keeps the head and the tail around a truncation marker
+    - head_ratio: share of max_bytes taken from the start of the stream
+    - spill: when truncating, also write the full stream to a local temp file
+      (path returned as result['stdout_file'] / result['stderr_file'])
+    - spill_dir: directory for spill files (default: the system temp dir)
+    - echo_output: print stdout/stderr to the console (quiet by default)
+    - echo_bytes: at most this many bytes per stream are printed
+    """
+    max_bytes: Optional[int] = int(os.getenv("VM_OUTPUT_MAX_BYTES", str(64 * 1024)))
+    head_ratio: float = 0.5
+    spill: bool = os.getenv("VM_OUTPUT_SPILL", "0") == "1"
+    spill_dir: Optional[str] = os.getenv("VM_OUTPUT_SPILL_DIR") or None
+    echo_output: bool = os.getenv("VM_ECHO_OUTPUT", "0") == "1"
+    echo_bytes: int = 2000
+
+
+DEFAULT_POLICY = OutputPolicy()
+# For callers that parse the whole output (file lists, batch splitting, archives)
+UNBOUNDED = OutputPolicy(max_bytes=None, spill=False)
+
+
+def _marker(dropped: int) -> bytes:
+    return f"\n... [{dropped} bytes truncated] ...\n".encode()
+
+
+def truncate_bytes(data: bytes, max_bytes: Optional[int], head_ratio: float = 0.5) -> Tuple[bytes, bool]:
+    """
+    Keep the head and tail of `data` so that at most `max_bytes` survive.
+    Returns (kept bytes with a marker in the middle, was_truncated).
+    """
+    if max_bytes is None or len(data) <= max_bytes:
+        return data, False
+    head = int(max_bytes * head_ratio)
+    tail = max_bytes - head
+    dropped = len(data) - head - tail
+    return data[:head] + _marker(dropped) + (data[-tail:] if tail else b""), True
+
+
+def read_bounded(fh: BinaryIO, size: int, policy: OutputPolicy) -> Tuple[bytes, bool]:
+    """
+    Read at most policy.max_bytes from a file of `size` bytes without loading
+    the rest: the head is read from the start, the tail by seeking.
+    Returns (kept bytes, was_truncated).
+    """
+    fh.seek(0)
+    if policy.max_bytes is None or size <= policy.max_bytes:
+        return fh.read(), False
+    head = int(policy.max_bytes * policy.head_ratio)
+    tail = policy.max_bytes - head
+    first = fh.read(head)
+    last = b""
+    if tail:
+        fh.seek(size - tail)
+        last = fh.read(tail)
+    return first + _marker(size - head - tail) + last, True
+
+
+def spill_text(text: str, policy: OutputPolicy, suffix: str) -> str:
+    """
+    Write a full stream to a local file and return its path.
+    """
+    fd, path = tempfile.mkstemp(prefix="swe_vm_", suffix=suffix, dir=policy.spill_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    return path
+
+
+def bound_result(result: dict, policy: OutputPolicy) -> dict:
+    """
+    Apply the capture limit of `policy` to result['stdout'/'stderr'] in
+    place, spilling the full text to a local file if requested.
+    """
+    for stream in ("stdout", "stderr"):
+        text = result.get(stream) or ""
+        kept, truncated = truncate_bytes(text.encode("utf-8", errors="replace"),
+                                         policy.max_bytes, policy.head_ratio)
+        if not truncated:
+            continue
+        if policy.spill:
+            result[f"{stream}_file"] = spill_text(text, policy, f".{stream}")
+        result[stream] = kept.decode("utf-8", errors="replace")
+        result["truncated"] = True
+    return result
@@ -0,0 +1,112 @@
+# vm_executor/replay.py
+
+import logging
+import re
+import time
+import uuid
+from typing import List, Tuple
+
+from cassette import Cassette, CassetteMiss, CASSETTE_STRICT
+from vm_executor.executor import BaseExecutor
+from vm_executor.output import OutputPolicy, DEFAULT_POLICY
+
+logger = logging.getLogger(__name__)
+
+# per-call random ids (batch markers, spool and patch file names) differ
+# between runs; they are masked in the cassette key and mapped back on replay.
+# Anchored on non-hex neighbours (not \b: ids follow "_" in spool names and
+# batch markers) so 40-char git SHAs are left alone.
+_ID_RE = re.compile(r"(?<![0-9a-f])[0-9a-f]{32}(?![0-9a-f])")
+
+
+def mask_ids(command: str) -> Tuple[str, List[str]]:
+    """
+    The command with every uuid4 hex replaced by "<id>", and the ids in order.
+    """
+    return _ID_RE.sub("<id>", command), _ID_RE.findall(command)
+
+
+def _vm_request(command: str, timeout: str, policy: OutputPolicy) -> Tuple[dict, List[str]]:
+    masked, ids = mask_ids(command)
+    return {"command": masked, "timeout": timeout, "max_bytes": policy.max_bytes}, ids
+
+
+class RecordingVM(BaseExecutor):
+    """
+    Wraps a real executor and writes every run_command() exchange (and so
+    every batch and paged read built on it) to the cassette.
+    """
+    def __init__(self, inner: BaseExecutor, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+        self.setup_commands = inner.setup_commands
+
+    box_id = property(lambda self: self.inner.box_id)
+    round_trips = property(lambda self: self.inner.round_trips)
+    peak_output_bytes = property(lambda self: self.inner.peak_output_bytes)
+    last_output = property(lambda self: self.inner.last_output)
+
+    def create_vm(self) -> dict:
+        return self.inner.create_vm()
+
+    def reset_output_stats(self) -> None:
+        self.inner.reset_output_stats()
+
+    def run_command(self, command: str, timeout: str = "30s", echo: bool = True,
+                    policy: OutputPolicy = DEFAULT_POLICY) -> dict:
+        request, ids = _vm_request(command, timeout, policy)
+        started = time.perf_counter()
+        result = self.inner.run_command(command, timeout=timeout, echo=echo, policy=policy)
+        self.cassette.record("vm", request, {"result": result, "ids": ids},
+                             time.perf_counter() - started)
+        return result
+
+    def cleanup(self) -> None:
+        self.inner.cleanup()
+
+
+class ReplayVM(BaseExecutor):
+    """
+    Offline executor that answers commands from the cassette, after the
+    recorded (or configured) latency. Commands that were never recorded
+    (e.g. pool health checks) get an empty success unless CASSETTE_STRICT=1.
+    """
+    setup_commands = []
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self.box_id: str | None = None
+        self.round_trips: int = 0
+
+    def create_vm(self) -> dict:
+        self.box_id = f"replay-{uuid.uuid4().hex[:12]}"
+        return {"id": self.box_id, "config": {"os": {"version": "replay"}}, "expiresAt": None}
+
+    def run_command(self, command: str, timeout: str = "30s", echo: bool = True,
+                    policy: OutputPolicy = DEFAULT_POLICY) -> dict:
+        if not self.box_id:
+            raise RuntimeError("VM not created. Call create_vm() first.")
+        request, ids = _vm_request(command, timeout, policy)
+        self.round_trips += 1
+        try:
+            recorded, latency = self.cassette.replay("vm", request)
+        except CassetteMiss:
+            if CASSETTE_STRICT:
+                raise
+            logger.warning("[replay] command not in cassette, answering empty success: %s",
+                           request["command"][:200])
+            return {"exitCode": 0, "stdout": "", "stderr": ""}
+        self.cassette.simulate(latency)
+
+        result = dict(recorded["result"])
+        for old, new in zip(recorded["ids"], ids):
+            for stream in ("stdout", "stderr"):
+                if result.get(stream):
+                    result[stream] = result[stream].replace(old, new)
+        self._record_output(result, len(result.get("stdout") or "") + len(result.get("stderr") or ""))
+        if echo:
+            self._echo(command, result, policy)
+        return result
+
+    def cleanup(self) -> None:
+        self.box_id = None
@@ -0,0 +1,63 @@
+# vm_executor/repo_cache.py
+
+import hashlib
+import os
+import shlex
+from typing import Optional
+
+# Where bare mirrors live on the VM (shared by every issue on that box).
+REPO_CACHE_DIR = os.getenv("REPO_CACHE_DIR", "$HOME/.swe_repo_cache")
+# Optional partial-clone filter for the mirror, e.g. "blob:none".
+REPO_CACHE_FILTER = os.getenv("REPO_CACHE_FILTER", "")
+
+
+def mirror_path(repo_url: str) -> str:
+    """
+    Location of the bare mirror for `repo_url` on the VM.
+    """
+    key = hashlib.sha1(repo_url.encode()).hexdigest()[:16]
+    return f"{REPO_CACHE_DIR}/{key}.git"
+
+
+def sync_workspace_command(repo_url: str, workdir: str,
+                           commit: Optional[str] = None,
+                           filter_spec: str = REPO_CACHE_FILTER) -> str:
+    """
+    Build one shell script that brings `workdir` to `commit` (default: the
+    remote HEAD) using a per-repo bare mirror as the object store:
+
+      1. clone the mirror once (optionally partial), otherwise `git fetch` it;
+         a flock keeps concurrent issues on the same box from racing
+      2. if `workdir` is already a clone, fetch into it (objects come from
+         the mirror through alternates, so only new refs cross the network);
+         otherwise clone with `--reference <mirror>`
+      3. force-checkout the target detached and drop untracked files, so a
+         workspace left dirty by a previous issue is reset
+    """
+    mirror = mirror_path(repo_url)
+    url = shlex.quote(repo_url)
+    target = shlex.quote(commit) if commit else "origin/HEAD"
+    filter_opt = f"--filter={shlex.quote(filter_spec)} " if filter_spec else ""
+
+    return "\n".join([
+        "set -e",
+        f'mkdir -p "{REPO_CACHE_DIR}"',
+        f'exec 9>"{mirror}.lock"',
+        "if command -v flock >/dev/null; then flock 9; fi",
+        f'if [ -d "{mirror}" ]; then',
+        f'  git -C "{mirror}" fetch --prune --quiet origin',
+        "else",
+        f'  git clone --mirror --quiet {filter_opt}{url} "{mirror}"',
+        f'  git -C "{mirror}" config gc.auto 0  # never drop objects borrowed by workspaces',
+        "fi",
+        "exec 9>&-",
+        f"if [ -d {workdir}/.git ]; then",
+        f"  git -C {workdir} fetch --quiet origin",
+        "else",
+        f"  rm -rf {workdir}",
+        f'  git clone --quiet {filter_opt}--reference "{mirror}" {url} {workdir}',
+        "fi",
+        f"git -C {workdir} checkout --quiet --force --detach {target}",
+        f"git -C {workdir} clean -fdxq",
+        f"git -C {workdir} rev-parse HEAD",
+    ])
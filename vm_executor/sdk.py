@@ -1,28 +1,35 @@
 # executor/sdk.py
 
 import os
-import requests
 from dotenv import load_dotenv
 
+from vm_executor.executor import BaseExecutor
+from vm_executor.output import OutputPolicy, DEFAULT_POLICY, bound_result
+from vm_executor.http_session import request_with_retry, parse_duration
+
 load_dotenv()
 
-class SimpleGboxVM:
+class SimpleGboxVM(BaseExecutor):
     """
     A simple Gbox VM manager that supports:
       - Creating a Linux VM
-      - Executing shell commands on the VM
+      - Executing shell commands on the VM (one at a time or batched)
       - Cleaning up (terminating) the VM
     """
+    setup_commands = ["apt-get update && apt-get install -y patch"]
+
     def __init__(self, api_key: str | None = None):
         self.api_key = api_key or os.getenv("GBOX_API_KEY")
         if not self.api_key:
             raise RuntimeError("Please set the GBOX_API_KEY environment variable")
-        self.base_url = "https://gbox.ai/api/v1"
+        self.base_url = os.getenv("GBOX_BASE_URL", "https://gbox.ai/api/v1")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
         self.box_id: str | None = None
+        # number of HTTP requests sent to the gbox API by this client
+        self.round_trips: int = 0
 
     def create_vm(self) -> dict:
         """
@@ -37,7 +44,9 @@ class SimpleGboxVM:
                 "expiresIn": "30m"  # auto-expire after 30 minutes
             }
         }
-        resp = requests.post(url, json=payload, headers=self.headers)
+        resp = request_with_retry("POST", url, read_timeout=120, idempotent=False,
+                                  json=payload, headers=self.headers)
+        self.round_trips += 1
         resp.raise_for_status()
         info = resp.json()
         self.box_id = info["id"]
@@ -48,32 +57,32 @@ class SimpleGboxVM:
         print(f"⏰  Expiration time: {info['expiresAt']}")
         return info
 
-    def run_command(self, command: str) -> dict:
+    def run_command(self, command: str, timeout: str = "30s", echo: bool = True,
+                    policy: OutputPolicy = DEFAULT_POLICY) -> dict:
         """
         Execute a shell command on the VM.
-        Returns a dict containing 'exitCode', 'stdout', and 'stderr'.
+        Returns a dict containing 'exitCode', 'stdout', and 'stderr'; output
+        beyond policy.max_bytes is cut to head + tail (result['truncated']).
         """
         if not self.box_id:
             raise RuntimeError("VM not created. Call create_vm() first.")
 
-        print(f"\n💻 Executing on VM: {command}")
         url = f"{self.base_url}/boxes/{self.box_id}/commands"
         payload = {
             "commands": command,
-            "timeout": "30s"
+            "timeout": timeout
         }
-        resp = requests.post(url, json=payload, headers=self.headers)
+        # allow the command its full VM-side timeout plus some slack for transfer
+        resp = request_with_retry("POST", url, read_timeout=parse_duration(timeout) + 30,
+                                  idempotent=False, json=payload, headers=self.headers)
+        self.round_trips += 1
         resp.raise_for_status()
-        result = resp.json()
-
-        print(f"📋 Exit code: {result.get('exitCode')}")
-        if result.get("stdout"):
-            print("📤 stdout:")
-            print(result["stdout"])
-        if result.get("stderr"):
-            print("❌ stderr:")
-            print(result["stderr"])
+        received = len(resp.content)
+        result = bound_result(resp.json(), policy)
+        self._record_output(result, received)
 
+        if echo:
+            self._echo(command, result, policy)
         return result
 
     def cleanup(self) -> None:
@@ -87,7 +96,9 @@ class SimpleGboxVM:
         url = f"{self.base_url}/boxes/{self.box_id}/terminate"
         payload = {"wait": True}
         try:
-            resp = requests.post(url, json=payload, headers=self.headers)
+            resp = request_with_retry("POST", url, read_timeout=120,
+                                      json=payload, headers=self.headers)
+            self.round_trips += 1
             resp.raise_for_status()
             print("✅ VM terminated successfully")
         except Exception as e:
@@ -1,46 +1,155 @@
 # locator/vm_manager.py
 
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from vm_executor.executor import BaseExecutor, AsyncExecutorAdapter, create_executor
 from vm_executor.sdk import SimpleGboxVM
+from vm_executor.async_sdk import AsyncGboxVM
+from vm_executor.vm_pool import VMPool
+from vm_executor.http_session import parse_duration
+from vm_executor.repo_cache import sync_workspace_command
+from vm_executor.output import OutputPolicy, DEFAULT_POLICY, UNBOUNDED
+
+_pool: VMPool | None = None
+# VM leased by the current issue (set by lease_vm())
+_leased_vm: ContextVar[Optional[BaseExecutor]] = ContextVar("leased_vm", default=None)
+# VM held for callers that never lease one explicitly
+_default_vm: BaseExecutor | None = None
+_default_lock = threading.Lock()
+# async clients attached to the same box, keyed by box id
+_async_clients: Dict[str, AsyncGboxVM | AsyncExecutorAdapter] = {}
+
+# how many `nl -ba` reads are packed into one batched request
+READ_BATCH_SIZE = 200
 
-_vm_client: SimpleGboxVM | None = None
-from typing import Dict, Optional
+VM_POOL_MIN = int(os.getenv("VM_POOL_MIN", "1"))
+VM_POOL_MAX = int(os.getenv("VM_POOL_MAX", "4"))
+VM_RECYCLE_MARGIN = os.getenv("VM_RECYCLE_MARGIN", "5m")
 
 
-def initialize_vm(api_key: Optional[str] = None) -> SimpleGboxVM:
+def _prepare_vm(vm: BaseExecutor) -> None:
+    """
+    Install the tools every box needs before it is handed out.
+    Raises RuntimeError if a setup command fails.
+    """
+    for install_cmd in vm.setup_commands:
+        print(f"🔧 Installing required tools: {install_cmd}")
+        res = vm.run_command(install_cmd, timeout="300s", echo=False)
+        if res.get("exitCode") != 0:
+            raise RuntimeError(f"Setup command failed with exit code {res.get('exitCode')}: "
+                               f"{install_cmd}\n{(res.get('stderr') or '')[-500:]}")
+
+def initialize_vm(api_key: Optional[str] = None,
+                  min_size: int = VM_POOL_MIN,
+                  max_size: int = VM_POOL_MAX,
+                  backend: Optional[str] = None) -> VMPool:
     """
-    Create (or reuse) a single Gbox VM. Call once at program startup.
-    Returns the VM client.
+    Create (or reuse) the VM pool and start pre-warming boxes in the
+    background. Call once at program startup; returns without waiting.
+    `backend` ("gbox" or "local") defaults to the VM_BACKEND env variable.
     """
-    global _vm_client
-    if _vm_client is None:
-        _vm_client = SimpleGboxVM(api_key)
-        _vm_client.create_vm()
+    global _pool
+    if _pool is None:
+        _pool = VMPool(
+            factory=lambda: create_executor(backend, api_key),
+            prepare=_prepare_vm,
+            min_size=min_size,
+            max_size=max_size,
+            recycle_margin=parse_duration(VM_RECYCLE_MARGIN),
+        ).start()
+    return _pool
 
+def get_pool() -> VMPool:
+    """
+    Return the VM pool. Raises if initialize_vm() was never called.
+    """
+    if _pool is None:
+        raise RuntimeError("VM not initialized; call initialize_vm() first")
+    return _pool
 
-        print("🔧 Installing required tools ('patch')...")
-        install_cmd = "apt-get update && apt-get install -y patch"
-        result = _vm_client.run_command(install_cmd)
-        print(result["stdout"])
-    return _vm_client
+@contextmanager
+def lease_vm(timeout: Optional[float] = None) -> Iterator[BaseExecutor]:
+    """
+    Lease a box from the pool for the duration of the block. Inside the block
+    (and in threads/tasks started from its context) get_vm() returns it.
+    The box's output stats (peak_output_bytes) cover this lease only.
+    """
+    with get_pool().lease(timeout) as vm:
+        vm.reset_output_stats()
+        token = _leased_vm.set(vm)
+        try:
+            yield vm
+        finally:
+            _leased_vm.reset(token)
 
-def get_vm() -> SimpleGboxVM:
+def get_vm() -> BaseExecutor:
     """
-    Return the already-initialized VM.
+    Return the VM leased by the current context, or a process-wide default
+    box leased on first use.
     Raises if initialize_vm() was never called.
     """
-    global _vm_client
-    if _vm_client is None:
-        raise RuntimeError("VM not initialized; call initialize_vm() first")
-    return _vm_client
+    global _default_vm
+    vm = _leased_vm.get()
+    if vm is not None:
+        return vm
+    with _default_lock:
+        if _default_vm is None:
+            _default_vm = get_pool().acquire()
+        return _default_vm
+
+def get_async_vm() -> AsyncGboxVM | AsyncExecutorAdapter:
+    """
+    Return an async client attached to the current VM, so async nodes can
+    keep many commands in flight against the same box. Backends without a
+    native async client are wrapped in worker threads.
+    """
+    vm = get_vm()
+    client = _async_clients.get(vm.box_id)
+    if client is None:
+        if isinstance(vm, SimpleGboxVM):
+            client = AsyncGboxVM(vm.api_key, box_id=vm.box_id)
+        else:
+            client = AsyncExecutorAdapter(vm)
+        _async_clients[vm.box_id] = client
+    return client
 
 def cleanup_vm() -> None:
     """
-    Terminate and clean up the VM. Call once at program shutdown.
+    Terminate every pooled VM. Call once at program shutdown.
     """
-    global _vm_client
-    if _vm_client:
-        _vm_client.cleanup()
-        _vm_client = None
+    global _pool, _default_vm
+    if _pool:
+        print("🏊 VM pool:", _pool.stats())
+        _pool.close()
+        _pool = None
+    _default_vm = None
+    for client in _async_clients.values():
+        if isinstance(client, AsyncGboxVM):
+            client.release_client()
+    _async_clients.clear()
+
+def run_batch(commands: List[str], timeout: str = "120s",
+              policy: OutputPolicy = DEFAULT_POLICY) -> List[Dict]:
+    """
+    Helper: run several commands on the VM in one request.
+    Returns one {'exitCode', 'stdout', 'stderr'} dict per command.
+    """
+    return get_vm().run_batch(commands, timeout=timeout, policy=policy)
+
+def round_trip_count() -> int:
+    """
+    Number of gbox API requests issued so far against the current VM.
+    """
+    vm = _leased_vm.get() or _default_vm
+    if vm is None:
+        return 0
+    async_vm = _async_clients.get(vm.box_id)
+    return vm.round_trips + (async_vm.round_trips if async_vm else 0)
 
 
 # ─── LangGraph node implementations ───────────────────────────────────────────
@@ -57,15 +166,22 @@ def setup_workspace(state: Dict) -> Dict[str, str]:
 
 def clone_repository(state: Dict) -> Dict:
     """
-    LangGraph node: clone the target GitHub repo into the workspace.
-    Expects state['repo_url'] and state['workdir'].
-    Returns {} (no new state keys).
+    LangGraph node: bring the workspace to the target repo/commit.
+    Expects state['repo_url'] and state['workdir'] (optional state['commit']).
+    The first issue of a repo clones a bare mirror on the VM; later issues
+    only fetch and reset, see repo_cache.sync_workspace_command().
+    Returns {'commit': <checked-out sha>}.
     """
     vm = get_vm()
     repo_url = state["repo_url"]
     workdir  = state["workdir"]
-    vm.run_command(f"git clone {repo_url} {workdir}")
-    return {}
+    res = vm.run_command(
+        sync_workspace_command(repo_url, workdir, state.get("commit")),
+        timeout="600s",
+    )
+    if res["exitCode"] != 0:
+        raise RuntimeError(f"Failed to prepare workspace for {repo_url}: {res['stderr']}")
+    return {"commit": res["stdout"].strip().splitlines()[-1]}
 
 def read_file_numbered(path: str) -> str:
     """
@@ -74,5 +190,81 @@ def read_file_numbered(path: str) -> str:
     Returns the raw stdout as a single string.
     """
     vm = get_vm()
-    res = vm.run_command(f"nl -ba {path}")
+    res = vm.run_command(f"nl -ba {path}", echo=False, policy=UNBOUNDED)
+    return res["stdout"]
+
+def read_files_numbered(paths: List[str]) -> Dict[str, str]:
+    """
+    Helper: read many files on the VM with line numbers, READ_BATCH_SIZE
+    files per request instead of one request per file.
+    Returns {path: numbered stdout}.
+    """
+    contents: Dict[str, str] = {}
+    for start in range(0, len(paths), READ_BATCH_SIZE):
+        chunk = paths[start:start + READ_BATCH_SIZE]
+        results = run_batch([f"nl -ba {p}" for p in chunk], policy=UNBOUNDED)
+        for p, res in zip(chunk, results):
+            contents[p] = res["stdout"]
+    return contents
+
+def number_lines(text: str) -> str:
+    """
+    Helper: number lines on the client exactly like `nl -ba` does on the VM
+    (6-wide right-aligned number, a tab, then the line; blank lines included).
+    """
+    if not text:
+        return ""
+    lines = text.split("\n")
+    if text.endswith("\n"):
+        lines.pop()
+    return "".join(f"{i:6d}\t{line}\n" for i, line in enumerate(lines, 1))
+
+
+# ─── async variants (for async LangGraph nodes / ainvoke) ─────────────────────
+
+async def setup_workspace_async(state: Dict) -> Dict[str, str]:
+    """
+    Async LangGraph node: same as setup_workspace().
+    """
+    vm = get_async_vm()
+    workdir = "swe_agent"
+    await vm.run_command(f"mkdir -p {workdir}")
+    return {"workdir": workdir}
+
+async def clone_repository_async(state: Dict) -> Dict:
+    """
+    Async LangGraph node: same as clone_repository().
+    """
+    vm = get_async_vm()
+    repo_url = state["repo_url"]
+    res = await vm.run_command(
+        sync_workspace_command(repo_url, state["workdir"], state.get("commit")),
+        timeout="600s",
+    )
+    if res["exitCode"] != 0:
+        raise RuntimeError(f"Failed to prepare workspace for {repo_url}: {res['stderr']}")
+    return {"commit": res["stdout"].strip().splitlines()[-1]}
+
+async def read_file_numbered_async(path: str) -> str:
+    """
+    Async helper: same as read_file_numbered().
+    """
+    vm = get_async_vm()
+    res = await vm.run_command(f"nl -ba {path}", policy=UNBOUNDED)
     return res["stdout"]
+
+async def read_files_numbered_async(paths: List[str]) -> Dict[str, str]:
+    """
+    Async helper: read many files concurrently, READ_BATCH_SIZE files per
+    request, with all requests in flight at once (bounded by the client).
+    """
+    vm = get_async_vm()
+    chunks = [paths[i:i + READ_BATCH_SIZE] for i in range(0, len(paths), READ_BATCH_SIZE)]
+    batches = await asyncio.gather(
+        *(vm.run_batch([f"nl -ba {p}" for p in chunk], policy=UNBOUNDED) for chunk in chunks)
+    )
+    contents: Dict[str, str] = {}
+    for chunk, results in zip(chunks, batches):
+        for p, res in zip(chunk, results):
+            contents[p] = res["stdout"]
+    return contents
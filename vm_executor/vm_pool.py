@@ -0,0 +1,308 @@
+# vm_executor/vm_pool.py
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+from vm_executor.executor import BaseExecutor
+
+
+@dataclass
+class PooledVM:
+    """
+    Book-keeping for one box owned by the pool.
+    """
+    vm: BaseExecutor
+    created_at: float                 # time.monotonic() when the box became ready
+    expires_at: Optional[float]       # time.monotonic() deadline derived from 'expiresAt'
+    last_used: float = 0.0            # time.monotonic() of the last release
+    leased_at: Optional[float] = None
+    leases: int = 0
+
+
+def _parse_expiry(info: dict) -> Optional[float]:
+    """
+    Convert the box 'expiresAt' timestamp into a time.monotonic() deadline.
+    """
+    raw = info.get("expiresAt")
+    if not raw:
+        return None
+    try:
+        expires = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return time.monotonic() + (expires.timestamp() - time.time())
+
+
+class VMPool:
+    """
+    A pool of pre-warmed VMs:
+      - keeps at least `min_size` boxes created and prepared in the background
+      - never holds more than `max_size` boxes
+      - hands out boxes through acquire()/release() or the lease() context manager
+      - health-checks boxes that sat idle, and recycles boxes close to expiry
+      - reports lease wait time and utilization via stats()
+    """
+    def __init__(self,
+                 factory: Callable[[], BaseExecutor],
+                 prepare: Optional[Callable[[BaseExecutor], None]] = None,
+                 min_size: int = 1,
+                 max_size: int = 4,
+                 recycle_margin: float = 300.0,
+                 health_check_after: float = 30.0):
+        if min_size > max_size:
+            raise ValueError("min_size must not exceed max_size")
+        self.factory = factory
+        self.prepare = prepare
+        self.min_size = min_size
+        self.max_size = max_size
+        self.recycle_margin = recycle_margin
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle: Deque[PooledVM] = deque()
+        self._leased: Dict[int, PooledVM] = {}
+        self._creating = 0
+        self._waiters = 0
+        self._closed = False
+
+        # metrics
+        self._waits: List[float] = []
+        self._leased_seconds = 0.0
+        self._vm_seconds = 0.0        # lifetime of boxes already destroyed
+        self._created = 0
+        self._recycled = 0
+        self._unhealthy = 0
+
+    # ─── lifecycle ──────────────────────────────────────────────────────────
+
+    def start(self) -> "VMPool":
+        """
+        Begin pre-warming boxes in the background. Returns immediately.
+        """
+        self._replenish()
+        return self
+
+    def close(self) -> None:
+        """
+        Terminate every box (idle and leased). Call once at program shutdown.
+        """
+        with self._cond:
+            self._closed = True
+            entries = list(self._idle) + list(self._leased.values())
+            self._idle.clear()
+            self._leased.clear()
+            self._cond.notify_all()
+        for entry in entries:
+            self._destroy(entry)
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._leased) + self._creating
+
+    def _replenish(self) -> None:
+        """
+        Start background creations until idle + creating reaches min_size.
+        Must not be called with the lock held.
+        """
+        with self._cond:
+            missing = 0
+            while (not self._closed
+                   and len(self._idle) + self._creating + missing < self.min_size
+                   and self._total() + missing < self.max_size):
+                missing += 1
+            self._creating += missing
+        for _ in range(missing):
+            threading.Thread(target=self._create_in_background, daemon=True).start()
+
+    def _spawn(self) -> PooledVM:
+        """
+        Create and prepare one box (blocking). A box that fails preparation
+        is cleaned up before the error propagates.
+        """
+        vm = self.factory()
+        info = vm.create_vm()
+        if self.prepare:
+            try:
+                self.prepare(vm)
+            except Exception:
+                vm.cleanup()
+                raise
+        now = time.monotonic()
+        with self._cond:
+            self._created += 1
+        return PooledVM(vm=vm, created_at=now, expires_at=_parse_expiry(info), last_used=now)
+
+    def _create_in_background(self) -> None:
+        try:
+            entry = self._spawn()
+        except Exception as e:
+            print(f"⚠️ VM pre-warm failed: {e}")
+            with self._cond:
+                self._creating -= 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._creating -= 1
+            closed = self._closed
+            if not closed:
+                self._idle.append(entry)
+            self._cond.notify_all()
+        if closed:
+            self._destroy(entry)
+
+    def _destroy(self, entry: PooledVM) -> None:
+        with self._cond:
+            self._vm_seconds += time.monotonic() - entry.created_at
+        entry.vm.cleanup()
+
+    # ─── leasing ────────────────────────────────────────────────────────────
+
+    def _near_expiry(self, entry: PooledVM) -> bool:
+        return (entry.expires_at is not None
+                and entry.expires_at - time.monotonic() < self.recycle_margin)
+
+    def _healthy(self, entry: PooledVM) -> bool:
+        if time.monotonic() - entry.last_used < self.health_check_after:
+            return True
+        try:
+            return entry.vm.run_command("true", echo=False).get("exitCode") == 0
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> BaseExecutor:
+        """
+        Lease a ready box. Waits for a pre-warmed box, or creates one in the
+        calling thread if the pool is below max_size. Raises TimeoutError if
+        no box becomes available within `timeout` seconds.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        while True:
+            entry: Optional[PooledVM] = None
+            create_here = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("VM pool is closed")
+                    if self._idle:
+                        entry = self._idle.popleft()
+                        break
+                    # boxes already being created are spoken for by earlier waiters;
+                    # only start another one if none is left over for us
+                    if self._total() < self.max_size and self._creating <= self._waiters:
+                        self._creating += 1
+                        create_here = True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a VM from the pool")
+                    self._waiters += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+
+            if create_here:
+                try:
+                    entry = self._spawn()
+                except Exception:
+                    with self._cond:
+                        self._creating -= 1
+                        self._cond.notify_all()
+                    raise
+            elif self._near_expiry(entry):
+                with self._cond:
+                    self._recycled += 1
+                self._destroy(entry)
+                self._replenish()
+                continue
+            elif not self._healthy(entry):
+                with self._cond:
+                    self._unhealthy += 1
+                self._destroy(entry)
+                self._replenish()
+                continue
+
+            now = time.monotonic()
+            with self._cond:
+                if create_here:
+                    self._creating -= 1
+                entry.leased_at = now
+                entry.leases += 1
+                self._leased[id(entry.vm)] = entry
+                self._waits.append(now - start)
+            self._replenish()
+            return entry.vm
+
+    def release(self, vm: BaseExecutor, healthy: bool = True) -> None:
+        """
+        Return a leased box. Unhealthy or nearly expired boxes are destroyed
+        and replaced in the background.
+        """
+        with self._cond:
+            entry = self._leased.pop(id(vm), None)
+            if entry is None:
+                return
+            now = time.monotonic()
+            self._leased_seconds += now - (entry.leased_at or now)
+            entry.leased_at = None
+            entry.last_used = now
+            keep = healthy and not self._closed and not self._near_expiry(entry)
+            if keep:
+                self._idle.append(entry)
+                self._cond.notify_all()
+        if not keep:
+            self._destroy(entry)
+            self._replenish()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[BaseExecutor]:
+        """
+        Context manager around acquire()/release(). A box is treated as
+        unhealthy if the body raises a connection-level error.
+        """
+        vm = self.acquire(timeout)
+        healthy = True
+        try:
+            yield vm
+        except (ConnectionError, OSError):
+            healthy = False
+            raise
+        finally:
+            self.release(vm, healthy=healthy)
+
+    # ─── metrics ────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """
+        Pool metrics:
+          - size / idle / leased / creating: current box counts
+          - created / recycled / unhealthy: lifetime counters
+          - leases, avg_wait_s, max_wait_s: time callers spent in acquire()
+          - utilization: leased box-seconds / total box-seconds
+        """
+        with self._cond:
+            now = time.monotonic()
+            live = list(self._idle) + list(self._leased.values())
+            vm_seconds = self._vm_seconds + sum(now - e.created_at for e in live)
+            leased_seconds = self._leased_seconds + sum(
+                now - e.leased_at for e in self._leased.values() if e.leased_at
+            )
+            waits = list(self._waits)
+            return {
+                "size":        len(live),
+                "idle":        len(self._idle),
+                "leased":      len(self._leased),
+                "creating":    self._creating,
+                "created":     self._created,
+                "recycled":    self._recycled,
+                "unhealthy":   self._unhealthy,
+                "leases":      len(waits),
+                "avg_wait_s":  round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "max_wait_s":  round(max(waits), 3) if waits else 0.0,
+                "utilization": round(leased_seconds / vm_seconds, 3) if vm_seconds else 0.0,
+            }